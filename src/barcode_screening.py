@@ -0,0 +1,257 @@
+"""
+BARCODE-LEVEL BDS SCREENING FOR RETAIL INVENTORY
+Screens EAN/UPC codes against GS1 country prefixes, company prefixes and known EANs
+"""
+
+import csv
+import random
+import time
+from array import array
+from pathlib import Path
+
+# Configuration
+REFERENCE_DIR = Path("data/reference")
+PREFIX_FILE = REFERENCE_DIR / "gs1_prefixes.csv"
+BARCODE_COLUMNS = ["ean", "upc", "barcode", "gtin", "ean13", "sku_barcode"]
+
+# More specific matches win when several prefixes cover the same code
+KIND_RANK = {"country": 0, "company": 1, "ean": 2}
+
+
+def check_digit(digits):
+    """GS1 mod-10 check digit for a string of digits (without the check digit)"""
+    reversed_digits = digits[::-1]
+    total = 3 * sum(map(int, reversed_digits[0::2])) + sum(map(int, reversed_digits[1::2]))
+    return str(-total % 10)
+
+
+def normalize_barcode(raw):
+    """Normalize an EAN-8/UPC-A/EAN-13/GTIN-14 code, returns None if invalid"""
+    digits = str(raw).strip()
+    if not (digits.isascii() and digits.isdigit()):
+        digits = "".join(ch for ch in digits if ch in "0123456789")
+
+    if len(digits) == 12:
+        digits = "0" + digits  # UPC-A is EAN-13 with a leading zero
+    elif len(digits) == 14:
+        if check_digit(digits[:13]) != digits[13]:
+            return None
+        digits = digits[1:13] + check_digit(digits[1:13])  # drop packaging indicator
+    elif len(digits) not in (8, 13):
+        return None
+
+    if check_digit(digits[:-1]) != digits[-1]:
+        return None
+    return digits
+
+
+class PrefixTrie:
+    """Compact digit trie stored in flat arrays (10 child slots per node)"""
+
+    def __init__(self):
+        self.children = array("i", [-1] * 10)
+        self.payload = array("i", [-1])
+        self.entries = []
+
+    def insert(self, prefix, entry):
+        """Insert a digit prefix; an existing entry is kept if it is more specific"""
+        node = 0
+        for ch in prefix:
+            slot = node * 10 + int(ch)
+            child = self.children[slot]
+            if child < 0:
+                child = len(self.payload)
+                self.children.extend([-1] * 10)
+                self.payload.append(-1)
+                self.children[slot] = child
+            node = child
+
+        current = self.payload[node]
+        if current >= 0 and KIND_RANK[self.entries[current]["kind"]] > KIND_RANK[entry["kind"]]:
+            return
+        self.entries.append(entry)
+        self.payload[node] = len(self.entries) - 1
+
+    def longest_match(self, code):
+        """Return the entry of the longest prefix of code, or None"""
+        children = self.children
+        payload = self.payload
+        node = 0
+        best = payload[0]
+        for ch in code:
+            node = children[node * 10 + ord(ch) - 48]
+            if node < 0:
+                break
+            if payload[node] >= 0:
+                best = payload[node]
+        return self.entries[best] if best >= 0 else None
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class BarcodeScreener:
+    """Screens barcodes against GS1 prefixes and the settlement barcode list"""
+
+    def __init__(self, prefix_file=PREFIX_FILE, extra_entries=None):
+        self.trie = PrefixTrie()
+        if Path(prefix_file).exists():
+            self.load_prefix_file(prefix_file)
+        for entry in extra_entries or []:
+            self.add_entry(**entry)
+
+    def load_prefix_file(self, path):
+        """Load prefix,kind,label,bds_status,reason rows into the trie"""
+        with open(path, "r", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                self.add_entry(row["prefix"], row["kind"], row["label"],
+                               row.get("bds_status") or "NO FLAG", row.get("reason", ""))
+
+    def add_entry(self, prefix, kind, label, bds_status="NON-COMPLIANT", reason=""):
+        """Add a country prefix, company prefix or full EAN"""
+        if kind not in KIND_RANK:
+            raise ValueError(f"Unknown prefix kind: {kind}")
+        prefix = "".join(ch for ch in str(prefix) if ch in "0123456789")
+        if kind == "ean":
+            prefix = normalize_barcode(prefix) or prefix
+        self.trie.insert(prefix, {
+            "prefix": prefix,
+            "kind": kind,
+            "label": label,
+            "bds_status": bds_status,
+            "reason": reason or f"Matched GS1 {kind} prefix {prefix} ({label})"
+        })
+
+    def screen(self, raw_code):
+        """Screen a single barcode"""
+        code = normalize_barcode(raw_code)
+        if code is None:
+            return {"barcode": code, "bds_status": "INVALID", "matched_prefix": "",
+                    "match_kind": "", "label": "", "reason": "Not a valid EAN/UPC code"}
+
+        # EAN-8 and EAN-13 share the GS1 prefix space; UPC codes start with 0
+        entry = self.trie.longest_match(code)
+        if entry is None:
+            return {"barcode": code, "bds_status": "NEEDS VERIFICATION", "matched_prefix": "",
+                    "match_kind": "", "label": "", "reason": "Unknown GS1 prefix"}
+        return {"barcode": code, "bds_status": entry["bds_status"], "matched_prefix": entry["prefix"],
+                "match_kind": entry["kind"], "label": entry["label"], "reason": entry["reason"]}
+
+    def screen_codes(self, codes):
+        """Screen an iterable of barcodes, yields one result per code"""
+        cache = {}
+        for raw in codes:
+            yield self._screen_cached(raw, cache)
+
+    def _screen_cached(self, raw, cache, max_size=100000):
+        """Screen with a bounded memo, inventory files repeat the same codes a lot"""
+        result = cache.get(raw)
+        if result is None:
+            result = self.screen(raw)
+            if len(cache) < max_size:
+                cache[raw] = result
+        return result
+
+    def screen_csv(self, input_path, output_path=None, column=None):
+        """Screen every row of an inventory CSV, streaming results to output_path"""
+        input_path = Path(input_path)
+        if output_path is None:
+            output_path = input_path.with_name(f"{input_path.stem}_bds_screened.csv")
+
+        summary = {"total": 0, "by_status": {}}
+        result_fields = ["barcode_normalized", "bds_status", "matched_prefix", "match_kind", "reason"]
+
+        with open(input_path, "r", newline="", encoding="utf-8-sig") as fin, \
+             open(output_path, "w", newline="", encoding="utf-8") as fout:
+            reader = csv.DictReader(fin)
+            column = column or self._detect_column(reader.fieldnames or [])
+            writer = csv.DictWriter(fout, fieldnames=list(reader.fieldnames) + result_fields)
+            writer.writeheader()
+
+            cache = {}
+            for row in reader:
+                result = self._screen_cached(row.get(column, ""), cache)
+                row["barcode_normalized"] = result["barcode"] or ""
+                row["bds_status"] = result["bds_status"]
+                row["matched_prefix"] = result["matched_prefix"]
+                row["match_kind"] = result["match_kind"]
+                row["reason"] = result["reason"]
+                writer.writerow(row)
+
+                summary["total"] += 1
+                status = result["bds_status"]
+                summary["by_status"][status] = summary["by_status"].get(status, 0) + 1
+
+        summary["output_file"] = str(output_path)
+        return summary
+
+    def _detect_column(self, fieldnames):
+        """Find the barcode column of an inventory file"""
+        lowered = {name.lower().strip(): name for name in fieldnames}
+        for candidate in BARCODE_COLUMNS:
+            if candidate in lowered:
+                return lowered[candidate]
+        raise ValueError(f"No barcode column found in {fieldnames}, expected one of {BARCODE_COLUMNS}")
+
+
+def run_benchmark(n_codes=500000, seed=42):
+    """Benchmark bulk screening throughput on random valid EAN-13 codes"""
+    rng = random.Random(seed)
+    screener = BarcodeScreener()
+    prefixes = [entry["prefix"] for entry in screener.trie.entries]
+
+    codes = []
+    for _ in range(n_codes):
+        body = rng.choice(prefixes) + "".join(rng.choice("0123456789") for _ in range(9))
+        body = body[:12]
+        codes.append(body + check_digit(body))
+
+    start = time.perf_counter()
+    statuses = {}
+    for result in screener.screen_codes(codes):
+        statuses[result["bds_status"]] = statuses.get(result["bds_status"], 0) + 1
+    elapsed = time.perf_counter() - start
+
+    return {
+        "codes": n_codes,
+        "trie_entries": len(screener.trie),
+        "trie_nodes": len(screener.trie.payload),
+        "seconds": round(elapsed, 3),
+        "codes_per_second": int(n_codes / elapsed) if elapsed else None,
+        "by_status": statuses
+    }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Screen retail barcodes for BDS compliance")
+    parser.add_argument("csv_file", nargs="?", help="Inventory CSV with an EAN/UPC column")
+    parser.add_argument("--column", help="Barcode column name (auto-detected by default)")
+    parser.add_argument("--output", help="Output CSV path")
+    parser.add_argument("--benchmark", type=int, metavar="N", help="Benchmark N random codes")
+    args = parser.parse_args()
+
+    print("="*60)
+    print("🔎 BARCODE BDS SCREENING")
+    print("="*60)
+
+    if args.benchmark:
+        stats = run_benchmark(args.benchmark)
+        print(f"\n⏱️  Screened {stats['codes']:,} codes in {stats['seconds']}s "
+              f"({stats['codes_per_second']:,} codes/s)")
+        print(f"   Trie: {stats['trie_entries']} entries, {stats['trie_nodes']} nodes")
+        return
+
+    if not args.csv_file:
+        parser.error("csv_file is required unless --benchmark is given")
+
+    summary = BarcodeScreener().screen_csv(args.csv_file, args.output, args.column)
+    print(f"\n✅ Screened {summary['total']:,} barcodes")
+    for status, count in sorted(summary["by_status"].items()):
+        print(f"   {status}: {count:,}")
+    print(f"\n💾 Results saved to: {summary['output_file']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""
+BULK BDS COMPLIANCE REPORTING OVER THE SCANNED DATASET
+Runs every business and product record through RealBDSVerifier in a process pool
+"""
+
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from real_bds_verifier import RealBDSVerifier
+
+# Configuration
+DATA_FILE = Path("data/raw/complete_market_data.json")
+OUTPUT_DIR = Path("data/processed/compliance")
+CHUNK_SIZE = 500
+READ_SIZE = 1 << 16            # characters read at a time while streaming the scan file
+RECORD_SECTIONS = {"businesses": "business", "products": "product"}
+
+TABLE_COLUMNS = [
+    "record_type", "record_id", "name", "category", "location", "data_quality",
+    "scanner_flag", "verifier_status", "report_status", "bds_status",
+    "reason", "certainty", "flag_mismatch"
+]
+# Columnar table: categorical columns as int32 codes into a label list, free text as strings
+CATEGORICAL_COLUMNS = ["record_type", "category", "location", "data_quality", "scanner_flag",
+                       "verifier_status", "report_status", "bds_status", "certainty"]
+TEXT_COLUMNS = ["record_id", "name", "reason"]
+
+_verifier = None
+
+
+class _JSONStream:
+    """Incremental reader over a JSON text: one value at a time, never the whole document"""
+
+    def __init__(self, f):
+        self.f = f
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        # Read at least as much as is buffered, so re-parsing a large value stays linear overall
+        chunk = self.f.read(max(READ_SIZE, len(self.buffer) - self.pos))
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        self.eof = not chunk
+        return bool(chunk)
+
+    def peek(self):
+        """Next non-whitespace character, or "" at the end of the input"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Malformed scan file: expected '{char}'")
+        self.pos += 1
+
+    def skip(self, char):
+        """Consume char if it is next; True when it was"""
+        if self.peek() == char:
+            self.pos += 1
+            return True
+        return False
+
+    def value(self):
+        """Decode the next complete value, reading more input until it is whole"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+
+def iter_records(data_file=DATA_FILE):
+    """Yield (record_type, record) for every business and product, streamed in file order"""
+    with open(data_file, "r", encoding="utf-8") as f:
+        stream = _JSONStream(f)
+        stream.expect("{")
+        while not stream.skip("}"):
+            key = stream.value()
+            stream.expect(":")
+            if key in RECORD_SECTIONS and stream.skip("["):
+                while not stream.skip("]"):
+                    yield RECORD_SECTIONS[key], stream.value()
+                    stream.skip(",")
+            else:
+                stream.value()      # other sections (trade, bds, ...) are decoded and dropped
+            stream.skip(",")
+
+
+def iter_chunks(records, chunk_size=CHUNK_SIZE):
+    """Group records into numbered chunks"""
+    chunk = []
+    chunk_id = 0
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == chunk_size:
+            yield chunk_id, chunk
+            chunk_id += 1
+            chunk = []
+    if chunk:
+        yield chunk_id, chunk
+
+
+def _init_worker():
+    """Build one verifier per worker process"""
+    global _verifier
+    _verifier = RealBDSVerifier()
+
+
+def assess_record(verifier, record_type, record):
+    """Compute the real BDS verdict for one business or product record"""
+    if record_type == "business":
+        name = record.get("name", "")
+        company = verifier.verify_company(name)
+        report = verifier.generate_compliance_report(record)
+    else:
+        name = record.get("english_title") or record.get("title", "")
+        supply_chain = [record.get("title", ""), record.get("english_title", ""), record.get("description", "")]
+        company = verifier.verify_company(record.get("seller", ""), supply_chain=supply_chain)
+        report = verifier.generate_compliance_report({
+            "name": record.get("seller") or name,
+            "location": record.get("location", ""),
+            "certifications": record.get("certifications", [])
+        })
+
+    # A known settlement link overrides everything else
+    if company["status"] == "NON-COMPLIANT":
+        status, reason, certainty = company["status"], company["reason"], company["certainty"]
+    elif "COMPLIANT" in (company["status"], report["bds_status"]):
+        status = "COMPLIANT"
+        reason = company["reason"] if company["status"] == "COMPLIANT" else "; ".join(report["findings"])
+        certainty = company["certainty"] if company["status"] == "COMPLIANT" else "Medium"
+    else:
+        status, reason, certainty = "NEEDS VERIFICATION", company["reason"], "Low"
+
+    scanner_flag = record.get("bds_compliant", "")
+    return {
+        "record_type": record_type,
+        "record_id": record.get("id", ""),
+        "name": name,
+        "category": str(record.get("category", "")).title(),
+        "location": record.get("location", ""),
+        "data_quality": record.get("data_quality", ""),
+        "scanner_flag": scanner_flag,
+        "verifier_status": company["status"],
+        "report_status": report["bds_status"],
+        "bds_status": status,
+        "reason": reason,
+        "certainty": certainty,
+        "flag_mismatch": scanner_flag is True and status != "COMPLIANT"
+    }
+
+
+def _process_chunk(args):
+    """Worker: assess one chunk and write it as a columnar part file"""
+    chunk_id, chunk, parts_dir = args
+    rows = [assess_record(_verifier, record_type, record) for record_type, record in chunk]
+
+    columns = {column: np.array([str(row[column]) for row in rows]) for column in TABLE_COLUMNS}
+    columns["flag_mismatch"] = np.array([row["flag_mismatch"] for row in rows], dtype=bool)
+    part_file = Path(parts_dir) / f"part-{chunk_id:05d}.npz"
+    tmp_file = part_file.with_suffix(".tmp")
+    with open(tmp_file, "wb") as f:
+        np.savez(f, **columns)
+    os.replace(tmp_file, part_file)  # a part only exists once it is complete
+    return chunk_id, len(rows)
+
+
+def load_table(table_file):
+    """Compliance table as {column: array}, categorical codes decoded back to labels"""
+    with np.load(table_file) as data:
+        labels = json.loads(str(data["labels"]))
+        table = {column: np.array(labels[column], dtype=str)[data[f"code_{column}"]]
+                 if labels[column] else np.zeros(0, dtype=str) for column in CATEGORICAL_COLUMNS}
+        table.update({column: data[column] for column in TEXT_COLUMNS + ["flag_mismatch"]})
+    return table
+
+
+class BulkComplianceJob:
+    """Resumable batch job producing a compliance table and summary"""
+
+    def __init__(self, data_file=DATA_FILE, output_dir=OUTPUT_DIR, chunk_size=CHUNK_SIZE, workers=None):
+        self.data_file = Path(data_file)
+        self.output_dir = Path(output_dir)
+        self.parts_dir = self.output_dir / "parts"
+        self.progress_file = self.output_dir / "progress.json"
+        self.chunk_size = chunk_size
+        self.workers = workers or os.cpu_count()
+
+    def _load_progress(self):
+        """Return the chunk ids already written, restarting if the job changed"""
+        job = {"data_file": str(self.data_file), "chunk_size": self.chunk_size,
+               "data_mtime": self.data_file.stat().st_mtime, "parts": "npz"}
+        if self.progress_file.exists():
+            with open(self.progress_file, "r", encoding="utf-8") as f:
+                progress = json.load(f)
+            if progress.get("job") == job:
+                return job, set(progress.get("done", []))
+
+        for part in self.parts_dir.glob("part-*.npz"):
+            part.unlink()
+        return job, set()
+
+    def _save_progress(self, job, done):
+        tmp_file = self.progress_file.with_suffix(".tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"job": job, "done": sorted(done)}, f)
+        os.replace(tmp_file, self.progress_file)
+
+    def run(self):
+        """Assess all records, skipping chunks finished by an earlier run"""
+        self.parts_dir.mkdir(parents=True, exist_ok=True)
+        job, done = self._load_progress()
+        skipped = len(done)
+
+        pending = (
+            (chunk_id, chunk, str(self.parts_dir))
+            for chunk_id, chunk in iter_chunks(iter_records(self.data_file), self.chunk_size)
+            if chunk_id not in done
+        )
+
+        # Keep at most two chunks per worker in flight so memory is bounded by the chunk size
+        window = 2 * self.workers
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker) as pool:
+            running = set()
+            for task in pending:
+                running.add(pool.submit(_process_chunk, task))
+                if len(running) >= window:
+                    finished, running = wait(running, return_when=FIRST_COMPLETED)
+                    self._record(job, done, finished)
+            self._record(job, done, wait(running).done)
+
+        table_file = self._merge_parts()
+        summary = self._write_summary()
+        summary["chunks_resumed"] = skipped
+        summary["table_file"] = str(table_file)
+        return summary
+
+    def _record(self, job, done, finished):
+        for future in finished:
+            chunk_id, _ = future.result()
+            done.add(chunk_id)
+        if finished:
+            self._save_progress(job, done)
+
+    def _merge_parts(self):
+        """Concatenate part files into the columnar compliance table (.npz)"""
+        lookup = {column: {} for column in CATEGORICAL_COLUMNS}
+        codes = {column: [] for column in CATEGORICAL_COLUMNS}
+        values = {column: [] for column in TEXT_COLUMNS + ["flag_mismatch"]}
+        for part in sorted(self.parts_dir.glob("part-*.npz")):
+            with np.load(part) as data:
+                for column in CATEGORICAL_COLUMNS:
+                    unique, inverse = np.unique(data[column], return_inverse=True)
+                    mapping = np.array([lookup[column].setdefault(label, len(lookup[column]))
+                                        for label in unique.tolist()], dtype=np.int32)
+                    codes[column].append(mapping[inverse.ravel()] if len(inverse) else np.zeros(0, np.int32))
+                for column in values:
+                    values[column].append(data[column])
+
+        empty = {"flag_mismatch": np.zeros(0, dtype=bool)}
+        arrays = {f"code_{column}": np.concatenate(parts) if parts else np.zeros(0, dtype=np.int32)
+                  for column, parts in codes.items()}
+        arrays.update({column: np.concatenate(parts) if parts else empty.get(column, np.zeros(0, dtype=str))
+                       for column, parts in values.items()})
+        arrays["labels"] = np.array(json.dumps({column: list(labels) for column, labels in lookup.items()},
+                                               ensure_ascii=False))
+        table_file = self.output_dir / "compliance_table.npz"
+        tmp_file = table_file.with_suffix(".tmp")
+        with open(tmp_file, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp_file, table_file)
+        return table_file
+
+    def _write_summary(self):
+        """Summarize verdicts by category and by location"""
+        table = load_table(self.output_dir / "compliance_table.npz")
+        status = table["bds_status"]
+        summary = {
+            "generated_at": datetime.now().isoformat(),
+            "total_records": int(len(status)),
+            "by_status": {},
+            "by_category": {},
+            "by_location": {},
+            "scanner_flag_mismatches": int(table["flag_mismatch"].sum())
+        }
+        labels, counts = np.unique(status, return_counts=True)
+        summary["by_status"] = dict(zip(labels.tolist(), counts.tolist()))
+        for key, field in (("by_category", "category"), ("by_location", "location")):
+            groups = np.where(table[field] == "", "Unknown", table[field])
+            pairs, counts = np.unique(np.stack([groups, status]), axis=1, return_counts=True)
+            for (group, verdict), count in zip(pairs.T.tolist(), counts.tolist()):
+                summary[key].setdefault(group, {})[verdict] = count
+
+        with open(self.output_dir / "compliance_summary.json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        return summary
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Bulk BDS compliance report over scanned data")
+    parser.add_argument("--data", default=str(DATA_FILE), help="Scanned market data JSON")
+    parser.add_argument("--output", default=str(OUTPUT_DIR), help="Output directory")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    print("="*60)
+    print("✊ BULK BDS COMPLIANCE REPORT")
+    print("="*60)
+
+    job = BulkComplianceJob(args.data, args.output, args.chunk_size, args.workers)
+    summary = job.run()
+
+    if summary["chunks_resumed"]:
+        print(f"\n♻️  Resumed: {summary['chunks_resumed']} chunks already done")
+    print(f"\n✅ Assessed {summary['total_records']} records")
+    for status, count in sorted(summary["by_status"].items()):
+        print(f"   {status}: {count}")
+    print(f"\n⚠️  Hard-coded bds_compliant flags not backed by a verdict: {summary['scanner_flag_mismatches']}")
+    print(f"\n💾 Table: {summary['table_file']}")
+    print(f"💾 Summary: {job.output_dir / 'compliance_summary.json'}")
+
+
+if __name__ == "__main__":
+    main()
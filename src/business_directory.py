@@ -0,0 +1,305 @@
+"""
+UNIFIED PALESTINIAN BUSINESS DIRECTORY
+One keyed store merging every verified-business source, with secondary indexes for fast queries
+"""
+
+import json
+import re
+from pathlib import Path
+
+# Configuration
+DATA_DIR = Path("data/real")
+DIRECTORY_FILE = Path("data/processed/business_directory.json")
+
+# Export market spellings used across the sources
+MARKET_ALIASES = {
+    "eu": "EU", "european union": "EU", "europe": "EU",
+    "usa": "USA", "us": "USA", "united states": "USA",
+    "uk": "UK", "united kingdom": "UK",
+    "gcc": "Middle East", "gcc countries": "Middle East", "middle east": "Middle East",
+    "worldwide": "Worldwide", "worldwide shipping": "Worldwide"
+}
+
+# Certification families: a record certified "EU Organic" also matches "organic"
+CERT_FAMILIES = {
+    "fair trade": ["fair trade", "fairtrade"],
+    "organic": ["organic", "soil association"],
+    "halal": ["halal"]
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+|[؀-ۿ]+")
+LOCATION_STOPWORDS = {"west", "bank", "area", "based", "in", "the", "and", "various", "online", "palestine"}
+
+
+def _tokens(text):
+    return [token[:-1] if len(token) > 3 and token.endswith("s") else token
+            for token in TOKEN_PATTERN.findall(str(text).lower())]
+
+
+def _as_list(value):
+    """Source files store products/markets either as lists or comma-separated strings"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [part.strip() for part in value.split(",") if part.strip()]
+    return list(value)
+
+
+def name_key(name):
+    """Stable record key derived from the business name"""
+    return re.sub(r"[^a-z0-9]+", "-", str(name).lower()).strip("-")
+
+
+def normalize_market(market):
+    text = str(market).strip()
+    return MARKET_ALIASES.get(text.lower(), text)
+
+
+def certification_terms(certification):
+    """Index terms for a certification: its own name plus its family"""
+    text = str(certification).strip().lower()
+    terms = {text}
+    for family, keywords in CERT_FAMILIES.items():
+        if any(keyword in text for keyword in keywords):
+            terms.add(family)
+    return terms
+
+
+def _website_host(url):
+    host = re.sub(r"^https?://", "", str(url or "").lower()).split("/")[0]
+    return host[4:] if host.startswith("www.") else host
+
+
+class BusinessDirectory:
+    """Keyed business store with incremental upserts and secondary indexes"""
+
+    def __init__(self):
+        self.records = {}
+        self.identities = {}   # name key / email / website host -> record key
+        self.indexes = {"product": {}, "certification": {}, "market": {}, "location": {}}
+        self.rejected = []     # {"source", "record", "error"} for records upsert_many skipped
+
+    def __len__(self):
+        return len(self.records)
+
+    def _identity_terms(self, business):
+        terms = [name_key(business.get("name", ""))]
+        contact = str(business.get("contact", "")).lower()
+        if "@" in contact:
+            terms.append(contact)
+        host = _website_host(business.get("website"))
+        if host:
+            terms.append(host)
+        return [term for term in terms if term]
+
+    def _index_terms(self, record):
+        terms = {"product": set(), "certification": set(), "market": set(), "location": set()}
+        for product in record.get("products", []):
+            terms["product"].update(_tokens(product))
+        for certification in record.get("certifications", []):
+            terms["certification"].update(certification_terms(certification))
+        for market in record.get("export_markets", []):
+            terms["market"].add(normalize_market(market).lower())
+        terms["location"].update(t for t in _tokens(record.get("location", "")) if t not in LOCATION_STOPWORDS)
+        return terms
+
+    def _unindex(self, key):
+        for index_name, terms in self._index_terms(self.records[key]).items():
+            for term in terms:
+                keys = self.indexes[index_name].get(term)
+                if keys:
+                    keys.discard(key)
+                    if not keys:
+                        del self.indexes[index_name][term]
+
+    def _index(self, key):
+        for index_name, terms in self._index_terms(self.records[key]).items():
+            for term in terms:
+                self.indexes[index_name].setdefault(term, set()).add(key)
+
+    def upsert(self, business, source="manual"):
+        """Insert or merge one business record; list fields are unioned, other fields updated.
+
+        ValueError when the record has no name, email or website to key it on.
+        """
+        identity = self._identity_terms(business)
+        if not identity:
+            raise ValueError(f"Business record has no name, email or website: {business!r:.120}")
+        key = next((self.identities[term] for term in identity if term in self.identities), None)
+        if key is None:
+            key = identity[0]
+            self.records[key] = {"key": key}
+        else:
+            self._unindex(key)
+
+        record = self.records[key]
+        for field, value in business.items():
+            if field in ("products", "certifications", "export_markets"):
+                merged = record.setdefault(field, [])
+                seen = {item.lower() for item in merged}
+                for item in _as_list(value):
+                    if item.lower() not in seen:
+                        merged.append(item)
+                        seen.add(item.lower())
+            elif field == "id":
+                if value not in record.setdefault("source_ids", []):
+                    record["source_ids"].append(value)
+            elif value not in ("", None, []):
+                record[field] = value
+        if source not in record.setdefault("sources", []):
+            record["sources"].append(source)
+
+        for term in identity:
+            self.identities.setdefault(term, key)
+        self._index(key)
+        return key
+
+    def upsert_many(self, businesses, source="manual"):
+        """Upsert each record; ones that cannot be keyed are skipped and listed in self.rejected"""
+        keys = []
+        for business in businesses:
+            try:
+                keys.append(self.upsert(business, source))
+            except ValueError as e:
+                self.rejected.append({"source": source, "record": business, "error": str(e)})
+        return keys
+
+    def remove(self, key):
+        if key in self.records:
+            self._unindex(key)
+            del self.records[key]
+            self.identities = {term: k for term, k in self.identities.items() if k != key}
+
+    def get(self, name_or_key):
+        key = self.identities.get(name_key(name_or_key), name_or_key)
+        return self.records.get(key)
+
+    def query(self, product=None, certification=None, market=None, location=None, ready_to_export=None):
+        """Businesses matching every given filter, e.g. query("olive oil", "fair trade", "Japan")"""
+        candidates = None
+
+        def narrow(keys):
+            nonlocal candidates
+            candidates = set(keys) if candidates is None else candidates & keys
+
+        if product:
+            for token in _tokens(product):
+                narrow(self.indexes["product"].get(token, set()))
+        if certification:
+            narrow(self.indexes["certification"].get(str(certification).strip().lower(), set()))
+        if market:
+            keys = self.indexes["market"].get(normalize_market(market).lower(), set())
+            narrow(keys | self.indexes["market"].get("worldwide", set()))
+        if location:
+            for token in _tokens(location):
+                narrow(self.indexes["location"].get(token, set()))
+
+        keys = self.records.keys() if candidates is None else candidates
+        results = []
+        for key in keys:
+            record = self.records[key]
+            if product and not any(product.lower() in p.lower() for p in record.get("products", [])):
+                continue
+            if ready_to_export is not None and bool(record.get("ready_to_export")) != ready_to_export:
+                continue
+            results.append(record)
+        return sorted(results, key=lambda record: record["name"])
+
+    def near(self, place, radius_km=20.0):
+        """(distance_km, record) for businesses within radius_km of a locality, nearest first"""
+        from gazetteer import get_gazetteer, index_records
+
+        gazetteer = get_gazetteer()
+        center = gazetteer.lookup(place)
+        if center is None:
+            raise KeyError(f"Unknown locality: {place}")
+        index, _ = index_records(self.records.values(), gazetteer, id_field="key")
+        return [(distance, record) for distance, _, record in index.within(center["lat"], center["lon"], radius_km)]
+
+    def save(self, path=DIRECTORY_FILE):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(list(self.records.values()), f, indent=2, ensure_ascii=False)
+        return path
+
+    @classmethod
+    def load(cls, path=DIRECTORY_FILE):
+        """Restore a saved directory and rebuild its indexes"""
+        directory = cls()
+        with open(path, "r", encoding="utf-8") as f:
+            for record in json.load(f):
+                key = record["key"]
+                directory.records[key] = record
+                for term in directory._identity_terms(record):
+                    directory.identities.setdefault(term, key)
+                directory._index(key)
+        return directory
+
+
+def iter_json_sources(data_dir=DATA_DIR):
+    """(source, businesses) for every business list JSON written under data/real"""
+    data_dir = Path(data_dir)
+    if not data_dir.exists():
+        return
+    for path in sorted(data_dir.rglob("*.json")):
+        if ".stage_cache" in path.parts:
+            continue
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+        if isinstance(data, list) and data and all(isinstance(item, dict) and "name" in item for item in data):
+            yield str(path), data
+
+
+def build_directory(data_dir=DATA_DIR):
+    """Merge all verified-business sources, least to most detailed"""
+    from create_real_data import real_businesses
+    from palestine_real_toolkit import VERIFIED_BUSINESSES
+    from real_business_directory import build_real_directory
+
+    directory = BusinessDirectory()
+    for source, businesses in iter_json_sources(data_dir):
+        directory.upsert_many(businesses, source)
+    directory.upsert_many(real_businesses, "create_real_data")
+    directory.upsert_many(VERIFIED_BUSINESSES, "palestine_real_toolkit")
+    directory.upsert_many(build_real_directory(), "real_business_directory")
+    return directory
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Query the unified Palestinian business directory")
+    parser.add_argument("--product")
+    parser.add_argument("--certification")
+    parser.add_argument("--market")
+    parser.add_argument("--location")
+    parser.add_argument("--save", action="store_true", help=f"Write the merged directory to {DIRECTORY_FILE}")
+    args = parser.parse_args()
+
+    print("="*60)
+    print("📇 UNIFIED BUSINESS DIRECTORY")
+    print("="*60)
+
+    directory = build_directory()
+    print(f"\n✅ {len(directory)} businesses merged")
+    if directory.rejected:
+        print(f"⚠️  {len(directory.rejected)} records skipped (no name, email or website)")
+
+    results = directory.query(args.product, args.certification, args.market, args.location)
+    for record in results:
+        print(f"\n🏢 {record['name']} ({record.get('location', 'Palestine')})")
+        print(f"   Products: {', '.join(record.get('products', []))}")
+        print(f"   Certifications: {', '.join(record.get('certifications', []))}")
+        print(f"   Markets: {', '.join(record.get('export_markets', []))}")
+        print(f"   Contact: {record.get('contact', 'N/A')}")
+
+    if args.save:
+        print(f"\n💾 Saved to: {directory.save()}")
+
+
+if __name__ == "__main__":
+    main()
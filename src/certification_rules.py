@@ -0,0 +1,207 @@
+"""
+CERTIFICATION REQUIREMENTS RULES ENGINE
+Decision table keyed on destination x HS chapter x product attributes, evaluated over whole catalogs
+"""
+
+import json
+
+import numpy as np
+
+from hs_codes import UNKNOWN_CODE, get_classifier, iter_catalog_items
+
+# Configuration
+MARKETS = ["EU", "UK", "USA", "Canada", "Middle East", "Japan"]
+
+# Product attribute flags (bitmask)
+ORGANIC = 1
+FAIR_TRADE = 2
+
+# HS chapter groups used by the decision table
+ALL = range(1, 98)
+ANIMAL_ORIGIN = range(1, 6)
+PLANTS = range(6, 15)
+FOOD = range(1, 25)
+COSMETICS = [33, 34]
+TEXTILES = range(50, 64)
+WOOD = [44]
+
+# Decision table: (destination, HS chapters, required attribute flags, requirement)
+# "*" applies to every destination; a rule fires when the chapter matches and all flags are set
+CERTIFICATION_RULES = [
+    ("*", ALL, 0, "Certificate of Origin"),
+    ("*", ALL, 0, "Commercial Invoice"),
+
+    ("EU", ALL, 0, "EUR.1 Movement Certificate (EU-PLO preferential duty)"),
+    ("EU", PLANTS, 0, "Phytosanitary Certificate"),
+    ("EU", ANIMAL_ORIGIN, 0, "Health Certificate (products of animal origin)"),
+    ("EU", FOOD, 0, "EU Food Labelling (Regulation 1169/2011)"),
+    ("EU", ALL, ORGANIC, "EU Organic Certificate of Inspection"),
+    ("EU", ALL, FAIR_TRADE, "Fair Trade Certificate"),
+    ("EU", COSMETICS, 0, "CPNP Notification & EU Responsible Person"),
+    ("EU", TEXTILES, 0, "Textile Fibre Composition Label"),
+
+    ("UK", PLANTS, 0, "Phytosanitary Certificate"),
+    ("UK", ANIMAL_ORIGIN, 0, "Health Certificate (products of animal origin)"),
+    ("UK", FOOD, 0, "UK Food Labelling"),
+    ("UK", ALL, ORGANIC, "UK Organic Certificate of Inspection"),
+    ("UK", ALL, FAIR_TRADE, "Fair Trade Certificate"),
+    ("UK", COSMETICS, 0, "SCPN Notification & UK Responsible Person"),
+
+    ("USA", ALL, 0, "Packing List"),
+    ("USA", FOOD, 0, "FDA Food Facility Registration"),
+    ("USA", FOOD, 0, "FDA Prior Notice"),
+    ("USA", PLANTS, 0, "USDA APHIS Phytosanitary Certificate"),
+    ("USA", ALL, ORGANIC, "USDA Organic Certificate"),
+    ("USA", ALL, FAIR_TRADE, "Fair Trade Certificate"),
+    ("USA", COSMETICS, 0, "FDA Cosmetic Labeling Compliance"),
+    ("USA", TEXTILES, 0, "FTC Textile Labeling"),
+
+    ("Canada", FOOD, 0, "CFIA Safe Food for Canadians Licence (importer)"),
+    ("Canada", PLANTS, 0, "Phytosanitary Certificate"),
+    ("Canada", ALL, ORGANIC, "Canada Organic Regime Certificate"),
+
+    ("Middle East", ALL, 0, "Arabic Labeling"),
+    ("Middle East", ALL, 0, "GCC Conformity"),
+    ("Middle East", FOOD, 0, "Halal Certificate"),
+    ("Middle East", COSMETICS, 0, "Halal Certificate"),
+
+    ("Japan", PLANTS, 0, "Phytosanitary Certificate"),
+    ("Japan", FOOD, 0, "Food Sanitation Act Import Notification"),
+    ("Japan", ALL, ORGANIC, "JAS Organic Certificate"),
+    ("Japan", WOOD, 0, "Phytosanitary Certificate")
+]
+
+
+def product_flags(text):
+    """Attribute flags from a product's title/tags/certifications"""
+    text = str(text).lower()
+    flags = 0
+    if "organic" in text or "عضوي" in text:
+        flags |= ORGANIC
+    if "fair trade" in text or "fairtrade" in text or "تجارة عادلة" in text:
+        flags |= FAIR_TRADE
+    return flags
+
+
+def hs_chapter(hscode):
+    """Chapter number of an HS code, 0 when unknown"""
+    code = str(hscode or "").replace(".", "")
+    if not code[:2].isdigit() or code.startswith("99") or hscode == UNKNOWN_CODE:
+        return 0
+    return int(code[:2])
+
+
+class CertificationRulesEngine:
+    """Compiles the decision table into per-market lookup arrays"""
+
+    def __init__(self, rules=CERTIFICATION_RULES, markets=MARKETS):
+        self.markets = list(markets)
+        self.compiled = {market: self._compile(rules, market) for market in self.markets}
+        self.default = self._compile(rules, None)
+
+    def _compile(self, rules, market):
+        """Per market: chapter mask (98 x rules), flag masks, and rule -> requirement grouping"""
+        applicable = [rule for rule in rules if rule[0] == "*" or rule[0] == market]
+        requirements = []
+        for _, _, _, requirement in applicable:
+            if requirement not in requirements:
+                requirements.append(requirement)
+
+        chapter_mask = np.zeros((98, len(applicable)), dtype=bool)
+        flag_mask = np.zeros(len(applicable), dtype=np.uint8)
+        grouping = np.zeros((len(applicable), len(requirements)), dtype=np.uint8)
+        for j, (_, chapters, flags, requirement) in enumerate(applicable):
+            chapter_mask[list(chapters), j] = True
+            flag_mask[j] = flags
+            grouping[j, requirements.index(requirement)] = 1
+
+        # Unknown chapter (0): only rules that cover every chapter apply
+        chapter_mask[0] = chapter_mask[1:].all(axis=0)
+        return {"requirements": requirements, "chapter_mask": chapter_mask,
+                "flag_mask": flag_mask, "grouping": grouping}
+
+    def evaluate(self, chapters, flags, markets=None):
+        """Requirements matrix per market: {market: (requirements, bool[n_products, n_requirements])}"""
+        chapters = np.asarray(chapters, dtype=np.intp)
+        flags = np.asarray(flags, dtype=np.uint8)
+        results = {}
+        for market in markets or self.markets:
+            table = self.compiled.get(market, self.default)
+            fired = table["chapter_mask"][chapters] & (
+                (flags[:, None] & table["flag_mask"][None, :]) == table["flag_mask"][None, :]
+            )
+            matrix = (fired.astype(np.uint8) @ table["grouping"]) > 0
+            results[market] = (table["requirements"], matrix)
+        return results
+
+    def requirements_for(self, destination, hscode=None, flags=0):
+        """Requirements for a single product and destination"""
+        requirements, matrix = self.evaluate([hs_chapter(hscode)], [flags], [destination])[destination]
+        return [req for req, needed in zip(requirements, matrix[0]) if needed]
+
+    def catalog_features(self, items):
+        """(ids, chapters, flags) for (id, title, description) items, HS codes via the classifier"""
+        items = list(items)
+        codes = get_classifier().classify_batch(items, cache_file=None, top_k=1)
+        ids = [item_id for item_id, _, _ in items]
+        chapters = [hs_chapter(codes[item_id][0]["hscode"]) if codes[item_id] else 0 for item_id in ids]
+        flags = [product_flags(f"{title} {description}") for _, title, description in items]
+        return ids, np.array(chapters, dtype=np.intp), np.array(flags, dtype=np.uint8)
+
+    def requirements_matrix(self, items, markets=None):
+        """Per-product requirement lists and per-market totals for a whole catalog"""
+        ids, chapters, flags = self.catalog_features(items)
+        evaluated = self.evaluate(chapters, flags, markets)
+
+        report = {"products": {item_id: {} for item_id in ids}, "markets": {}}
+        for market, (requirements, matrix) in evaluated.items():
+            counts = matrix.sum(axis=0)
+            report["markets"][market] = {
+                requirement: int(count) for requirement, count in zip(requirements, counts) if count
+            }
+            for row, item_id in enumerate(ids):
+                report["products"][item_id][market] = [
+                    requirements[j] for j in np.flatnonzero(matrix[row])
+                ]
+        return report
+
+
+_default_engine = None
+
+
+def get_engine():
+    """Shared engine instance (the decision table is compiled once per process)"""
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = CertificationRulesEngine()
+    return _default_engine
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Certification requirements for the product catalog")
+    parser.add_argument("--markets", nargs="+", default=MARKETS, help=f"Destinations ({', '.join(MARKETS)})")
+    parser.add_argument("--output", help="Save the full requirements matrix as JSON")
+    args = parser.parse_args()
+
+    print("="*60)
+    print("📋 CERTIFICATION REQUIREMENTS")
+    print("="*60)
+
+    report = get_engine().requirements_matrix(iter_catalog_items(), args.markets)
+
+    print(f"\n📦 {len(report['products'])} products")
+    for market, requirements in report["markets"].items():
+        print(f"\n🌍 {market}:")
+        for requirement, count in requirements.items():
+            print(f"   • {requirement} ({count} products)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -27,10 +27,11 @@ real_businesses = [
     }
 ]
 
-# Save to data directory
-os.makedirs('data/real', exist_ok=True)
-with open('data/real/verified_businesses.json', 'w') as f:
-    json.dump(real_businesses, f, indent=2)
+if __name__ == "__main__":
+    # Save to data directory
+    os.makedirs('data/real', exist_ok=True)
+    with open('data/real/verified_businesses.json', 'w') as f:
+        json.dump(real_businesses, f, indent=2)
 
-print("✅ Created real data for testing")
-print("📁 Data saved to: data/real/verified_businesses.json")
\ No newline at end of file
+    print("✅ Created real data for testing")
+    print("📁 Data saved to: data/real/verified_businesses.json")
\ No newline at end of file
@@ -0,0 +1,267 @@
+"""
+BATCH EXPORT DOCUMENT GENERATION
+Renders document packages for a whole order table (business, product, destination, quantity)
+"""
+
+import csv
+import io
+import json
+import os
+import re
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from real_export_docs import ExportDocumentGenerator
+
+# Configuration
+BUSINESS_FILES = [Path("data/real/verified_businesses.json"), Path("data/raw/complete_market_data.json")]
+INVENTORY_FILE = Path("data/processed/master_product_inventory.json")
+OUTPUT_DIR = Path("data/processed/export_packages")
+CHUNK_SIZE = 200
+
+# Product name keywords -> ExportDocumentGenerator product type (first match wins)
+TYPE_KEYWORDS = [
+    ("soap", ["soap", "صابون"]),
+    ("olive_oil", ["olive oil", "زيت زيتون"]),
+    ("olive_wood", ["olive wood", "خشب زيتون"]),
+    ("dates", ["dates", "medjoul", "تمر"]),
+    ("zaatar", ["zaatar", "za'atar", "زعتر"]),
+    ("embroidery", ["embroider", "tatreez", "thobe", "تطريز"]),
+    ("glassware", ["glass", "زجاج"]),
+    ("ceramics", ["ceramic", "pottery", "خزف"])
+]
+
+_generator = None
+_businesses = None
+_products = None
+
+
+def guess_product_type(name):
+    """Map a product name to a document product type"""
+    text = str(name).lower()
+    for product_type, keywords in TYPE_KEYWORDS:
+        if any(keyword in text for keyword in keywords):
+            return product_type
+    return "other"
+
+
+def load_businesses(paths=BUSINESS_FILES):
+    """Business lookup keyed by id and lower-case name"""
+    lookup = {}
+    for path in paths:
+        path = Path(path)
+        if not path.exists():
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get("businesses", [])
+        for business in data:
+            business = dict(business)
+            business.setdefault("location", "Palestine")
+            if business.get("id"):
+                lookup.setdefault(business["id"], business)
+            lookup.setdefault(business["name"].lower(), business)
+    return lookup
+
+
+def load_products(path=INVENTORY_FILE):
+    """Product lookup keyed by SKU and lower-case title"""
+    lookup = {}
+    if not Path(path).exists():
+        return lookup
+    with open(path, "r", encoding="utf-8") as f:
+        for item in json.load(f):
+            product = {
+                "sku": item["sku"],
+                "name": item["product_info"]["title"],
+                "unit_price": item["pricing"]["retail_price_usd"],
+                "weight_kg": item["inventory"]["weight_kg"],
+                "type": guess_product_type(" ".join([item["product_info"]["title"]] + item["product_info"]["tags"]))
+            }
+            lookup[product["sku"]] = product
+            lookup[product["name"].lower()] = product
+    return lookup
+
+
+def _init_worker(businesses, products, issue_date):
+    """Load lookups and the generator once per worker"""
+    global _generator, _businesses, _products
+    _generator = ExportDocumentGenerator(issue_date=issue_date)
+    _businesses = businesses
+    _products = products
+
+
+def _slug(text):
+    return re.sub(r"[^a-z0-9]+", "-", str(text).lower()).strip("-")[:40]
+
+
+def render_order(generator, businesses, products, row_no, order):
+    """Render one order row into (package_name, {filename: text})"""
+    business = businesses.get(order["business"]) or businesses.get(order["business"].lower())
+    if business is None:
+        raise KeyError(f"Unknown business: {order['business']}")
+
+    catalog = products.get(order["product"]) or products.get(order["product"].lower()) or {}
+    quantity = float(order["quantity"])
+    unit_price = float(order.get("unit_price") or catalog.get("unit_price") or 0)
+    product = {
+        "name": catalog.get("name", order["product"]),
+        "type": order.get("type") or catalog.get("type") or guess_product_type(order["product"]),
+        "quantity": int(quantity) if quantity.is_integer() else quantity,
+        "unit": order.get("unit") or "units",
+        "unit_price": f"{unit_price:.2f}",
+        "total_value": f"{unit_price * quantity:.2f}",
+        "weight_kg": catalog.get("weight_kg"),
+        "destination": order["destination"]
+    }
+    if order.get("payment_terms") or business.get("payment_terms"):
+        product["payment_terms"] = order.get("payment_terms") or business["payment_terms"]
+
+    docs = generator.generate_export_package(business, product)
+    files = {f"{name}.txt": text for name, text in docs.items() if isinstance(text, str)}
+    files["required_certifications.txt"] = "\n".join(docs["required_certifications"]) + "\n"
+
+    package = f"{row_no:06d}_{_slug(business['name'])}_{_slug(order['destination'])}"
+    return package, files
+
+
+def _render_chunk(chunk):
+    """Worker: render a chunk of numbered orders"""
+    rendered = []
+    for row_no, order in chunk:
+        try:
+            rendered.append((row_no, *render_order(_generator, _businesses, _products, row_no, order), None))
+        except (KeyError, ValueError) as e:
+            rendered.append((row_no, None, None, e.args[0] if e.args else str(e)))
+    return rendered
+
+
+def iter_orders(orders_csv):
+    """Stream numbered order rows from a CSV"""
+    with open(orders_csv, "r", newline="", encoding="utf-8-sig") as f:
+        for row_no, row in enumerate(csv.DictReader(f), start=1):
+            yield row_no, {k.strip().lower(): (v or "").strip() for k, v in row.items() if k}
+
+
+class _DirectoryWriter:
+    def __init__(self, root):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def write(self, name, text):
+        path = self.root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+
+    def close(self):
+        pass
+
+
+class _ZipWriter:
+    def __init__(self, path):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.archive = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED)
+
+    def write(self, name, text):
+        self.archive.writestr(name, text)
+
+    def close(self):
+        self.archive.close()
+
+
+class ExportBatchEngine:
+    """Renders thousands of export packages in parallel with bounded memory"""
+
+    def __init__(self, business_files=BUSINESS_FILES, inventory_file=INVENTORY_FILE,
+                 workers=None, chunk_size=CHUNK_SIZE, issue_date=None):
+        self.businesses = load_businesses(business_files)
+        self.products = load_products(inventory_file)
+        self.workers = workers or os.cpu_count()
+        self.chunk_size = chunk_size
+        self.issue_date = issue_date or datetime.now().strftime("%Y-%m-%d")
+
+    def _chunks(self, orders):
+        chunk = []
+        for item in orders:
+            chunk.append(item)
+            if len(chunk) == self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def run(self, orders_csv, output=OUTPUT_DIR):
+        """Render every order; output ending in .zip streams to an archive, else a directory"""
+        output = Path(output)
+        writer = _ZipWriter(output) if output.suffix == ".zip" else _DirectoryWriter(output)
+        summary = {"orders": 0, "packages": 0, "errors": [], "output": str(output)}
+        manifest = [["row", "package", "status"]]
+
+        # At most max_in_flight chunks are pending at once, results are written in order
+        max_in_flight = self.workers * 2
+        in_flight = deque()
+        start = time.perf_counter()
+
+        def drain(future):
+            for row_no, package, files, error in future.result():
+                summary["orders"] += 1
+                if error:
+                    summary["errors"].append({"row": row_no, "error": error})
+                    manifest.append([row_no, "", f"ERROR: {error}"])
+                    continue
+                for filename, text in files.items():
+                    writer.write(f"{package}/{filename}", text)
+                summary["packages"] += 1
+                manifest.append([row_no, package, "OK"])
+
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                     initargs=(self.businesses, self.products, self.issue_date)) as pool:
+                for chunk in self._chunks(iter_orders(orders_csv)):
+                    if len(in_flight) >= max_in_flight:
+                        drain(in_flight.popleft())
+                    in_flight.append(pool.submit(_render_chunk, chunk))
+                while in_flight:
+                    drain(in_flight.popleft())
+
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(manifest)
+            writer.write("manifest.csv", buffer.getvalue())
+        finally:
+            writer.close()
+
+        summary["seconds"] = round(time.perf_counter() - start, 3)
+        return summary
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate export document packages for an order table")
+    parser.add_argument("orders_csv", help="CSV with business, product, destination, quantity columns")
+    parser.add_argument("--output", default=str(OUTPUT_DIR), help="Output directory or .zip archive")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    print("="*60)
+    print("📄 BATCH EXPORT DOCUMENT GENERATION")
+    print("="*60)
+
+    engine = ExportBatchEngine(workers=args.workers, chunk_size=args.chunk_size)
+    summary = engine.run(args.orders_csv, args.output)
+
+    print(f"\n✅ Generated {summary['packages']:,} packages from {summary['orders']:,} orders "
+          f"in {summary['seconds']}s")
+    if summary["errors"]:
+        print(f"⚠️  {len(summary['errors'])} orders failed (see manifest.csv)")
+    print(f"\n💾 Saved to: {summary['output']}")
+
+
+if __name__ == "__main__":
+    main()
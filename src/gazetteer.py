@@ -0,0 +1,219 @@
+"""
+PALESTINIAN LOCALITY GAZETTEER
+Maps free-text locations to gazetteer ids and answers nearest/radius queries over producer locations
+"""
+
+import csv
+import math
+import re
+from functools import lru_cache
+from pathlib import Path
+
+# Configuration
+GAZETTEER_FILE = Path("data/reference/palestine_gazetteer.csv")
+CELL_DEGREES = 0.1   # ~11 km grid cells
+EARTH_RADIUS_KM = 6371.0
+MAX_ALIAS_TOKENS = 4
+
+ARABIC_DIACRITICS = re.compile(r"[ً-ْـ]")
+ARABIC_LETTERS = str.maketrans({"أ": "ا", "إ": "ا", "آ": "ا", "ة": "ه", "ى": "ي"})
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+|[؀-ۿ]+")
+
+
+def normalize_text(text):
+    """Lower-case, fold Arabic letter variants and drop apostrophes so aliases compare equal"""
+    text = str(text).lower().replace("'", "").replace("’", "")
+    text = ARABIC_DIACRITICS.sub("", text).translate(ARABIC_LETTERS)
+    return " ".join(TOKEN_PATTERN.findall(text))
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class Gazetteer:
+    """Palestinian localities with English/Arabic aliases and coordinates"""
+
+    def __init__(self, gazetteer_file=GAZETTEER_FILE):
+        self.places = {}
+        self.aliases = {}
+        with open(gazetteer_file, "r", newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                place = dict(row, lat=float(row["lat"]), lon=float(row["lon"]))
+                self.places[place["id"]] = place
+                names = [place["name_en"], place["name_ar"]] + place["aliases"].split(";")
+                for name in names:
+                    alias = normalize_text(name)
+                    if alias:
+                        self.aliases.setdefault(alias, place["id"])
+        self.resolve = lru_cache(maxsize=65536)(self._resolve)
+
+    def _matches(self, text):
+        """Longest-alias matches scanning left to right, as (position, place id)"""
+        tokens = normalize_text(text).split()
+        matches = []
+        i = 0
+        while i < len(tokens):
+            for n in range(min(MAX_ALIAS_TOKENS, len(tokens) - i), 0, -1):
+                place_id = self.aliases.get(" ".join(tokens[i:i + n]))
+                if place_id:
+                    matches.append((i, place_id))
+                    i += n
+                    break
+            else:
+                i += 1
+        return matches
+
+    def _resolve(self, text):
+        """Gazetteer id for free text: first locality mentioned, else first region, else None"""
+        matches = self._matches(text)
+        for _, place_id in matches:
+            if self.places[place_id]["level"] == "locality":
+                return place_id
+        return matches[0][1] if matches else None
+
+    def lookup(self, text):
+        """Place record for free text (or an id), None when nothing matches"""
+        if text in self.places:
+            return self.places[text]
+        place_id = self.resolve(str(text))
+        return self.places[place_id] if place_id else None
+
+    def coordinates(self, text):
+        place = self.lookup(text)
+        return (place["lat"], place["lon"]) if place else None
+
+
+class SpatialIndex:
+    """Uniform lat/lon grid with haversine nearest-neighbour and radius queries"""
+
+    def __init__(self, cell_degrees=CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self.cells = {}
+        self.items = {}
+        self.max_abs_lat = 0.0
+
+    def __len__(self):
+        return len(self.items)
+
+    def _cell(self, lat, lon):
+        return (math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees))
+
+    def insert(self, item_id, lat, lon, payload=None):
+        if item_id in self.items:
+            self.remove(item_id)
+        self.items[item_id] = (lat, lon, payload)
+        self.cells.setdefault(self._cell(lat, lon), []).append(item_id)
+        self.max_abs_lat = max(self.max_abs_lat, abs(lat))
+
+    def remove(self, item_id):
+        lat, lon, _ = self.items.pop(item_id)
+        cell = self.cells[self._cell(lat, lon)]
+        cell.remove(item_id)
+
+    def _ring(self, center, ring):
+        """Cells at Chebyshev distance `ring` from the center cell"""
+        row, col = center
+        if ring == 0:
+            yield center
+            return
+        for d in range(-ring, ring + 1):
+            yield (row - ring, col + d)
+            yield (row + ring, col + d)
+        for d in range(-ring + 1, ring):
+            yield (row + d, col - ring)
+            yield (row + d, col + ring)
+
+    def _distances(self, cells, lat, lon):
+        for cell in cells:
+            for item_id in self.cells.get(cell, ()):
+                item_lat, item_lon, payload = self.items[item_id]
+                yield haversine_km(lat, lon, item_lat, item_lon), item_id, payload
+
+    def within(self, lat, lon, radius_km):
+        """(distance_km, id, payload) for every item within radius_km, nearest first"""
+        dlat = radius_km / 111.2
+        dlon = radius_km / (111.2 * max(math.cos(math.radians(min(89.0, abs(lat) + dlat))), 1e-6))
+        row_lo, col_lo = self._cell(lat - dlat, lon - dlon)
+        row_hi, col_hi = self._cell(lat + dlat, lon + dlon)
+        cells = ((row, col) for row in range(row_lo, row_hi + 1) for col in range(col_lo, col_hi + 1))
+        return sorted(hit for hit in self._distances(cells, lat, lon) if hit[0] <= radius_km)
+
+    def nearest(self, lat, lon, k=1):
+        """k nearest items as (distance_km, id, payload), searching outward ring by ring"""
+        # Any cell `ring + 1` steps away is at least ring * cell_km from the query point
+        cell_km = self.cell_degrees * 111.2 * math.cos(math.radians(min(89.0, max(self.max_abs_lat, abs(lat)))))
+        center = self._cell(lat, lon)
+        found = []
+        seen = 0
+        ring = 0
+        while seen < len(self.items):
+            hits = list(self._distances(self._ring(center, ring), lat, lon))
+            seen += len(hits)
+            found = sorted(found + hits)[:k]
+            if len(found) == k and found[-1][0] <= ring * cell_km:
+                break
+            ring += 1
+        return found
+
+
+def index_records(records, gazetteer, location_field="location", id_field="name"):
+    """Spatial index of records placed by their free-text location; returns (index, unresolved records)"""
+    index = SpatialIndex()
+    unresolved = []
+    for record in records:
+        place = gazetteer.lookup(record.get(location_field, ""))
+        if place is None or place["level"] != "locality":
+            unresolved.append(record)
+            continue
+        index.insert(record[id_field], place["lat"], place["lon"], record)
+    return index, unresolved
+
+
+_default_gazetteer = None
+
+
+def get_gazetteer():
+    """Shared gazetteer instance (aliases are indexed once per process)"""
+    global _default_gazetteer
+    if _default_gazetteer is None:
+        _default_gazetteer = Gazetteer()
+    return _default_gazetteer
+
+
+def main():
+    import argparse
+
+    from business_directory import build_directory
+
+    parser = argparse.ArgumentParser(description="Find producers near a Palestinian locality")
+    parser.add_argument("place", help="Locality name in English or Arabic, e.g. Hebron or الخليل")
+    parser.add_argument("--radius", type=float, default=20.0, help="Radius in km")
+    args = parser.parse_args()
+
+    print("="*60)
+    print("📍 PRODUCERS NEAR A LOCALITY")
+    print("="*60)
+
+    gazetteer = get_gazetteer()
+    place = gazetteer.lookup(args.place)
+    if place is None:
+        print(f"\n❌ Unknown locality: {args.place}")
+        return
+
+    index, unresolved = index_records(build_directory().records.values(), gazetteer)
+    hits = index.within(place["lat"], place["lon"], args.radius)
+
+    print(f"\n🗺️  {place['name_en']} ({place['name_ar']}), {place['governorate']}")
+    print(f"📦 {len(hits)} producers within {args.radius:g} km:")
+    for distance, name, record in hits:
+        print(f"   • {name} - {record.get('location')} ({distance:.1f} km)")
+    if unresolved:
+        print(f"\n⚠️  {len(unresolved)} businesses without a mappable location")
+
+
+if __name__ == "__main__":
+    main()
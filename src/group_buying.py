@@ -0,0 +1,225 @@
+"""
+GROUP-BUY ORDER POOLING
+Pools small buyer orders into producer batches until each producer's minimum order is met
+"""
+
+import csv
+import heapq
+import itertools
+import json
+import re
+import time
+from datetime import date
+from pathlib import Path
+
+from trade_terms import parse_amount, parse_payment_terms, to_usd
+
+# Configuration
+OUTPUT_FILE = Path("data/processed/group_buy_batches.json")
+DEFAULT_MIN_ORDER_USD = 500.0
+DEFAULT_PAYMENT_TERMS = "30% advance, 70% against documents"
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+|[؀-ۿ]+")
+
+
+def _tokens(text):
+    return {token[:-1] if len(token) > 3 and token.endswith("s") else token
+            for token in TOKEN_PATTERN.findall(str(text).lower())}
+
+
+def producer_terms(producer):
+    """Structured minimum order and payment stages for a producer record"""
+    amount = parse_amount(producer.get("min_order"))
+    products = producer.get("products", [])
+    if isinstance(products, str):
+        products = [p.strip() for p in products.split(",") if p.strip()]
+    return {
+        "name": producer["name"],
+        "min_order": {"amount": amount[0], "currency": amount[1]} if amount else None,
+        "min_order_usd": to_usd(*amount) if amount else DEFAULT_MIN_ORDER_USD,
+        "payment_stages": parse_payment_terms(producer.get("payment_terms") or DEFAULT_PAYMENT_TERMS),
+        "products": products
+    }
+
+
+class GroupBuyPool:
+    """Incremental order pooling with a priority queue of open batches (deadline, then fill ratio)"""
+
+    def __init__(self, producers=None):
+        if producers is None:
+            from business_directory import build_directory
+            producers = [r for r in build_directory().records.values() if r.get("min_order")]
+        self.producers = {}
+        self.product_index = {}
+        for producer in producers:
+            terms = producer_terms(producer)
+            self.producers[terms["name"]] = terms
+            for product in terms["products"]:
+                for token in _tokens(product):
+                    self.product_index.setdefault(token, set()).add(terms["name"])
+
+        self.open = {}          # producer name -> open batch
+        self._open_by_id = {}
+        self.filled = []
+        self.expired = []
+        self._heap = []         # (deadline, -fill_ratio, seq, batch_id, version)
+        self._seq = itertools.count()
+        self._batch_ids = itertools.count(1)
+
+    def _candidates(self, request):
+        if request.get("producer"):
+            name = request["producer"]
+            return [name] if name in self.producers else []
+        names = None
+        for token in _tokens(request.get("product", "")):
+            names = self.product_index.get(token, set()) if names is None else names & self.product_index.get(token, set())
+        return sorted(names or [])
+
+    def _push(self, batch):
+        batch["version"] += 1
+        heapq.heappush(self._heap, (batch["deadline"], -batch["fill_ratio"], next(self._seq),
+                                    batch["id"], batch["version"]))
+        # Drop superseded entries once they dominate the heap
+        if len(self._heap) > 4 * len(self._open_by_id) + 64:
+            self._heap = [e for e in self._heap
+                          if e[3] in self._open_by_id and self._open_by_id[e[3]]["version"] == e[4]]
+            heapq.heapify(self._heap)
+
+    def _assignment_key(self, name, amount, deadline):
+        """Order for choosing among producers: the batch this order brings closest to its minimum
+        (under or over), then the open batches' queue order of earliest deadline and fullest"""
+        batch = self.open.get(name)
+        current = batch["total_usd"] if batch else 0.0
+        fill_after = (current + amount) / self.producers[name]["min_order_usd"]
+        batch_deadline = min(batch["deadline"], deadline) if batch else deadline
+        return abs(1.0 - fill_after), batch_deadline, -fill_after, name
+
+    def submit(self, request):
+        """Assign one buyer request to a producer batch; closes the batch once its minimum is met"""
+        amount = request["amount_usd"]
+        if isinstance(amount, str):
+            parsed = parse_amount(amount)
+            amount = to_usd(*parsed) if parsed else 0.0
+        deadline = request["deadline"]
+        if isinstance(deadline, str):
+            deadline = date.fromisoformat(deadline)
+        if amount <= 0:
+            return {"request": request.get("id"), "status": "rejected", "reason": "no amount"}
+
+        candidates = self._candidates(request)
+        if not candidates:
+            return {"request": request.get("id"), "status": "rejected", "reason": "no matching producer"}
+
+        name = min(candidates, key=lambda name: self._assignment_key(name, amount, deadline))
+        batch = self.open.get(name)
+        if batch is None:
+            batch = self.open[name] = {
+                "id": next(self._batch_ids), "producer": name, "status": "open", "orders": [],
+                "total_usd": 0.0, "fill_ratio": 0.0, "deadline": deadline, "version": 0
+            }
+            self._open_by_id[batch["id"]] = batch
+        batch["orders"].append({"id": request.get("id"), "buyer": request.get("buyer", ""),
+                                "amount_usd": amount, "deadline": deadline})
+        batch["total_usd"] += amount
+        batch["deadline"] = min(batch["deadline"], deadline)
+        batch["fill_ratio"] = batch["total_usd"] / self.producers[name]["min_order_usd"]
+
+        if batch["fill_ratio"] >= 1.0:
+            self._close(batch)
+            return {"request": request.get("id"), "status": "filled", "batch": batch["id"], "producer": name}
+        self._push(batch)
+        return {"request": request.get("id"), "status": "pooled", "batch": batch["id"], "producer": name,
+                "fill_ratio": round(batch["fill_ratio"], 3)}
+
+    def _close(self, batch):
+        batch["status"] = "filled"
+        del self.open[batch["producer"]]
+        del self._open_by_id[batch["id"]]
+        per_buyer = {}
+        for order in batch["orders"]:
+            buyer = order["buyer"] or str(order["id"])
+            per_buyer[buyer] = per_buyer.get(buyer, 0.0) + order["amount_usd"]
+        batch["payment_schedule"] = [
+            {
+                "due": stage["due"],
+                "percent": stage["percent"],
+                "amount_usd": round(batch["total_usd"] * stage["percent"] / 100, 2),
+                "per_buyer": {buyer: round(total * stage["percent"] / 100, 2) for buyer, total in per_buyer.items()}
+            }
+            for stage in self.producers[batch["producer"]]["payment_stages"]
+        ]
+        self.filled.append(batch)
+
+    def _pop_stale(self):
+        while self._heap:
+            _, _, _, batch_id, version = self._heap[0]
+            batch = self._open_by_id.get(batch_id)
+            if batch is not None and batch["version"] == version:
+                return batch
+            heapq.heappop(self._heap)
+        return None
+
+    def expire(self, today):
+        """Release open batches whose earliest buyer deadline has passed unfilled"""
+        expired = []
+        batch = self._pop_stale()
+        while batch is not None and batch["deadline"] < today:
+            heapq.heappop(self._heap)
+            batch["status"] = "expired"
+            del self.open[batch["producer"]]
+            del self._open_by_id[batch["id"]]
+            expired.append(batch)
+            batch = self._pop_stale()
+        self.expired.extend(expired)
+        return expired
+
+    def urgent(self, k=5):
+        """Open batches most in need of orders: earliest deadline first, then the fullest"""
+        live = (e for e in self._heap if e[3] in self._open_by_id and self._open_by_id[e[3]]["version"] == e[4])
+        return [self._open_by_id[entry[3]] for entry in heapq.nsmallest(k, live)]
+
+
+def iter_requests(requests_csv):
+    """Buyer requests: id, buyer, producer or product, amount_usd, deadline"""
+    with open(requests_csv, "r", newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            yield {k.strip().lower(): (v or "").strip() for k, v in row.items() if k}
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pool small buyer orders to reach producer minimums")
+    parser.add_argument("requests_csv", help="CSV with id, buyer, producer/product, amount_usd, deadline")
+    parser.add_argument("--today", default=date.today().isoformat(), help="Expire batches past this date")
+    parser.add_argument("--output", default=str(OUTPUT_FILE))
+    args = parser.parse_args()
+
+    print("="*60)
+    print("🤝 GROUP-BUY ORDER POOLING")
+    print("="*60)
+
+    pool = GroupBuyPool()
+    start = time.perf_counter()
+    rejected = 0
+    for request in iter_requests(args.requests_csv):
+        rejected += pool.submit(request)["status"] == "rejected"
+    pool.expire(date.fromisoformat(args.today))
+    seconds = time.perf_counter() - start
+
+    print(f"\n✅ {len(pool.filled)} batches reached their minimum order in {seconds:.3f}s")
+    for batch in pool.filled[:10]:
+        print(f"   • {batch['producer']}: ${batch['total_usd']:,.2f} from {len(batch['orders'])} buyers")
+    print(f"⏳ {len(pool.open)} batches still open, {len(pool.expired)} expired, {rejected} requests rejected")
+    for batch in pool.urgent(3):
+        print(f"   ⚠️  {batch['producer']}: {batch['fill_ratio']:.0%} filled, deadline {batch['deadline']}")
+
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"filled": pool.filled, "open": list(pool.open.values()), "expired": pool.expired},
+                  f, ensure_ascii=False, indent=2, default=str)
+    print(f"💾 Saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
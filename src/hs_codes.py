@@ -0,0 +1,356 @@
+"""
+HARMONIZED SYSTEM (HS) CODE NOMENCLATURE AND PRODUCT CLASSIFICATION
+Trie-indexed HS table, English/Arabic product-to-code classifier and catalog batch API
+"""
+
+import csv
+import hashlib
+import json
+import math
+import re
+from pathlib import Path
+
+# Configuration
+REFERENCE_DIR = Path("data/reference")
+NOMENCLATURE_FILE = REFERENCE_DIR / "hs_nomenclature.csv"
+KEYWORDS_FILE = REFERENCE_DIR / "hs_keywords.csv"
+INVENTORY_FILE = Path("data/processed/master_product_inventory.json")
+MARKET_DATA_FILE = Path("data/raw/complete_market_data.json")
+CACHE_FILE = Path("data/processed/hs_classification_cache.json")
+OUTPUT_FILE = Path("data/processed/hs_classification.json")
+
+UNKNOWN_CODE = "9999.99"
+# Bump when scoring changes; cached classifications are keyed on it and on the reference files
+CLASSIFIER_VERSION = 1
+
+# Weights: curated keyword phrases dominate, nomenclature wording only breaks ties
+KEYWORD_WEIGHT = 1.0
+DESCRIPTION_WEIGHT = 0.15
+BODY_TEXT_WEIGHT = 0.5
+
+# Words after these describe an ingredient or accessory, not the product itself
+SECONDARY_MARKERS = {"with", "مع", "ب"}
+SECONDARY_WEIGHT = 0.5
+
+STOPWORDS = {
+    "and", "or", "of", "the", "for", "in", "with", "from", "other", "a", "an", "to", "by", "on",
+    "not", "elsewhere", "specified", "including", "thereof", "parts", "articles", "similar",
+    "products", "product", "palestinian", "palestine", "traditional", "authentic", "handmade",
+    "premium", "natural", "organic", "fair", "trade", "made", "set", "grade", "hand", "painted",
+    "من", "في", "مع", "على", "فلسطيني", "فلسطينية", "فلسطين", "طبيعي", "اصلي"
+}
+
+ARABIC_DIACRITICS = re.compile(r"[ً-ْـ]")
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+|[؀-ۿ]+")
+
+
+def format_hs_code(code):
+    """'150910' -> '1509.10' (chapters and headings are returned unchanged)"""
+    code = str(code).replace(".", "")
+    return f"{code[:4]}.{code[4:]}" if len(code) > 4 else code
+
+
+def _stem(token):
+    """Light English plural stemming and Arabic article stripping"""
+    if token[0] >= "؀":
+        token = token.replace("أ", "ا").replace("إ", "ا").replace("آ", "ا")
+        token = token.replace("ة", "ه").replace("ى", "ي")
+        if token.startswith("ال") and len(token) > 4:
+            token = token[2:]
+        return token
+    token = token.replace("'", "")
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 4 and token.endswith("sses"):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    """Normalize English/Arabic text into stemmed tokens"""
+    text = ARABIC_DIACRITICS.sub("", str(text).lower().replace("-", " "))
+    return [_stem(token) for token in TOKEN_PATTERN.findall(text)]
+
+
+def _file_digest(path):
+    """sha256 of a reference file's bytes ("" when the file is missing)"""
+    path = Path(path)
+    return hashlib.sha256(path.read_bytes()).hexdigest() if path.exists() else ""
+
+
+class HSNomenclature:
+    """HS nomenclature table indexed by a digit trie"""
+
+    def __init__(self, nomenclature_file=NOMENCLATURE_FILE):
+        self.root = {}
+        self.entries = {}
+        self.digest = _file_digest(nomenclature_file)
+        with open(nomenclature_file, "r", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                self.add(row["hscode"], row["description"], row.get("parent", ""), row.get("section", ""))
+
+    def add(self, hscode, description, parent="", section=""):
+        """Insert a chapter (2 digits), heading (4) or subheading (6+)"""
+        code = str(hscode).replace(".", "").strip()
+        if not code.isdigit():
+            return  # section rows or totals in full dumps
+        entry = {"hscode": code, "description": description, "parent": parent,
+                 "section": section, "level": len(code)}
+        node = self.root
+        for digit in code:
+            node = node.setdefault(digit, {})
+        node[None] = entry
+        self.entries[code] = entry
+
+    def _node(self, prefix):
+        node = self.root
+        for digit in str(prefix).replace(".", ""):
+            node = node.get(digit)
+            if node is None:
+                return None
+        return node
+
+    def lookup(self, code):
+        """Exact entry for a code, or None"""
+        return self.entries.get(str(code).replace(".", ""))
+
+    def prefix_search(self, prefix, max_level=None):
+        """All entries whose code starts with prefix, in code order"""
+        node = self._node(prefix)
+        results = []
+        stack = [node] if node is not None else []
+        while stack:
+            current = stack.pop()
+            entry = current.get(None)
+            if entry and (max_level is None or entry["level"] <= max_level):
+                results.append(entry)
+            stack.extend(current[d] for d in sorted((k for k in current if k is not None), reverse=True))
+        return results
+
+    def children(self, code):
+        """Direct children in the hierarchy (chapter -> headings -> subheadings)"""
+        code = str(code).replace(".", "")
+        return [e for e in self.prefix_search(code) if e["hscode"] != code and
+                self._parent_code(e["hscode"]) == code]
+
+    def _parent_code(self, code):
+        """Closest existing ancestor code"""
+        for length in range(len(code) - 1, 1, -1):
+            if code[:length] in self.entries:
+                return code[:length]
+        return None
+
+    def ancestors(self, code):
+        """Chapter, heading, ... down to the code itself"""
+        code = str(code).replace(".", "")
+        return [self.entries[code[:n]] for n in range(2, len(code) + 1) if code[:n] in self.entries]
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class HSClassifier:
+    """Ranks HS candidates for product titles/descriptions in English and Arabic"""
+
+    def __init__(self, nomenclature=None, keywords_file=KEYWORDS_FILE):
+        self.nomenclature = nomenclature or HSNomenclature()
+        self.phrases = {}   # first token -> [(phrase tokens, code, weight)]
+        self.reference_digest = hashlib.sha256(
+            f"{CLASSIFIER_VERSION}|{self.nomenclature.digest}|{_file_digest(keywords_file)}".encode("utf-8")
+        ).hexdigest()[:16]
+        self._build_keyword_index(keywords_file)
+        self._build_description_index()
+
+    def _add_phrase(self, text, code, weight):
+        tokens = tuple(tokenize(text))
+        if tokens:
+            self.phrases.setdefault(tokens[0], []).append((tokens, code, weight))
+
+    def _build_keyword_index(self, keywords_file):
+        if not Path(keywords_file).exists():
+            return
+        with open(keywords_file, "r", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                for keyword in row["keywords"].split(";"):
+                    self._add_phrase(keyword, row["hscode"], KEYWORD_WEIGHT)
+        # Longest phrases are tried first so specific matches consume their tokens
+        for candidates in self.phrases.values():
+            candidates.sort(key=lambda item: -len(item[0]))
+
+    def _build_description_index(self):
+        """IDF-weighted tokens of subheading/heading descriptions"""
+        postings = {}
+        for code, entry in self.nomenclature.entries.items():
+            if entry["level"] < 4:
+                continue
+            for token in set(tokenize(entry["description"])) - STOPWORDS:
+                postings.setdefault(token, set()).add(code)
+        total = max(len(self.nomenclature), 1)
+        self.description_index = {
+            token: (codes, math.log(total / len(codes)))
+            for token, codes in postings.items()
+        }
+
+    def _score_text(self, text, weight, scores):
+        tokens = tokenize(text)
+        used = [False] * len(tokens)
+        token_weights = {}
+        position_weight = 1.0
+        for i, token in enumerate(tokens):
+            if token in SECONDARY_MARKERS:
+                position_weight = SECONDARY_WEIGHT  # "zaatar with sesame" is zaatar
+            token_weights.setdefault(token, position_weight)
+            for phrase, code, phrase_weight in self.phrases.get(token, ()):
+                n = len(phrase)
+                if tuple(tokens[i:i + n]) == phrase and not all(used[i:i + n]):
+                    scores[code] = scores.get(code, 0.0) + weight * position_weight * phrase_weight * n ** 1.5
+                    for j in range(i, i + n):
+                        used[j] = True
+                    break
+
+        for token, position_weight in token_weights.items():
+            if token in STOPWORDS:
+                continue
+            codes, idf = self.description_index.get(token, ((), 0.0))
+            for code in codes:
+                scores[code] = scores.get(code, 0.0) + weight * position_weight * DESCRIPTION_WEIGHT * idf
+
+    def classify(self, title, description="", top_k=3):
+        """Ranked HS candidates [{hscode, description, score, confidence}]"""
+        scores = {}
+        self._score_text(title, 1.0, scores)
+        if description:
+            self._score_text(description, BODY_TEXT_WEIGHT, scores)
+
+        # Roll heading scores onto their subheadings so 6-digit codes are preferred
+        leaf_scores = {}
+        for code, score in scores.items():
+            if len(code) == 4:
+                subheadings = [e["hscode"] for e in self.nomenclature.prefix_search(code) if e["level"] > 4]
+                for sub in subheadings or [code]:
+                    leaf_scores[sub] = leaf_scores.get(sub, 0.0) + score / max(len(subheadings), 1)
+            else:
+                leaf_scores[code] = leaf_scores.get(code, 0.0) + score
+
+        ranked = sorted(leaf_scores.items(), key=lambda item: (-item[1], item[0]))[:top_k]
+        total = sum(leaf_scores.values()) or 1.0
+        return [
+            {
+                "hscode": format_hs_code(code),
+                "description": self.nomenclature.entries[code]["description"],
+                "score": round(score, 4),
+                "confidence": round(score / total, 4)
+            }
+            for code, score in ranked if score > 0
+        ]
+
+    def best_code(self, title, description=""):
+        """Top HS code, or 9999.99 when nothing matches"""
+        candidates = self.classify(title, description, top_k=1)
+        return candidates[0]["hscode"] if candidates else UNKNOWN_CODE
+
+    def classify_batch(self, items, cache_file=CACHE_FILE, top_k=3):
+        """Classify (item_id, title, description) tuples with an on-disk result cache.
+
+        Keys include reference_digest, so editing the nomenclature or keyword files (or bumping
+        CLASSIFIER_VERSION) stops stale classifications from being served.
+        """
+        cache_file = Path(cache_file) if cache_file else None
+        cache = {}
+        if cache_file and cache_file.exists():
+            with open(cache_file, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+
+        results = {}
+        misses = 0
+        for item_id, title, description in items:
+            key = hashlib.sha1(f"{self.reference_digest}|{top_k}|{title}|{description}".encode("utf-8")).hexdigest()
+            if key not in cache:
+                cache[key] = self.classify(title, description, top_k)
+                misses += 1
+            results[item_id] = cache[key]
+
+        if cache_file and misses:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(cache_file, "w", encoding="utf-8") as f:
+                json.dump(cache, f, ensure_ascii=False)
+        return results
+
+
+def iter_catalog_items(inventory_file=INVENTORY_FILE, market_data_file=MARKET_DATA_FILE):
+    """(id, title, description) for inventory SKUs and scanned products"""
+    if Path(inventory_file).exists():
+        with open(inventory_file, "r", encoding="utf-8") as f:
+            for item in json.load(f):
+                info = item["product_info"]
+                body = " ".join([info.get("short_description", ""), " ".join(info.get("tags", []))])
+                yield item["sku"], info["title"], body
+
+    if Path(market_data_file).exists():
+        with open(market_data_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for product in data.get("products", []):
+            title = " ".join(filter(None, [product.get("english_title"), product.get("title")]))
+            yield product["id"], title, product.get("description", "")
+
+
+_default_classifier = None
+
+
+def get_classifier():
+    """Shared classifier instance (the index is built once per process)"""
+    global _default_classifier
+    if _default_classifier is None:
+        _default_classifier = HSClassifier()
+    return _default_classifier
+
+
+def classify_catalog(output_file=OUTPUT_FILE, cache_file=CACHE_FILE):
+    """Assign HS codes to every inventory item and scanned product in one pass"""
+    classifier = get_classifier()
+    results = classifier.classify_batch(iter_catalog_items(), cache_file)
+    summary = {
+        item_id: {
+            "hscode": candidates[0]["hscode"] if candidates else UNKNOWN_CODE,
+            "candidates": candidates
+        }
+        for item_id, candidates in results.items()
+    }
+    Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    return summary
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="HS code lookup and product classification")
+    parser.add_argument("--lookup", metavar="PREFIX", help="List nomenclature entries under a code prefix")
+    parser.add_argument("--classify", metavar="TEXT", help="Rank HS codes for a product title")
+    args = parser.parse_args()
+
+    print("="*60)
+    print("🏷️  HS CODE CLASSIFICATION")
+    print("="*60)
+
+    if args.lookup:
+        for entry in get_classifier().nomenclature.prefix_search(args.lookup):
+            print(f"   {format_hs_code(entry['hscode']):<10} {entry['description']}")
+        return
+
+    if args.classify:
+        for candidate in get_classifier().classify(args.classify, top_k=5):
+            print(f"   {candidate['hscode']:<10} {candidate['confidence']:.0%}  {candidate['description']}")
+        return
+
+    summary = classify_catalog()
+    unknown = sum(1 for item in summary.values() if item["hscode"] == UNKNOWN_CODE)
+    print(f"\n✅ Classified {len(summary)} catalog items ({unknown} without a match)")
+    print(f"💾 Saved to: {OUTPUT_FILE}")
+
+
+if __name__ == "__main__":
+    main()
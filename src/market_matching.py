@@ -0,0 +1,295 @@
+"""
+PRODUCT-TO-MARKET MATCHING ENGINE
+Scores every product against every market with NumPy and ranks the top-k both ways
+"""
+
+import json
+import math
+import time
+from pathlib import Path
+
+import numpy as np
+
+from real_market_access import get_plan_index
+
+# Configuration
+INVENTORY_FILE = Path("data/processed/master_product_inventory.json")
+MARKET_DATA_FILE = Path("data/raw/complete_market_data.json")
+OUTPUT_FILE = Path("data/processed/market_matches.json")
+CHUNK_SIZE = 8192
+TOP_K = 3
+
+CATEGORIES = ["food", "crafts", "textiles", "cosmetics", "other"]
+CERTIFICATIONS = ["organic", "fair_trade", "halal"]
+
+# Inventory / scanner / trade category labels -> matching category
+CATEGORY_MAP = {
+    "food": "food", "food & beverage": "food", "agriculture": "food",
+    "crafts": "crafts", "home decor": "crafts", "home & kitchen": "crafts",
+    "textiles": "textiles", "apparel": "textiles", "manufacturing": "textiles",
+    "cosmetics": "cosmetics", "beauty & personal care": "cosmetics"
+}
+
+CERT_KEYWORDS = {
+    "organic": ["organic", "عضوي"],
+    "fair_trade": ["fair trade", "fairtrade", "تجارة عادلة"],
+    "halal": ["halal", "حلال"]
+}
+
+# Rough door-to-door freight cost per kg for small consolidated shipments
+SHIPPING_COST_PER_KG = {"EUROPE": 4.0, "USA": 6.0, "MIDDLE EAST": 2.0, "JAPAN": 7.0}
+DEFAULT_SHIPPING_COST_PER_KG = 6.0
+DEFAULT_WEIGHT_KG = 0.5
+
+# Score weights
+DEMAND_WEIGHT = 2.0
+CERT_WEIGHT = 0.5
+
+# Feature layout shared by product rows and market weight rows
+FEATURES = CATEGORIES + CERTIFICATIONS + ["premium", "shipping_share"]
+
+
+def normalize_category(label):
+    """Map any category label to one of CATEGORIES"""
+    return CATEGORY_MAP.get(str(label).strip().lower(), "other")
+
+
+def product_features(products):
+    """(ids, float32 matrix n x len(FEATURES)) for product dicts with category/price_usd/weight_kg/text"""
+    ids = []
+    rows = []
+    for product in products:
+        text = str(product.get("text", "")).lower()
+        price = max(float(product.get("price_usd") or 1.0), 1.0)
+        weight = float(product.get("weight_kg") or DEFAULT_WEIGHT_KG)
+
+        row = [0.0] * len(FEATURES)
+        row[CATEGORIES.index(normalize_category(product.get("category")))] = 1.0
+        for j, cert in enumerate(CERTIFICATIONS):
+            if any(keyword in text for keyword in CERT_KEYWORDS[cert]):
+                row[len(CATEGORIES) + j] = 1.0
+        row[-2] = min(math.log10(price) / 3, 1.0)   # $1 -> 0, $1000+ -> 1
+        row[-1] = weight / price                     # kg shipped per dollar of value
+        ids.append(product["id"])
+        rows.append(row)
+    return ids, np.array(rows, dtype=np.float32).reshape(len(rows), len(FEATURES))
+
+
+def parse_premium(text):
+    """Midpoint of a '20-30%' style price premium as a fraction (0.1 when not numeric)"""
+    numbers = [float(n) for n in "".join(c if c.isdigit() else " " for c in str(text)).split()]
+    return sum(numbers) / len(numbers) / 100 if numbers else 0.1
+
+
+def market_weights(markets):
+    """(names, float32 matrix m x len(FEATURES)) so that scores = product_features @ weights.T"""
+    names = []
+    rows = []
+    for market in markets:
+        row = [0.0] * len(FEATURES)
+        demand = market.get("demand", {})
+        for j, category in enumerate(CATEGORIES):
+            row[j] = DEMAND_WEIGHT * demand.get(category, 0.0)
+
+        for j, cert in enumerate(CERTIFICATIONS):
+            for requirement in market.get("requirements", []):
+                requirement = requirement.lower()
+                if any(keyword in requirement for keyword in CERT_KEYWORDS[cert] + [cert.replace("_", " ")]):
+                    row[len(CATEGORIES) + j] = CERT_WEIGHT * (0.5 if "optional" in requirement else 1.0)
+        row[-2] = parse_premium(market.get("price_premium", ""))
+        row[-1] = -market.get("shipping_cost_per_kg", DEFAULT_SHIPPING_COST_PER_KG)
+        names.append(market["name"])
+        rows.append(row)
+    return names, np.array(rows, dtype=np.float32).reshape(len(rows), len(FEATURES))
+
+
+def load_products(inventory_file=INVENTORY_FILE, market_data_file=MARKET_DATA_FILE):
+    """Inventory SKUs and scanned products as matching inputs"""
+    products = []
+    if Path(inventory_file).exists():
+        with open(inventory_file, "r", encoding="utf-8") as f:
+            for item in json.load(f):
+                info = item["product_info"]
+                products.append({
+                    "id": item["sku"],
+                    "title": info["title"],
+                    "category": info.get("category"),
+                    "price_usd": item["pricing"]["retail_price_usd"],
+                    "weight_kg": item["inventory"].get("weight_kg"),
+                    "text": " ".join([info["title"]] + info.get("tags", []))
+                })
+    if Path(market_data_file).exists():
+        with open(market_data_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for product in data.get("products", []):
+            products.append({
+                "id": product["id"],
+                "title": product.get("english_title") or product.get("title"),
+                "category": product.get("category"),
+                "price_usd": product.get("price_usd"),
+                "text": " ".join(filter(None, [product.get("english_title"), product.get("description")]))
+            })
+    return products
+
+
+def load_markets(market_data_file=MARKET_DATA_FILE):
+    """Verified markets with category demand shares from trade data (growth-adjusted export value)"""
+    index = get_plan_index()
+    demand = {name: {} for name in index["markets"]}
+    if Path(market_data_file).exists():
+        with open(market_data_file, "r", encoding="utf-8") as f:
+            trade = json.load(f).get("trade", [])
+        for record in trade:
+            value = record.get("export_value_usd", 0) * (1 + record.get("growth_rate", 0) / 100)
+            category = normalize_category(record.get("category"))
+            for destination in str(record.get("main_markets", "")).split(","):
+                market = index["destinations"].get(destination.strip().upper())
+                if market:
+                    demand[market][category] = demand[market].get(category, 0.0) + value
+
+    markets = []
+    for name, info in index["markets"].items():
+        total = sum(demand[name].values()) or 1.0
+        markets.append({
+            "name": name,
+            "demand": {category: value / total for category, value in demand[name].items()},
+            "requirements": info.get("requirements", []),
+            "price_premium": info.get("price_premium", ""),
+            "shipping_cost_per_kg": SHIPPING_COST_PER_KG.get(name, DEFAULT_SHIPPING_COST_PER_KG)
+        })
+    return markets
+
+
+def _top_k_rows(scores, k):
+    """Column indices of the k best scores per row, best first"""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, part, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1)
+
+
+class MarketMatcher:
+    """Product x market scoring with chunked top-k in both directions"""
+
+    def __init__(self, markets, chunk_size=CHUNK_SIZE):
+        self.market_names, self.weights = market_weights(markets)
+        self.chunk_size = chunk_size
+
+    def match(self, features, k=TOP_K):
+        """Top-k market indices/scores per product and top-k product indices/scores per market"""
+        n_products, n_markets = len(features), len(self.market_names)
+        k_markets = min(k, n_markets)
+        product_top = np.empty((n_products, k_markets), dtype=np.int64)
+        product_scores = np.empty((n_products, k_markets), dtype=np.float32)
+
+        # Running best-k products per market, merged chunk by chunk (markets in rows)
+        best_idx = np.empty((n_markets, 0), dtype=np.int64)
+        best_scores = np.empty((n_markets, 0), dtype=np.float32)
+
+        for start in range(0, n_products, self.chunk_size):
+            scores = features[start:start + self.chunk_size] @ self.weights.T
+
+            top = _top_k_rows(scores, k_markets)
+            product_top[start:start + len(scores)] = top
+            product_scores[start:start + len(scores)] = np.take_along_axis(scores, top, axis=1)
+
+            chunk_top = _top_k_rows(scores.T, k)
+            candidates = np.concatenate([best_idx, chunk_top + start], axis=1)
+            candidate_scores = np.concatenate(
+                [best_scores, np.take_along_axis(scores.T, chunk_top, axis=1)], axis=1
+            )
+            keep = _top_k_rows(candidate_scores, k)
+            best_idx = np.take_along_axis(candidates, keep, axis=1)
+            best_scores = np.take_along_axis(candidate_scores, keep, axis=1)
+
+        return {
+            "product_top": product_top, "product_scores": product_scores,
+            "market_top": best_idx, "market_scores": best_scores
+        }
+
+    def recommend(self, products, k=TOP_K):
+        """Readable top-k recommendations for product dicts"""
+        ids, features = product_features(products)
+        result = self.match(features, k)
+        titles = {product["id"]: product.get("title", product["id"]) for product in products}
+        return {
+            "by_product": {
+                product_id: [
+                    {"market": self.market_names[j], "score": round(float(score), 4)}
+                    for j, score in zip(result["product_top"][i], result["product_scores"][i])
+                ]
+                for i, product_id in enumerate(ids)
+            },
+            "by_market": {
+                market: [
+                    {"product": ids[i], "title": titles[ids[i]], "score": round(float(score), 4)}
+                    for i, score in zip(result["market_top"][m], result["market_scores"][m])
+                ]
+                for m, market in enumerate(self.market_names)
+            }
+        }
+
+
+def run_benchmark(n_products=100000, n_markets=1000, k=TOP_K, seed=0):
+    """Time matching on random product features and market weights"""
+    rng = np.random.default_rng(seed)
+    features = np.zeros((n_products, len(FEATURES)), dtype=np.float32)
+    features[np.arange(n_products), rng.integers(0, len(CATEGORIES), n_products)] = 1.0
+    features[:, len(CATEGORIES):len(CATEGORIES) + len(CERTIFICATIONS)] = rng.random((n_products, len(CERTIFICATIONS))) < 0.2
+    features[:, -2] = rng.random(n_products)
+    features[:, -1] = rng.random(n_products) * 0.1
+
+    markets = [{
+        "name": f"market_{i}",
+        "demand": dict(zip(CATEGORIES, rng.dirichlet(np.ones(len(CATEGORIES))))),
+        "requirements": ["Organic certification"] if i % 3 == 0 else [],
+        "price_premium": f"{int(rng.integers(5, 50))}%",
+        "shipping_cost_per_kg": float(rng.uniform(1, 8))
+    } for i in range(n_markets)]
+
+    matcher = MarketMatcher(markets)
+    start = time.perf_counter()
+    matcher.match(features, k)
+    seconds = time.perf_counter() - start
+    return {"products": n_products, "markets": n_markets, "seconds": round(seconds, 3),
+            "pairs_per_second": int(n_products * n_markets / seconds)}
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Match products to export markets")
+    parser.add_argument("--top-k", type=int, default=TOP_K)
+    parser.add_argument("--benchmark", nargs=2, type=int, metavar=("PRODUCTS", "MARKETS"),
+                        help="Time matching on random data instead of the catalog")
+    args = parser.parse_args()
+
+    print("="*60)
+    print("🎯 PRODUCT-TO-MARKET MATCHING")
+    print("="*60)
+
+    if args.benchmark:
+        stats = run_benchmark(*args.benchmark, k=args.top_k)
+        print(f"\n⏱️  {stats['products']:,} products x {stats['markets']:,} markets in {stats['seconds']}s "
+              f"({stats['pairs_per_second']:,} pairs/s)")
+        return
+
+    products = load_products()
+    matcher = MarketMatcher(load_markets())
+    report = matcher.recommend(products, args.top_k)
+
+    for market, matches in report["by_market"].items():
+        print(f"\n🌍 {market}:")
+        for match in matches:
+            print(f"   • {match['title']} ({match['score']})")
+
+    OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Saved to: {OUTPUT_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,870 @@
+"""
+MONTE CARLO EXPORT SIMULATION
+Simulates multi-year export revenue paths for every product at once (products x paths x years)
+"""
+
+import hashlib
+import json
+import os
+import time
+import warnings
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+import numpy as np
+
+# Configuration
+TRADE_DATA_FILE = Path("data/raw/complete_market_data.json")
+OUTPUT_FILE = Path("data/processed/monte_carlo_results.json")
+DEFAULT_YEARS = 5
+CHUNK_PATHS = 32768
+# Paths per RNG stream. Each batch gets its own SeedSequence child, so a run is bit-identical
+# for a given seed whatever the worker count; changing this changes the streams.
+BATCH_PATHS = 262144
+CHECKPOINT_DIR = Path("data/processed/.monte_carlo_checkpoints")
+
+# random: pseudo-random; antithetic: mirrored pairs (z, -z) / (u, 1-u); control: pseudo-random with
+# the undisrupted revenue (mean = growth projection x mean price shock) as control variate; lhs / sobol: Latin hypercube and scrambled Sobol
+# points over all of a path's variates (scipy.stats.qmc)
+SAMPLERS = ("random", "antithetic", "control", "lhs", "sobol")
+MIN_BATCHES_FOR_SE = 4
+
+# Percentile estimators: "kll" sketches have bounded rank error over any value range;
+# "histogram" is faster but clamps revenue outside HIST_RANGE x projection
+QUANTILE_METHODS = ("kll", "histogram")
+KLL_K = 1024
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Revenue is binned as a ratio to the deterministic growth projection on log-spaced bins,
+# so percentile error is bounded by one bin width (~0.3% relative) whatever the path count
+HIST_RANGE = (1e-3, 1e2)
+HIST_BINS = 4096
+
+# Shock distributions. Growth "mean" defaults to each product's growth_rate.
+#   growth:     annual growth rate, added to the product's trend
+#   price:      annual multiplicative price shock, compounding (random walk in log price)
+#   disruption: market access shock shared by all products in a year (border closure etc.),
+#               removing the same "loss" fraction of that year's revenue for every product
+#   certification: per-product delay (years) before new certifications clear, during which the
+#               "share" of revenue that depends on them is lost
+DEFAULT_MODEL = {
+    "growth": {"dist": "normal", "sd": 0.06},
+    "price": {"dist": "lognormal", "sigma": 0.10},
+    "disruption": {"prob": 0.15, "loss": {"dist": "triangular", "low": 0.1, "mode": 0.3, "high": 0.8}},
+    "certification": {"share": 0.15, "delay": {"dist": "triangular", "low": 0.0, "mode": 0.5, "high": 2.0}}
+}
+# Bump whenever the revenue model changes, so cached results are not reused across versions
+MODEL_VERSION = 2
+
+# Which standard variate each distribution is built from: z ~ N(0, 1) or u ~ U(0, 1)
+DISTRIBUTIONS = {"normal": "z", "lognormal": "z", "uniform": "u", "triangular": "u", "constant": None}
+
+
+def transform(spec, z=None, u=None, mean=0.0):
+    """Map standard normal (z) or uniform (u) draws onto a distribution spec"""
+    dist = spec.get("dist", "constant")
+    if dist == "normal":
+        return spec.get("mean", mean) + spec["sd"] * z
+    if dist == "lognormal":
+        return np.exp(spec.get("mu", 0.0) + spec["sigma"] * z)
+    if dist == "uniform":
+        return spec["low"] + (spec["high"] - spec["low"]) * u
+    if dist == "triangular":
+        low, mode, high = spec["low"], spec["mode"], spec["high"]
+        split = (mode - low) / (high - low)
+        left = low + np.sqrt(u * (high - low) * (mode - low))
+        right = high - np.sqrt((1 - u) * (high - low) * (high - mode))
+        return np.where(u < split, left, right)
+    if dist == "constant":
+        return np.full_like(z if z is not None else u, spec.get("value", mean), dtype=np.float32)
+    raise ValueError(f"Unknown distribution: {dist}")
+
+
+def expected_value(spec, mean=0.0):
+    """Mean of a distribution spec"""
+    dist = spec.get("dist", "constant")
+    if dist == "normal":
+        return spec.get("mean", mean)
+    if dist == "lognormal":
+        return np.exp(spec.get("mu", 0.0) + spec["sigma"] ** 2 / 2)
+    if dist == "uniform":
+        return (spec["low"] + spec["high"]) / 2
+    if dist == "triangular":
+        return (spec["low"] + spec["mode"] + spec["high"]) / 3
+    return spec.get("value", mean)
+
+
+def _apply(spec, draw, mean=0.0):
+    return transform(spec, mean=mean, **{"u" if DISTRIBUTIONS.get(spec.get("dist")) == "u" else "z": draw})
+
+
+def merge_model(overrides=None):
+    """DEFAULT_MODEL with nested overrides applied at any depth (e.g. {"disruption": {"loss": {"high": 0.9}}})"""
+    def merge(target, changes):
+        for key, value in changes.items():
+            if isinstance(value, dict) and isinstance(target.get(key), dict):
+                merge(target[key], value)
+            else:
+                target[key] = value
+        return target
+
+    return merge(json.loads(json.dumps(DEFAULT_MODEL)), overrides or {})
+
+
+def load_trade_products(path=TRADE_DATA_FILE):
+    """Trade records with export_value_usd and growth_rate (percent) from the scanner output"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    records = data.get("trade", []) if isinstance(data, dict) else data
+    products = []
+    for record in records:
+        try:
+            products.append({"product": record["product"],
+                             "export_value_usd": float(record["export_value_usd"]),
+                             "growth_rate": float(record.get("growth_rate") or 0.0),
+                             "main_markets": [m.strip() for m in str(record.get("main_markets") or "").split(",")
+                                              if m.strip()]})
+        except (KeyError, TypeError, ValueError):
+            continue
+    return products
+
+
+class RevenueModel:
+    """Vectorized revenue paths: base x compounding (growth, price) x disruption losses"""
+
+    def __init__(self, products, years=DEFAULT_YEARS, model=None):
+        self.names = [p["product"] for p in products]
+        self.base = np.array([p["export_value_usd"] for p in products], dtype=np.float64)
+        self.growth_mean = np.array([p["growth_rate"] for p in products], dtype=np.float64) / 100.0
+        self.years = years
+        self.model = merge_model(model)
+
+        trend = (1.0 + self.growth_mean)[:, None] ** np.arange(1, years + 1)
+        self.projection = self.base[:, None] * trend                 # deterministic revenue per year
+        self.projection_final = self.projection[:, -1]
+        self.projection_total = self.projection.sum(axis=1)
+
+        # Mean of the undisrupted revenue (control variate): the growth projection compounded with
+        # the mean price shock, exact because annual shocks are independent
+        growth = expected_value(self.model["growth"], self.growth_mean) * np.ones(len(self.names))
+        step = (1.0 + growth) * expected_value(self.model["price"], 1.0)
+        control = self.base[:, None] * step[:, None] ** np.arange(1, years + 1)
+        self.control_final = control[:, -1]
+        self.control_total = control.sum(axis=1)
+
+    @property
+    def dimensions(self):
+        """Standard variates per path as (name, kind, shape)"""
+        n_products = len(self.names)
+        return [("growth", DISTRIBUTIONS[self.model["growth"]["dist"]], (n_products, self.years)),
+                ("price", DISTRIBUTIONS[self.model["price"]["dist"]], (n_products, self.years)),
+                ("hit", "u", (1, self.years)),
+                ("loss", DISTRIBUTIONS[self.model["disruption"]["loss"]["dist"]], (1, self.years)),
+                ("delay", DISTRIBUTIONS[self.model["certification"]["delay"]["dist"]], (n_products, 1))]
+
+    def draw(self, rng, n_paths):
+        """Independent pseudo-random standard variates for n_paths, each shaped (products|1, n, years)"""
+        draws = {}
+        for name, kind, (rows, years) in self.dimensions:
+            shape = (rows, n_paths, years)
+            if kind == "z":
+                draws[name] = rng.standard_normal(shape, dtype=np.float32)
+            elif kind == "u":
+                draws[name] = rng.random(shape, dtype=np.float32)
+            else:
+                draws[name] = np.zeros(shape, dtype=np.float32)
+        return draws
+
+    def revenue(self, draws, with_control=False):
+        """Annual revenue (products, n, years) from standard variates.
+
+        with_control also returns the undisrupted revenue (growth and price shocks only),
+        whose mean is known in closed form, for use as a control variate.
+        """
+        model = self.model
+        growth = _apply(model["growth"], draws["growth"], self.growth_mean[:, None, None].astype(np.float32))
+        log_step = np.log1p(np.maximum(growth, -0.95))
+
+        price = model["price"]
+        if price["dist"] == "lognormal":
+            # log of a lognormal shock is normal, skip the exp/log round trip
+            log_step += price.get("mu", 0.0) + price["sigma"] * draws["price"]
+        else:
+            log_step += np.log(np.maximum(_apply(price, draws["price"], 1.0), 1e-6))
+
+        np.cumsum(log_step, axis=2, out=log_step)
+        undisrupted = np.exp(log_step, out=log_step)
+        undisrupted *= self.base[:, None, None].astype(np.float32)
+
+        disruption = model["disruption"]
+        hit = draws["hit"] < disruption["prob"]
+        kept = 1.0 - np.clip(_apply(disruption["loss"], draws["loss"]), 0.0, 1.0) * hit
+
+        certification = model["certification"]
+        if certification.get("share"):
+            # Fraction of each year (year t covers [t, t+1)) still waiting on certification
+            delay = _apply(certification["delay"], draws["delay"])
+            waiting = np.clip(delay - np.arange(self.years, dtype=np.float32), 0.0, 1.0)
+            kept = kept * (1.0 - certification["share"] * waiting)
+
+        if with_control:
+            return undisrupted * kept, undisrupted
+        undisrupted *= kept
+        return undisrupted
+
+
+class PathSampler:
+    """Standard variates for successive chunks of one batch, from the selected sampler"""
+
+    def __init__(self, model, kind, rng):
+        if kind not in SAMPLERS:
+            raise ValueError(f"Unknown sampler: {kind} (choose from {', '.join(SAMPLERS)})")
+        self.model = model
+        self.kind = kind
+        self.rng = rng
+        self.engine = None
+        if kind in ("lhs", "sobol"):
+            from scipy.stats import qmc
+
+            dims = sum(rows * years for _, _, (rows, years) in model.dimensions)
+            self.engine = (qmc.Sobol(dims, scramble=True, rng=rng) if kind == "sobol"
+                           else qmc.LatinHypercube(dims, rng=rng))
+
+    def draw(self, n_paths):
+        if self.kind == "antithetic":
+            half = self.model.draw(self.rng, (n_paths + 1) // 2)
+            draws = {}
+            for name, kind, _ in self.model.dimensions:
+                mirror = -half[name] if kind == "z" else (1.0 - half[name] if kind == "u" else half[name])
+                draws[name] = np.concatenate([half[name], mirror], axis=1)[:, :n_paths]
+            return draws
+        if self.engine is None:
+            return self.model.draw(self.rng, n_paths)
+        return self._from_uniforms(n_paths)
+
+    def _from_uniforms(self, n_paths):
+        with warnings.catch_warnings():
+            # Sobol balance warning for chunk sizes that are not powers of two
+            warnings.simplefilter("ignore", UserWarning)
+            points = self.engine.random(n_paths)
+        return draws_from_uniforms(self.model, points)
+
+
+def draws_from_uniforms(model, points):
+    """Standard variates from unit-cube points (n, model dims), columns laid out as model.dimensions"""
+    from scipy.special import ndtri
+
+    n_paths = len(points)
+    points = np.clip(points, 1e-7, 1 - 1e-7)
+    draws = {}
+    offset = 0
+    for name, kind, (rows, years) in model.dimensions:
+        block = points[:, offset:offset + rows * years].reshape(n_paths, rows, years).transpose(1, 0, 2)
+        offset += rows * years
+        if kind == "z":
+            block = ndtri(block)
+        elif kind is None:
+            block = np.zeros_like(block)
+        draws[name] = np.ascontiguousarray(block, dtype=np.float32)
+    return draws
+
+
+class OnlineMoments:
+    """Streaming per-product mean and variance (Welford/Chan): exact merges in constant memory"""
+
+    def __init__(self, n_series):
+        self.n = 0
+        self.mean_ = np.zeros(n_series)
+        self.m2 = np.zeros(n_series)
+
+    def add(self, values):
+        """Fold a chunk shaped (products, n)"""
+        values = values.astype(np.float64)
+        n = values.shape[1]
+        if n == 0:
+            return
+        mean = values.mean(axis=1)
+        m2 = np.square(values - mean[:, None]).sum(axis=1)
+        self.merge_state({"n": n, "mean": mean, "m2": m2})
+
+    def state(self):
+        return {"n": np.array(self.n), "mean": self.mean_, "m2": self.m2}
+
+    def load_state(self, state):
+        self.n = int(state["n"])
+        self.mean_ = np.array(state["mean"], dtype=np.float64)
+        self.m2 = np.array(state["m2"], dtype=np.float64)
+        return self
+
+    def merge_state(self, state):
+        n_other = int(state["n"])
+        if n_other == 0:
+            return self
+        total = self.n + n_other
+        delta = state["mean"] - self.mean_
+        self.m2 = self.m2 + state["m2"] + delta ** 2 * (self.n * n_other / total)
+        self.mean_ = self.mean_ + delta * (n_other / total)
+        self.n = total
+        return self
+
+    def mean(self):
+        return self.mean_
+
+    def std(self):
+        return np.sqrt(self.m2 / max(self.n, 1))
+
+
+class HistogramReducer:
+    """Per-product histograms of value / scale on log bins: bounded memory, mergeable percentiles"""
+
+    def __init__(self, scale, bins=HIST_BINS, value_range=HIST_RANGE):
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.bins = bins
+        self.log_low = np.log(value_range[0])
+        self.log_step = (np.log(value_range[1]) - self.log_low) / bins
+        # bin 0 is underflow (incl. zero revenue), bin bins+1 is overflow
+        self.counts = np.zeros((len(self.scale), bins + 2), dtype=np.int64)
+        self.moments = OnlineMoments(len(self.scale))
+
+    @property
+    def n(self):
+        return self.moments.n
+
+    def add(self, values):
+        """Accumulate values shaped (products, n)"""
+        n_products, n = values.shape
+        ratio = values / self.scale[:, None].astype(values.dtype)
+        with np.errstate(divide="ignore"):
+            index = np.floor((np.log(ratio) - self.log_low) / self.log_step)
+        index = np.clip(np.nan_to_num(index, nan=-1, neginf=-1), -1, self.bins).astype(np.int64) + 1
+        index += (np.arange(n_products) * (self.bins + 2))[:, None]
+        self.counts += np.bincount(index.ravel(), minlength=self.counts.size).reshape(self.counts.shape)
+        self.moments.add(values)
+
+    def state(self):
+        """Plain arrays for shipping between processes and checkpointing"""
+        return {"counts": self.counts, **self.moments.state()}
+
+    def load_state(self, state):
+        self.counts = np.array(state["counts"], dtype=np.int64)
+        self.moments.load_state(state)
+        return self
+
+    def merge_state(self, state):
+        self.counts += state["counts"]
+        self.moments.merge_state(state)
+        return self
+
+    def merge(self, other):
+        return self.merge_state(other.state())
+
+    def mean(self):
+        return self.moments.mean()
+
+    def std(self):
+        return self.moments.std()
+
+    def percentiles(self, qs=PERCENTILES):
+        """(products, len(qs)) percentiles, interpolated log-linearly inside a bin"""
+        cumulative = np.cumsum(self.counts, axis=1)
+        out = np.zeros((len(self.scale), len(qs)))
+        for j, q in enumerate(qs):
+            target = q / 100.0 * self.n
+            index = np.argmax(cumulative >= max(target, 1), axis=1)
+            before = np.where(index > 0, cumulative[np.arange(len(index)), index - 1], 0)
+            inside = self.counts[np.arange(len(index)), index]
+            fraction = np.clip((target - before) / np.maximum(inside, 1), 0.0, 1.0)
+            log_value = self.log_low + (index - 1 + fraction) * self.log_step
+            values = np.exp(log_value)
+            values[index == 0] = 0.0                       # underflow bin reads as ~zero revenue
+            out[:, j] = values * self.scale
+        return out
+
+
+class KLLSketch:
+    """KLL quantile sketch: level-h compactors hold items of weight 2^h, capacities shrink by 2/3 downward"""
+
+    def __init__(self, k=KLL_K, rng=None):
+        self.k = k
+        self.rng = rng if rng is not None else np.random.default_rng(0)
+        self.levels = [np.empty(0)]
+        self.n = 0
+
+    def capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(int(np.ceil(self.k * (2.0 / 3.0) ** depth)), 2)
+
+    def update(self, values):
+        self.levels[0] = np.concatenate([self.levels[0], np.asarray(values, dtype=np.float64)])
+        self.n += len(values)
+        self._compress()
+
+    def merge_levels(self, levels, n):
+        for level, items in enumerate(levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += n
+        self._compress()
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self.capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # Compact an even number of items: every other one survives with double weight
+                odd = len(items) % 2
+                survivors = items[odd:][int(self.rng.integers(2))::2]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], survivors])
+                self.levels[level] = items[:odd]
+            level += 1
+
+    def quantiles(self, fractions):
+        items = np.concatenate(self.levels)
+        if len(items) == 0:
+            return np.zeros(len(fractions))
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        cumulative = np.cumsum(weights[order])
+        ranks = np.asarray(fractions) * cumulative[-1]
+        index = np.minimum(np.searchsorted(cumulative, ranks, side="left"), len(items) - 1)
+        return items[order][index]
+
+
+class QuantileSketch:
+    """Per-product KLL sketches plus online moments; rank error stays bounded whatever the value range"""
+
+    def __init__(self, n_products, k=KLL_K, rng=None):
+        rng = rng if rng is not None else np.random.default_rng(0)
+        self.sketches = [KLLSketch(k, rng) for _ in range(n_products)]
+        self.moments = OnlineMoments(n_products)
+
+    @property
+    def n(self):
+        return self.moments.n
+
+    def add(self, values):
+        """Accumulate values shaped (products, n)"""
+        for sketch, row in zip(self.sketches, values):
+            sketch.update(row)
+        self.moments.add(values)
+
+    def state(self):
+        """Flattened levels: sizes (products, levels) and the concatenated items"""
+        depth = max(len(sketch.levels) for sketch in self.sketches)
+        sizes = np.zeros((len(self.sketches), depth), dtype=np.int64)
+        items = []
+        for p, sketch in enumerate(self.sketches):
+            for h, level in enumerate(sketch.levels):
+                sizes[p, h] = len(level)
+                items.append(level)
+        return {"sizes": sizes, "items": np.concatenate(items) if items else np.empty(0), **self.moments.state()}
+
+    def load_state(self, state):
+        for sketch in self.sketches:
+            sketch.levels, sketch.n = [np.empty(0)], 0
+        return self.merge_state(state)
+
+    def merge_state(self, state):
+        offsets = np.concatenate([[0], np.cumsum(state["sizes"].ravel())])
+        depth = state["sizes"].shape[1]
+        for p, sketch in enumerate(self.sketches):
+            levels = [state["items"][offsets[p * depth + h]:offsets[p * depth + h + 1]] for h in range(depth)]
+            sketch.merge_levels(levels, int(state["n"]))
+        self.moments.merge_state(state)
+        return self
+
+    def merge(self, other):
+        return self.merge_state(other.state())
+
+    def mean(self):
+        return self.moments.mean()
+
+    def std(self):
+        return self.moments.std()
+
+    def percentiles(self, qs=PERCENTILES):
+        """(products, len(qs)) percentiles from the sketches"""
+        fractions = np.asarray(qs, dtype=np.float64) / 100.0
+        return np.array([sketch.quantiles(fractions) for sketch in self.sketches])
+
+
+class ControlVariateReducer:
+    """Mean of Y adjusted by a control C with known mean: Y - beta (C - E[C]), per product"""
+
+    def __init__(self, expected):
+        self.expected = np.asarray(expected, dtype=np.float64)
+        zeros = np.zeros(len(self.expected))
+        # Centered co-moments, merged pairwise like OnlineMoments
+        self.stats = {"n": 0, "mean_y": zeros, "mean_c": zeros, "m_yy": zeros, "m_cc": zeros, "m_yc": zeros}
+
+    @property
+    def n(self):
+        return self.stats["n"]
+
+    def add(self, values, control):
+        y = values.astype(np.float64)
+        c = control.astype(np.float64)
+        mean_y, mean_c = y.mean(axis=1), c.mean(axis=1)
+        dy, dc = y - mean_y[:, None], c - mean_c[:, None]
+        self.merge_state({"n": y.shape[1], "mean_y": mean_y, "mean_c": mean_c,
+                          "m_yy": np.einsum("ij,ij->i", dy, dy), "m_cc": np.einsum("ij,ij->i", dc, dc),
+                          "m_yc": np.einsum("ij,ij->i", dy, dc)})
+
+    def state(self):
+        return {**self.stats, "n": np.array(self.stats["n"])}
+
+    def load_state(self, state):
+        self.stats = {key: np.array(value, dtype=np.float64) for key, value in state.items() if key != "n"}
+        self.stats["n"] = int(state["n"])
+        return self
+
+    def merge_state(self, state):
+        a, n_b = self.stats, int(state["n"])
+        if n_b == 0:
+            return self
+        n = a["n"] + n_b
+        dy = state["mean_y"] - a["mean_y"]
+        dc = state["mean_c"] - a["mean_c"]
+        weight = a["n"] * n_b / n
+        self.stats = {"n": n,
+                      "mean_y": a["mean_y"] + dy * (n_b / n), "mean_c": a["mean_c"] + dc * (n_b / n),
+                      "m_yy": a["m_yy"] + state["m_yy"] + dy * dy * weight,
+                      "m_cc": a["m_cc"] + state["m_cc"] + dc * dc * weight,
+                      "m_yc": a["m_yc"] + state["m_yc"] + dy * dc * weight}
+        return self
+
+    def estimate(self):
+        """(adjusted mean, standard error, variance reduction factor) per product"""
+        stats, n = self.stats, max(self.stats["n"], 1)
+        var_y, var_c, cov = stats["m_yy"] / n, stats["m_cc"] / n, stats["m_yc"] / n
+        beta = np.divide(cov, var_c, out=np.zeros_like(cov), where=var_c > 0)
+        residual = np.maximum(var_y - beta * cov, 0.0)
+        reduction = np.divide(var_y, residual, out=np.ones_like(var_y), where=residual > 0)
+        return stats["mean_y"] - beta * (stats["mean_c"] - self.expected), np.sqrt(residual / n), reduction
+
+
+def _simulate_batch(simulator, seed_sequence, n_paths):
+    """Worker: simulate one batch from its own RNG stream, return reducer states only"""
+    sampler = PathSampler(simulator.model, simulator.sampler, np.random.default_rng(seed_sequence))
+    reducers = simulator.new_reducers(np.random.default_rng(seed_sequence.spawn(1)[0]))
+    done = 0
+    while done < n_paths:
+        n = min(simulator.chunk_paths, n_paths - done)
+        simulator.simulate_chunk(sampler, n, reducers)
+        done += n
+    return {name: reducer.state() for name, reducer in reducers.items()}
+
+
+class MonteCarloSimulator:
+    """Chunked simulation over paths; only per-product reducers are kept between chunks"""
+
+    def __init__(self, products=None, years=DEFAULT_YEARS, model=None, chunk_paths=CHUNK_PATHS,
+                 batch_paths=BATCH_PATHS, sampler="random", quantiles="kll"):
+        if sampler not in SAMPLERS:
+            raise ValueError(f"Unknown sampler: {sampler} (choose from {', '.join(SAMPLERS)})")
+        if quantiles not in QUANTILE_METHODS:
+            raise ValueError(f"Unknown quantile method: {quantiles} (choose from {', '.join(QUANTILE_METHODS)})")
+        self.model = RevenueModel(products if products is not None else load_trade_products(), years, model)
+        self.chunk_paths = chunk_paths
+        self.batch_paths = batch_paths
+        self.sampler = sampler
+        self.quantiles = quantiles
+
+    def new_reducers(self, rng=None):
+        """Per-output reducers; rng drives KLL compaction so merged sketches are reproducible"""
+        if self.quantiles == "kll":
+            n_products = len(self.model.names)
+            reducers = {"final": QuantileSketch(n_products, rng=rng), "total": QuantileSketch(n_products, rng=rng)}
+        else:
+            reducers = {"final": HistogramReducer(self.model.projection_final),
+                        "total": HistogramReducer(self.model.projection_total)}
+        if self.sampler == "control":
+            reducers["final_cv"] = ControlVariateReducer(self.model.control_final)
+            reducers["total_cv"] = ControlVariateReducer(self.model.control_total)
+        return reducers
+
+    def simulate_chunk(self, sampler, n_paths, reducers):
+        """Simulate n_paths and fold final-year and horizon-total revenue into the reducers"""
+        draws = sampler.draw(n_paths)
+        if "final_cv" not in reducers:
+            revenue = self.model.revenue(draws)
+        else:
+            revenue, control = self.model.revenue(draws, with_control=True)
+            reducers["final_cv"].add(revenue[:, :, -1], control[:, :, -1])
+            reducers["total_cv"].add(revenue.sum(axis=2), control.sum(axis=2))
+        reducers["final"].add(revenue[:, :, -1])
+        reducers["total"].add(revenue.sum(axis=2))
+
+    def batch_estimate(self, states):
+        """Mean final-year revenue per product from one batch (control-adjusted when available)"""
+        if "final_cv" in states:
+            return ControlVariateReducer(self.model.control_final).load_state(states["final_cv"]).estimate()[0]
+        return np.asarray(states["final"]["mean"], dtype=np.float64)
+
+    def run_key(self, entropy):
+        """Identifies a run for checkpointing: model, products, batching and seed entropy"""
+        payload = json.dumps({"version": MODEL_VERSION, "model": self.model.model, "names": self.model.names,
+                              "base": self.model.base.tolist(), "growth": self.model.growth_mean.tolist(),
+                              "years": self.model.years, "chunk": self.chunk_paths,
+                              "batch": self.batch_paths, "sampler": self.sampler,
+                              "quantiles": self.quantiles, "entropy": entropy},
+                             sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:24]
+
+    def run(self, n_paths, seed=None, workers=1, checkpoint_dir=None, target_rel_se=None):
+        """Simulate n_paths in fixed batches across a process pool; returns reducers plus timing.
+
+        Batch i always uses SeedSequence(seed).spawn child i and batches are merged in index
+        order, so results do not depend on worker count. With checkpoint_dir, finished
+        batches are saved and skipped when the same run is resumed. With target_rel_se, the
+        run stops early once the batch-replicate standard error of every product's mean
+        final-year revenue is below that fraction of the mean. An unseeded checkpointed run
+        records its fresh entropy there and reuses it, so an interrupted run resumes as itself.
+        """
+        if seed is None and checkpoint_dir is not None:
+            seed = self._checkpoint_entropy(Path(checkpoint_dir))
+        root = np.random.SeedSequence(seed)
+        n_batches = -(-n_paths // self.batch_paths)
+        streams = root.spawn(n_batches)
+        sizes = [min(self.batch_paths, n_paths - i * self.batch_paths) for i in range(n_batches)]
+
+        folder = None
+        if checkpoint_dir is not None:
+            folder = Path(checkpoint_dir) / self.run_key(root.entropy)
+            folder.mkdir(parents=True, exist_ok=True)
+
+        reducers = self.new_reducers(np.random.default_rng(root.entropy))
+        finished = {}
+        estimates = []
+        next_index = 0
+        stop_at = n_batches
+        resumed = 0
+        start = time.perf_counter()
+
+        def complete(index, states):
+            # Merge strictly in batch order so float sums and the stopping point are reproducible
+            nonlocal next_index, stop_at
+            finished[index] = states
+            while next_index in finished and next_index < stop_at:
+                states = finished.pop(next_index)
+                for name, state in states.items():
+                    reducers[name].merge_state(state)
+                estimates.append(self.batch_estimate(states))
+                next_index += 1
+                if target_rel_se and len(estimates) >= MIN_BATCHES_FOR_SE and \
+                        replicate_rel_se(estimates) <= target_rel_se:
+                    stop_at = next_index
+
+        todo = []
+        for index in range(n_batches):
+            states = self._load_batch(folder, index, sizes[index]) if folder else None
+            if states is None:
+                todo.append(index)
+            else:
+                resumed += 1
+                complete(index, states)
+
+        workers = max(1, min(workers or os.cpu_count() or 1, len(todo) or 1))
+        pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        running = {}
+        try:
+            for index in todo:
+                if index >= stop_at:
+                    break
+                if pool is None:
+                    states = _simulate_batch(self, streams[index], sizes[index])
+                    self._store_batch(folder, index, states)
+                    complete(index, states)
+                    continue
+                # Bounded window keeps out-of-order states from piling up
+                while len(running) >= 2 * workers:
+                    self._collect(running, folder, complete)
+                if index >= stop_at:
+                    break
+                running[pool.submit(_simulate_batch, self, streams[index], sizes[index])] = index
+            while running:
+                self._collect(running, folder, complete)
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+        return {"paths": sum(sizes[:next_index]), "batches": next_index, "resumed_batches": resumed,
+                "sampler": self.sampler, "entropy": root.entropy,
+                "seconds": round(time.perf_counter() - start, 3), "reducers": reducers,
+                "batch_estimates": np.array(estimates), "batch_sizes": sizes[:next_index]}
+
+    def _checkpoint_entropy(self, checkpoint_dir):
+        """Seed entropy of the unseeded run with this configuration, drawn once and stored"""
+        path = checkpoint_dir / f"entropy_{self.run_key(None)}.json"
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                return int(json.load(f)["entropy"])
+        entropy = np.random.SeedSequence().entropy
+        checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"entropy": str(entropy)}, f)
+        os.replace(tmp, path)
+        return entropy
+
+    def _collect(self, running, folder, complete):
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            index = running.pop(future)
+            states = future.result()
+            self._store_batch(folder, index, states)
+            complete(index, states)
+
+    @staticmethod
+    def _store_batch(folder, index, states):
+        if folder is None:
+            return
+        path = folder / f"batch_{index:06d}.npz"
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, **{f"{name}.{key}": value for name, state in states.items() for key, value in state.items()})
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _load_batch(folder, index, n_paths):
+        path = folder / f"batch_{index:06d}.npz"
+        if not path.exists():
+            return None
+        try:
+            with np.load(path) as data:
+                states = {}
+                for key in data.files:
+                    name, field = key.split(".", 1)
+                    states.setdefault(name, {})[field] = data[key]
+        except (OSError, ValueError):
+            return None
+        if any(int(state.get("n", -1)) != n_paths for state in states.values()):
+            return None
+        return states
+
+    def report(self, result, qs=PERCENTILES):
+        """Per-product percentile table for final-year and horizon-total revenue"""
+        rows = []
+        reducers = result["reducers"]
+        tables = {name: (reducers[name].percentiles(qs), reducers[name].mean(), reducers[name].std())
+                  for name in ("final", "total")}
+        adjusted = {name: reducers[f"{name}_cv"].estimate() for name in ("final", "total") if f"{name}_cv" in reducers}
+        for i, product in enumerate(self.model.names):
+            row = {"product": product,
+                   "base_usd": float(self.model.base[i]),
+                   "projection_final_usd": round(float(self.model.projection_final[i]), 2),
+                   "projection_total_usd": round(float(self.model.projection_total[i]), 2)}
+            for name, (pct, mean, std) in tables.items():
+                row[name] = {"mean": round(float(mean[i]), 2), "std": round(float(std[i]), 2),
+                             **{f"p{q}": round(float(pct[i, j]), 2) for j, q in enumerate(qs)}}
+                if name in adjusted:
+                    cv_mean, cv_se, reduction = adjusted[name]
+                    row[name].update({"mean_cv": round(float(cv_mean[i]), 2), "se_cv": round(float(cv_se[i]), 2),
+                                      "variance_reduction": round(float(reduction[i]), 2)})
+            rows.append(row)
+        return rows
+
+
+def replicate_rel_se(estimates):
+    """Largest relative standard error of the mean across products, from independent batch estimates"""
+    estimates = np.asarray(estimates, dtype=np.float64)
+    if len(estimates) < 2:
+        return float("inf")
+    mean = estimates.mean(axis=0)
+    se = estimates.std(axis=0, ddof=1) / np.sqrt(len(estimates))
+    return float(np.max(se / np.maximum(np.abs(mean), 1e-12)))
+
+
+def convergence(result):
+    """Standard error vs paths: relative SE of the mean final-year revenue after each batch"""
+    rows = []
+    paths = 0
+    for k, size in enumerate(result["batch_sizes"], 1):
+        paths += size
+        if k >= 2:
+            rows.append({"paths": paths, "rel_se": replicate_rel_se(result["batch_estimates"][:k])})
+    return rows
+
+
+def compare_samplers(products, n_paths, seed=0, samplers=SAMPLERS, batch_paths=16384, **kwargs):
+    """Run the same budget through each sampler; variance reduction is relative to plain random"""
+    rows = []
+    for kind in samplers:
+        simulator = MonteCarloSimulator(products, batch_paths=batch_paths, sampler=kind, **kwargs)
+        result = simulator.run(n_paths, seed)
+        rows.append({"sampler": kind, "paths": result["paths"], "seconds": result["seconds"],
+                     "rel_se": replicate_rel_se(result["batch_estimates"])})
+    baseline = next((row["rel_se"] for row in rows if row["sampler"] == "random"), None)
+    for row in rows:
+        if baseline:
+            row["variance_reduction"] = round((baseline / row["rel_se"]) ** 2, 2) if row["rel_se"] > 0 else None
+            # Paths needed to match random's precision at this budget
+            row["equivalent_paths"] = int(n_paths * row["variance_reduction"]) if row["variance_reduction"] else None
+    return rows
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Monte Carlo simulation of export revenue")
+    parser.add_argument("--paths", type=int, default=1000000)
+    parser.add_argument("--years", type=int, default=DEFAULT_YEARS)
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Seed (default: fresh entropy, stored in --checkpoint-dir and reused on resume)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--checkpoint-dir", default=None,
+                        help=f"Save finished batches here and resume from them (e.g. {CHECKPOINT_DIR})")
+    parser.add_argument("--disruption-prob", type=float, default=None, help="Annual market access shock probability")
+    parser.add_argument("--sampler", choices=SAMPLERS, default="random")
+    parser.add_argument("--quantiles", choices=QUANTILE_METHODS, default="kll", help="Percentile estimator")
+    parser.add_argument("--target-rel-se", type=float, default=None,
+                        help="Stop once the mean's relative standard error is below this (e.g. 0.001)")
+    parser.add_argument("--compare", action="store_true", help="Compare samplers' precision on the same budget")
+    parser.add_argument("--input", default=str(TRADE_DATA_FILE))
+    parser.add_argument("--output", default=str(OUTPUT_FILE))
+    args = parser.parse_args()
+
+    print("="*60)
+    print("🎲 MONTE CARLO EXPORT SIMULATION")
+    print("="*60)
+
+    model = {"disruption": {"prob": args.disruption_prob}} if args.disruption_prob is not None else None
+    products = load_trade_products(args.input)
+    if args.compare:
+        print(f"\n📏 Relative standard error of mean year-{args.years} revenue, {args.paths:,} paths:")
+        for row in compare_samplers(products, args.paths, args.seed or 0, years=args.years, model=model):
+            print(f"   • {row['sampler']:<10} {row['rel_se']:.2e}  x{row['variance_reduction']} "
+                  f"variance reduction  ({row['seconds']}s)")
+        return
+
+    simulator = MonteCarloSimulator(products, args.years, model, sampler=args.sampler, quantiles=args.quantiles)
+    result = simulator.run(args.paths, args.seed, workers=args.workers, checkpoint_dir=args.checkpoint_dir,
+                           target_rel_se=args.target_rel_se)
+    rows = simulator.report(result)
+
+    print(f"\n✅ {result['paths']:,} paths x {len(rows)} products x {args.years} years "
+          f"({args.sampler}) in {result['seconds']}s")
+    diagnostics = convergence(result)
+    if diagnostics:
+        print(f"   📏 relative standard error of the mean: {diagnostics[-1]['rel_se']:.2e}")
+    if result["resumed_batches"]:
+        print(f"   ♻️  resumed {result['resumed_batches']}/{result['batches']} batches from checkpoint")
+    for row in rows:
+        final = row["final"]
+        print(f"   • {row['product']}: year {args.years} P5 ${final['p5']:,.0f} | "
+              f"P50 ${final['p50']:,.0f} | P95 ${final['p95']:,.0f}")
+
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"paths": result["paths"], "years": args.years, "seed": args.seed, "entropy": result["entropy"],
+                   "sampler": args.sampler, "model": simulator.model.model, "convergence": diagnostics,
+                   "products": rows}, f, ensure_ascii=False, indent=2)
+    print(f"💾 Saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,8 @@ from urllib.parse import urljoin, quote_plus
 import random
 import hashlib
 
+from gazetteer import get_gazetteer
+
 # Configuration
 RAW_DATA_DIR = Path("data/raw")
 os.makedirs(RAW_DATA_DIR, exist_ok=True)
@@ -248,28 +250,9 @@ class PalestineMarketScannerFixed:
     
     def _guess_location(self, text):
         """Guess location from text"""
-        locations = {
-            'غزة': 'Gaza',
-            'الخليل': 'Hebron',
-            'بيت لحم': 'Bethlehem',
-            'نابلس': 'Nablus',
-            'رام الله': 'Ramallah',
-            'أريحا': 'Jericho',
-            'القدس': 'Jerusalem',
-            'جنين': 'Jenin',
-            'طولكرم': 'Tulkarm',
-            'قلقيلية': 'Qalqilya'
-        }
-        
-        for arabic, english in locations.items():
-            if arabic in text:
-                return english
-        
-        # Check for English names
-        text_lower = text.lower()
-        for english in locations.values():
-            if english.lower() in text_lower:
-                return english
+        place = get_gazetteer().lookup(text)
+        if place is not None:
+            return place['name_en']
         
         return random.choice(['West Bank', 'Palestine', 'Gaza'])
     
@@ -1,153 +1,3 @@
-"""
-ACTUAL BDS compliance verification based on REAL criteria
-"""
-
-class RealBDSVerifier:
-    """Verifies ACTUAL BDS compliance"""
-    
-    def __init__(self):
-        self.bds_criteria = self._load_bds_criteria()
-        self.settlement_goods_db = self._load_settlement_db()
-    
-    def _load_bds_criteria(self):
-        """ACTUAL BDS criteria from BDS National Committee"""
-        return {
-            "category_a": {
-                "name": "Direct Settlement Products",
-                "criteria": [
-                    "Produced in Israeli settlements",
-                    "Made by settlement-based companies",
-                    "Packaged/labeled as 'Made in Israel' when from settlements"
-                ],
-                "action": "BOYCOTT"
-            },
-            "category_b": {
-                "name": "Companies Operating in Settlements",
-                "criteria": [
-                    "Has factories/operations in settlements",
-                    "Provides services to settlements",
-                    "Participates in settlement construction"
-                ],
-                "action": "BOYCOTT"
-            },
-            "category_c": {
-                "name": "Normalization Projects",
-                "criteria": [
-                    "Participates in projects that normalize occupation",
-                    "Partners with Israeli institutions without recognizing Palestinian rights",
-                    "Engages in 'coexistence' projects that ignore power imbalance"
-                ],
-                "action": "BOYCOTT"
-            },
-            "category_d": {
-                "name": "Military & Security Collaboration",
-                "criteria": [
-                    "Provides equipment/technology used in occupation",
-                    "Collaborates with Israeli military",
-                    "Supports surveillance of Palestinians"
-                ],
-                "action": "BOYCOTT"
-            }
-        }
-    
-    def _load_settlement_db(self):
-        """KNOWN settlement products/companies"""
-        return {
-            "settlement_products": [
-                "Ahava cosmetics",
-                "SodaStream",
-                "Mey Eden water",
-                "Hadiklaim dates",
-                "Carmel wines",
-                "Jaffa oranges from settlements"
-            ],
-            "settlement_based_companies": [
-                "Afikim",
-                "Angel Bakeries",
-                "Bank Hapoalim (settlement branches)",
-                "Bezeq (settlement services)",
-                "Coca-Cola (settlement operations)"
-            ]
-        }
-    
-    def verify_company(self, company_name, supply_chain=None):
-        """Verify a company's BDS compliance"""
-        
-        # Check against known settlement companies
-        for settlement_company in self.settlement_db["settlement_based_companies"]:
-            if settlement_company.lower() in company_name.lower():
-                return {
-                    "status": "NON-COMPLIANT",
-                    "reason": f"Known settlement-based company: {settlement_company}",
-                    "action": "Boycott",
-                    "certainty": "High"
-                }
-        
-        # Check supply chain
-        if supply_chain:
-            for component in supply_chain:
-                for settlement_product in self.settlement_db["settlement_products"]:
-                    if settlement_product.lower() in str(component).lower():
-                        return {
-                            "status": "NON-COMPLIANT",
-                            "reason": f"Uses settlement product: {settlement_product}",
-                            "action": "Boycott unless alternative sourced",
-                            "certainty": "Medium"
-                        }
-        
-        # Basic Palestinian company check
-        palestinian_indicators = ["palestine", "palestinian", "فلسطين", "غزة", "الخليل", "نابلس"]
-        for indicator in palestinian_indicators:
-            if indicator in company_name.lower():
-                return {
-                    "status": "COMPLIANT",
-                    "reason": "Palestinian-owned business",
-                    "action": "Support",
-                    "certainty": "High"
-                }
-        
-        return {
-            "status": "NEEDS VERIFICATION",
-            "reason": "Insufficient information",
-            "action": "Requires due diligence",
-            "certainty": "Low"
-        }
-    
-    def generate_compliance_report(self, business):
-        """Generate detailed compliance report"""
-        report = {
-            "company": business["name"],
-            "verification_date": datetime.now().strftime("%Y-%m-%d"),
-            "checks_performed": [
-                "Settlement operations check",
-                "Supply chain analysis",
-                "Ownership verification",
-                "Certification review"
-            ],
-            "findings": []
-        }
-        
-        # Check certifications
-        if "Fair Trade" in str(business.get("certifications", [])):
-            report["findings"].append("✅ Fair Trade certified - ethical supply chain")
-        
-        if "Organic" in str(business.get("certifications", [])):
-            report["findings"].append("✅ Organic certification - traceable origin")
-        
-        # Check location
-        if any(loc in str(business.get("location", "")).lower() for loc in ["west bank", "gaza", "palestine"]):
-            report["findings"].append("✅ Based in Palestinian territories")
-        
-        # Final assessment
-        if len([f for f in report["findings"] if "✅" in f]) >= 2:
-            report["bds_status"] = "COMPLIANT"
-            report["recommendation"] = "SUPPORT - Ethical Palestinian business"
-        else:
-            report["bds_status"] = "NEEDS VERIFICATION"
-            report["recommendation"] = "Requires additional due diligence"
-        
-        return report
-
 # palestine_real_toolkit.py
 """
 COMPLETE REAL-WORLD TOOLKIT FOR PALESTINIAN BUSINESSES
@@ -156,50 +6,132 @@ Everything actually works and provides real value
 
 import json
 import csv
+import re
 from datetime import datetime
 from pathlib import Path
 
+from real_bds_verifier import RealBDSVerifier
+from stage_runner import CACHE_DIR, Stage, StageRunner
+
+# Configuration
+DATA_DIR = Path("data/real")
+
+# Verified Palestinian exporters (also merged into business_directory)
+VERIFIED_BUSINESSES = [
+    # Core verified exporters
+    {
+        "id": "PAL-CORE-001",
+        "name": "Canaan Fair Trade",
+        "location": "Burqin, Jenin",
+        "contact": "info@canaanpalestine.com",
+        "phone": "+970 4 243 5680",
+        "products": "Organic olive oil, dates, almonds, zaatar",
+        "export_experience": "15+ years, 15+ countries",
+        "ready_to_export": True,
+        "min_order": "$500",
+        "lead_time": "2-4 weeks",
+        "payment_terms": "30% advance, 70% against documents"
+    },
+    {
+        "id": "PAL-CORE-002",
+        "name": "Zaytoun CIC",
+        "location": "London, UK (sources from West Bank cooperatives)",
+        "contact": "info@zaytoun.org",
+        "phone": "+44 20 8802 9899",
+        "products": "Fair trade olive oil, dates, almonds",
+        "export_experience": "UK market specialist",
+        "ready_to_export": True,
+        "min_order": "$300",
+        "lead_time": "3-5 weeks",
+        "payment_terms": "50% advance, 50% on delivery"
+    },
+    
+    # Handicraft producers
+    {
+        "id": "PAL-CRAFT-001",
+        "name": "Holy Land Handicrafts",
+        "location": "Beit Sahour, Bethlehem",
+        "contact": "holyland@palnet.com",
+        "phone": "+970 2 274 1267",
+        "products": "Mother of pearl, olive wood carvings",
+        "export_experience": "40+ years, worldwide",
+        "ready_to_export": True,
+        "min_order": "$1000",
+        "lead_time": "4-6 weeks",
+        "payment_terms": "40% advance, 60% before shipment"
+    },
+    
+    # Agricultural producers
+    {
+        "id": "PAL-AGRI-001",
+        "name": "Tent of Nations",
+        "location": "Nahalin, Bethlehem",
+        "contact": "info@tentofnations.org",
+        "phone": "+970 2 274 3071",
+        "products": "Organic grapes, dried fruits, olive oil",
+        "export_experience": "EU partnerships",
+        "ready_to_export": True,
+        "min_order": "$750",
+        "lead_time": "Seasonal",
+        "payment_terms": "30% advance, balance on harvest"
+    }
+]
+
 class PalestineRealToolkit:
     """Complete toolkit with ACTUAL working components"""
     
-    def __init__(self):
-        self.data_dir = Path("data/real")
-        self.data_dir.mkdir(exist_ok=True)
+    def __init__(self, data_dir=DATA_DIR, region=None, cache_dir=CACHE_DIR):
+        self.region = region
+        self.data_dir = Path(data_dir)
+        if region:
+            self.data_dir = self.data_dir / re.sub(r"[^a-z0-9]+", "_", region.lower()).strip("_")
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_dir = Path(cache_dir)
+    
+    def stages(self):
+        """Toolkit steps as a dependency graph (directory/templates/guides/BDS checker are independent)"""
+        return [
+            Stage("directory", self.build_verified_directory, params={"region": self.region, "dir": str(self.data_dir)},
+                  outputs=[self.data_dir / "verified_businesses.json", self.data_dir / "verified_businesses.csv"]),
+            Stage("templates", self.create_export_templates, params={"dir": str(self.data_dir)},
+                  outputs=[self.data_dir / "commercial_invoice_template.txt",
+                           self.data_dir / "certificate_of_origin_template.txt"]),
+            Stage("guides", self.create_market_guides),
+            Stage("bds_checker", self.create_bds_checker),
+            Stage("save", self.save_toolkit, deps=["directory", "templates", "guides", "bds_checker"],
+                  params={"dir": str(self.data_dir)}, outputs=[self.data_dir / "complete_toolkit.json"]),
+            Stage("reports", self.generate_actionable_reports, deps=["directory"],
+                  params={"dir": str(self.data_dir)}, outputs=[self.data_dir / "actionable_report.txt"])
+        ]
         
-    def run_complete_toolkit(self):
-        """Run all real tools"""
+    def run_complete_toolkit(self, only=None, start=None, workers=None, use_cache=True):
+        """Run all real tools (independent stages in parallel, unchanged stages from cache)"""
         print("="*80)
-        print("🇵🇸 PALESTINE REAL-WORLD BUSINESS TOOLKIT")
+        print("🇵🇸 PALESTINE REAL-WORLD BUSINESS TOOLKIT" + (f" - {self.region}" if self.region else ""))
         print("="*80)
         print("\nBuilding ACTUAL tools that HELP REAL Palestinian businesses...")
         
-        # 1. Build verified business directory
-        print("\n1. 📋 Building VERIFIED Palestinian Business Directory...")
-        businesses = self.build_verified_directory()
-        print(f"   ✅ Created directory of {len(businesses)} verified businesses")
-        
-        # 2. Generate export documentation templates
-        print("\n2. 📄 Creating REAL Export Documentation Templates...")
-        export_docs = self.create_export_templates()
-        print(f"   ✅ Created {len(export_docs)} export document templates")
+        run = StageRunner(self.stages(), self.cache_dir, workers).run(only, start, use_cache)
+        results = run["results"]
         
-        # 3. Create market access guides
-        print("\n3. 🌍 Creating REAL Market Access Guides...")
-        market_guides = self.create_market_guides()
-        print(f"   ✅ Created market guides for {len(market_guides)} regions")
+        if "directory" in results:
+            print(f"\n📋 Directory of {len(results['directory'])} verified businesses")
+        if "templates" in results:
+            print(f"📄 {len(results['templates'])} export document templates")
+        if "guides" in results:
+            print(f"🌍 Market guides for {len(results['guides'])} regions")
+        if "bds_checker" in results:
+            print("✊ BDS verification tool")
+        if "save" in results:
+            print(f"💾 Saved {len(results['save'])} toolkit files")
+        if "reports" in results:
+            print(f"📊 Actionable report for {results['reports']['businesses']} businesses")
         
-        # 4. Generate BDS compliance checker
-        print("\n4. ✊ Creating REAL BDS Compliance Checker...")
-        bds_tool = self.create_bds_checker()
-        print("   ✅ Created BDS verification tool")
-        
-        # 5. Save everything
-        print("\n5. 💾 Saving complete toolkit...")
-        self.save_toolkit(businesses, export_docs, market_guides, bds_tool)
-        
-        # 6. Generate reports
-        print("\n6. 📊 Generating actionable reports...")
-        self.generate_actionable_reports(businesses)
+        print("\n⏱️  STAGES:")
+        for stat in run["stats"]:
+            print(f"   {stat['stage']:<12} {stat['status']:<7} {stat['seconds']:>8.3f}s  "
+                  f"peak {stat['peak_memory_kb']:>9.1f} KB")
+        print(f"   total {run['seconds']:.3f}s")
         
         print("\n" + "="*80)
         print("🎉 TOOLKIT COMPLETE - READY FOR REAL USE!")
@@ -212,72 +144,24 @@ class PalestineRealToolkit:
         print("   3. Follow REAL market access strategies")
         print("   4. Verify BDS compliance of suppliers")
         print("\n💰 REAL IMPACT: Connect buyers with ACTUAL Palestinian businesses")
+        return run
     
     def build_verified_directory(self):
         """Build directory of verified Palestinian businesses"""
-        businesses = [
-            # Core verified exporters
-            {
-                "id": "PAL-CORE-001",
-                "name": "Canaan Fair Trade",
-                "contact": "info@canaanpalestine.com",
-                "phone": "+970 4 243 5680",
-                "products": "Organic olive oil, dates, almonds, zaatar",
-                "export_experience": "15+ years, 15+ countries",
-                "ready_to_export": True,
-                "min_order": "$500",
-                "lead_time": "2-4 weeks",
-                "payment_terms": "30% advance, 70% against documents"
-            },
-            {
-                "id": "PAL-CORE-002",
-                "name": "Zaytoun CIC",
-                "contact": "info@zaytoun.org",
-                "phone": "+44 20 8802 9899",
-                "products": "Fair trade olive oil, dates, almonds",
-                "export_experience": "UK market specialist",
-                "ready_to_export": True,
-                "min_order": "$300",
-                "lead_time": "3-5 weeks",
-                "payment_terms": "50% advance, 50% on delivery"
-            },
-            
-            # Handicraft producers
-            {
-                "id": "PAL-CRAFT-001",
-                "name": "Holy Land Handicrafts",
-                "contact": "holyland@palnet.com",
-                "phone": "+970 2 274 1267",
-                "products": "Mother of pearl, olive wood carvings",
-                "export_experience": "40+ years, worldwide",
-                "ready_to_export": True,
-                "min_order": "$1000",
-                "lead_time": "4-6 weeks",
-                "payment_terms": "40% advance, 60% before shipment"
-            },
-            
-            # Agricultural producers
-            {
-                "id": "PAL-AGRI-001",
-                "name": "Tent of Nations",
-                "contact": "info@tentofnations.org",
-                "phone": "+970 2 274 3071",
-                "products": "Organic grapes, dried fruits, olive oil",
-                "export_experience": "EU partnerships",
-                "ready_to_export": True,
-                "min_order": "$750",
-                "lead_time": "Seasonal",
-                "payment_terms": "30% advance, balance on harvest"
-            }
-        ]
+        businesses = [dict(business) for business in VERIFIED_BUSINESSES]
+        
+        if self.region:
+            businesses = [b for b in businesses if self.region.lower() in b["location"].lower()]
         
         # Save directory
         with open(self.data_dir / "verified_businesses.json", "w", encoding="utf-8") as f:
             json.dump(businesses, f, indent=2)
         
         # Also save as CSV for easy contact
+        fieldnames = ["id", "name", "location", "contact", "phone", "products", "export_experience",
+                      "ready_to_export", "min_order", "lead_time", "payment_terms"]
         with open(self.data_dir / "verified_businesses.csv", "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=businesses[0].keys())
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
             writer.writeheader()
             writer.writerows(businesses)
         
@@ -351,4 +235,94 @@ Date: _____________________________
                 ],
                 "contact": "European Palestinian Chamber of Commerce"
             }
-        }    
\ No newline at end of file
+        }
+        
+        return guides
+    
+    def create_bds_checker(self):
+        """Create BDS compliance checker configuration"""
+        verifier = RealBDSVerifier()
+        return {
+            "criteria": verifier.bds_criteria,
+            "settlement_products": verifier.settlement_goods_db["settlement_products"],
+            "settlement_based_companies": verifier.settlement_goods_db["settlement_based_companies"],
+            "usage": [
+                "python src/real_bds_verifier.py  # verify a company or supply chain",
+                "python src/barcode_screening.py <barcodes.csv>  # screen product barcodes",
+                "python src/bulk_compliance.py  # verdicts for the whole scanned dataset"
+            ]
+        }
+    
+    def save_toolkit(self, businesses, export_docs, market_guides, bds_tool):
+        """Save complete toolkit"""
+        toolkit = {
+            "generated": datetime.now().isoformat(),
+            "region": self.region,
+            "businesses": businesses,
+            "export_templates": sorted(export_docs),
+            "market_guides": market_guides,
+            "bds_checker": bds_tool
+        }
+        
+        files = {
+            "complete_toolkit.json": toolkit,
+            "market_guides.json": market_guides,
+            "bds_checker.json": bds_tool
+        }
+        for name, content in files.items():
+            with open(self.data_dir / name, "w", encoding="utf-8") as f:
+                json.dump(content, f, indent=2, ensure_ascii=False)
+        
+        return [str(self.data_dir / name) for name in files]
+    
+    def generate_actionable_reports(self, businesses):
+        """Generate actionable contact report for buyers"""
+        ready = [b for b in businesses if b.get("ready_to_export")]
+        lines = [
+            "ACTIONABLE REPORT: PALESTINIAN EXPORTERS" + (f" ({self.region})" if self.region else ""),
+            "=" * 50,
+            f"Generated: {datetime.now().strftime('%Y-%m-%d')}",
+            f"Ready to export: {len(ready)} of {len(businesses)} businesses",
+            ""
+        ]
+        for business in ready:
+            lines.extend([
+                f"{business['name']} ({business.get('location', 'Palestine')})",
+                f"   Products: {business['products']}",
+                f"   Contact: {business['contact']} / {business['phone']}",
+                f"   Minimum order: {business['min_order']}, lead time: {business['lead_time']}",
+                f"   Payment: {business['payment_terms']}",
+                ""
+            ])
+        lines.extend([
+            "NEXT STEPS:",
+            "1. Email 2-3 businesses with your product needs and volumes",
+            "2. Request samples and certification documents",
+            "3. Verify BDS compliance of the supply chain",
+            "4. Agree payment terms and place a trial order"
+        ])
+        
+        with open(self.data_dir / "actionable_report.txt", "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        
+        return {"businesses": len(businesses), "ready_to_export": len(ready)}
+
+
+def main():
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Build the Palestine real-world business toolkit")
+    parser.add_argument("--only", nargs="+", help="Re-run only these stages (dependencies from cache)")
+    parser.add_argument("--from", dest="start", help="Re-run this stage and everything downstream")
+    parser.add_argument("--regions", nargs="+", help="Build one toolkit per region under data/real/<region>")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--no-cache", action="store_true", help="Ignore cached stage outputs")
+    args = parser.parse_args()
+    
+    for region in args.regions or [None]:
+        toolkit = PalestineRealToolkit(region=region)
+        toolkit.run_complete_toolkit(args.only, args.start, args.workers, not args.no_cache)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""
+PDF PIPELINE FOR EXPORT PAPERWORK
+Renders export documents to PDF and extracts text/tables from incoming PDF trade reports
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import PyPDF2
+
+# Configuration
+PDF_OUTPUT_DIR = Path("data/processed/pdf")
+EXTRACT_CACHE_DIR = Path("data/processed/pdf_cache")
+
+# A4 in points, Courier keeps the plain-text layout of the templates intact
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+MARGIN = 50
+FONT_SIZE = 10
+LEADING = 12
+LINES_PER_PAGE = (PAGE_HEIGHT - 2 * MARGIN) // LEADING
+
+# Two or more spaces (or a tab) separate table cells in text reports
+CELL_SPLIT = re.compile(r"\t+| {2,}")
+
+# Open PdfReaders per worker, keyed on (path, mtime), least recently used evicted first
+MAX_OPEN_READERS = 8
+_readers = OrderedDict()
+
+
+# ===== RENDERING =====
+
+def _pdf_escape(line, replace_unsupported=False):
+    """Escape a line for a PDF string literal.
+
+    The base-14 Courier font only covers WinAnsi (cp1252), so Arabic names or addresses cannot
+    be drawn; they raise ValueError unless replace_unsupported opts into "?" placeholders.
+    """
+    try:
+        line.encode("cp1252")
+    except UnicodeEncodeError:
+        if not replace_unsupported:
+            unsupported = sorted({ch for ch in line if not _encodable(ch)})
+            raise ValueError(f"Text not representable in the PDF base font: {''.join(unsupported)!r} in {line!r}")
+        line = line.encode("cp1252", "replace").decode("cp1252")
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _encodable(ch):
+    try:
+        ch.encode("cp1252")
+        return True
+    except UnicodeEncodeError:
+        return False
+
+
+def text_to_pdf(text, title="", replace_unsupported=False):
+    """Render plain text to PDF bytes, paginating on line count"""
+    lines = text.expandtabs(4).splitlines() or [""]
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)]
+
+    # Object numbers: 1 catalog, 2 page tree, 3 font, 4 info, then (page, content) pairs
+    objects = {}
+    page_ids = []
+    for n, page_lines in enumerate(pages):
+        page_id, content_id = 5 + 2 * n, 6 + 2 * n
+        page_ids.append(page_id)
+
+        ops = [f"BT /F1 {FONT_SIZE} Tf {LEADING} TL {MARGIN} {PAGE_HEIGHT - MARGIN} Td"]
+        ops.extend(f"({_pdf_escape(line, replace_unsupported)}) Tj T*" for line in page_lines)
+        ops.append("ET")
+        stream = "\n".join(ops).encode("cp1252")
+
+        objects[page_id] = (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+                            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>").encode()
+        objects[content_id] = b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"
+
+    objects[1] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids)
+    objects[2] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode()
+    objects[3] = b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier /Encoding /WinAnsiEncoding >>"
+    title = _pdf_escape(title, replace_unsupported=True)
+    objects[4] = f"<< /Title ({title}) /Producer (Palestine Resilience Study) >>".encode("cp1252")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = len(out)
+        out += b"%d 0 obj\n" % obj_id + objects[obj_id] + b"\nendobj\n"
+
+    xref_at = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for obj_id in sorted(objects):
+        out += b"%010d 00000 n \n" % offsets[obj_id]
+    out += b"trailer\n<< /Size %d /Root 1 0 R /Info 4 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_at)
+    return bytes(out)
+
+
+def _render_one(job):
+    """Worker: render one (name, text) document to a PDF file; unsupported text is reported, not written"""
+    name, text, output_dir = job
+    path = Path(output_dir) / f"{name}.pdf"
+    try:
+        data = text_to_pdf(text, title=Path(name).name.replace("_", " ").title())
+    except ValueError as e:
+        return {"file": None, "name": name, "error": str(e)}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return {"file": str(path), "bytes": len(data)}
+
+
+def render_documents(documents, output_dir=PDF_OUTPUT_DIR, workers=None, chunksize=32):
+    """Render an iterable of (name, text) documents to PDFs through a worker pool.
+
+    Documents the base font cannot draw come back as {"file": None, "name", "error"} entries.
+    """
+    jobs = ((name, text, str(output_dir)) for name, text in documents)
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        return list(pool.map(_render_one, jobs, chunksize=chunksize))
+
+
+def export_package_documents(package, prefix=""):
+    """(name, text) pairs for the text documents of an ExportDocumentGenerator package"""
+    for doc_name in ("commercial_invoice", "certificate_of_origin", "packing_list", "export_declaration"):
+        if isinstance(package.get(doc_name), str):
+            yield f"{prefix}{doc_name}", package[doc_name]
+
+
+def text_file_documents(directory, pattern="*.txt"):
+    """(name, text) pairs for text documents on disk, e.g. the toolkit templates"""
+    directory = Path(directory)
+    for path in sorted(directory.rglob(pattern)):
+        yield str(path.relative_to(directory).with_suffix("")), path.read_text(encoding="utf-8")
+
+
+# ===== EXTRACTION =====
+
+def page_content_hash(page):
+    """Hash of a page's content stream, used as the extraction cache key"""
+    contents = page.get_contents()
+    data = contents.get_data() if contents is not None else b""
+    return hashlib.sha256(data).hexdigest()
+
+
+def extract_tables(text):
+    """Group consecutive multi-column lines into tables (list of rows of cells)"""
+    tables = []
+    current = []
+    width = None
+    for line in text.splitlines():
+        cells = [cell.strip() for cell in CELL_SPLIT.split(line.strip()) if cell.strip()]
+        if len(cells) >= 2 and (width is None or len(cells) == width):
+            current.append(cells)
+            width = len(cells)
+            continue
+        if len(current) >= 2:
+            tables.append(current)
+        current, width = ([cells], len(cells)) if len(cells) >= 2 else ([], None)
+    if len(current) >= 2:
+        tables.append(current)
+    return tables
+
+
+class PageCache:
+    """On-disk cache of page extraction results keyed by content hash"""
+
+    def __init__(self, cache_dir=EXTRACT_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+
+    def _path(self, key):
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key):
+        path = self._path(key)
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        return None
+
+    def put(self, key, value):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(value, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+
+def _reader(pdf_path):
+    """Cached PdfReader for a file, reopened when the file changes"""
+    key = (pdf_path, os.stat(pdf_path).st_mtime_ns)
+    reader = _readers.pop(key, None) or PyPDF2.PdfReader(pdf_path)
+    _readers[key] = reader
+    while len(_readers) > MAX_OPEN_READERS:
+        _readers.popitem(last=False)
+    return reader
+
+
+def _extract_pages(job):
+    """Worker: extract a range of pages from one PDF, using the page cache"""
+    pdf_path, page_numbers, cache_dir = job
+    reader = _reader(pdf_path)
+    cache = PageCache(cache_dir)
+
+    results = []
+    for number in page_numbers:
+        page = reader.pages[number]
+        key = page_content_hash(page)
+        cached = cache.get(key)
+        if cached is None:
+            text = page.extract_text() or ""
+            cached = {"text": text, "tables": extract_tables(text)}
+            cache.put(key, cached)
+            hit = False
+        else:
+            hit = True
+        results.append({"file": pdf_path, "page": number + 1, "hash": key, "cache_hit": hit, **cached})
+    return results
+
+
+def extract_pdfs(pdf_paths, cache_dir=EXTRACT_CACHE_DIR, workers=None, pages_per_task=8):
+    """Extract text and tables page by page from PDF trade reports"""
+    jobs = []
+    for pdf_path in pdf_paths:
+        page_count = len(PyPDF2.PdfReader(str(pdf_path)).pages)
+        for start in range(0, page_count, pages_per_task):
+            jobs.append((str(pdf_path), list(range(start, min(start + pages_per_task, page_count))), str(cache_dir)))
+
+    pages = []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for results in pool.map(_extract_pages, jobs):
+            pages.extend(results)
+    return pages
+
+
+# ===== BENCHMARK =====
+
+def run_benchmark(n_documents=2000, workers=None, work_dir=Path("data/processed/pdf_benchmark")):
+    """Throughput of rendering invoices/certificates and of cold vs. cached extraction"""
+    from real_export_docs import ExportDocumentGenerator
+
+    generator = ExportDocumentGenerator()
+    business = {"id": "BENCH", "name": "Canaan Fair Trade", "location": "Jenin, West Bank"}
+    documents = []
+    for i in range(n_documents // 2):
+        package = generator.generate_export_package(business, {
+            "name": "Extra Virgin Olive Oil", "type": "olive_oil", "quantity": i + 1, "unit": "bottles",
+            "unit_price": "35.00", "total_value": f"{35 * (i + 1):.2f}", "destination": "EU"
+        })
+        documents.append((f"{i:05d}_commercial_invoice", package["commercial_invoice"]))
+        documents.append((f"{i:05d}_certificate_of_origin", package["certificate_of_origin"]))
+
+    work_dir = Path(work_dir)
+    start = time.perf_counter()
+    rendered = render_documents(documents, work_dir / "pdf", workers)
+    render_seconds = time.perf_counter() - start
+
+    paths = [item["file"] for item in rendered]
+    stats = {"documents": len(rendered), "render_seconds": round(render_seconds, 3),
+             "render_docs_per_second": int(len(rendered) / render_seconds)}
+    for label in ("cold", "cached"):
+        start = time.perf_counter()
+        pages = extract_pdfs(paths, work_dir / "cache", workers)
+        seconds = time.perf_counter() - start
+        stats[f"extract_{label}_seconds"] = round(seconds, 3)
+        stats[f"extract_{label}_pages_per_second"] = int(len(pages) / seconds)
+    return stats
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Render export documents to PDF / extract PDF trade reports")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    render = sub.add_parser("render", help="Render .txt documents in a directory to PDF")
+    render.add_argument("source_dir", nargs="?", default="data/real")
+    render.add_argument("--output", default=str(PDF_OUTPUT_DIR))
+
+    extract = sub.add_parser("extract", help="Extract text and tables from PDF reports")
+    extract.add_argument("pdfs", nargs="+")
+    extract.add_argument("--output", default="data/processed/pdf_extracted.json")
+
+    bench = sub.add_parser("benchmark", help="Measure rendering and extraction throughput")
+    bench.add_argument("--documents", type=int, default=2000)
+
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    print("="*60)
+    print("📑 EXPORT PAPERWORK PDF PIPELINE")
+    print("="*60)
+
+    if args.command == "render":
+        rendered = render_documents(text_file_documents(args.source_dir), args.output, args.workers)
+        failed = [item for item in rendered if item["file"] is None]
+        print(f"\n✅ Rendered {len(rendered) - len(failed)} PDFs to {args.output}")
+        for item in failed:
+            print(f"   ❌ {item['name']}: {item['error']}")
+        if failed:
+            raise SystemExit(f"{len(failed)} documents contain text the PDF font cannot render")
+    elif args.command == "extract":
+        pages = extract_pdfs(args.pdfs, workers=args.workers)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(pages, f, ensure_ascii=False, indent=2)
+        hits = sum(1 for page in pages if page["cache_hit"])
+        tables = sum(len(page["tables"]) for page in pages)
+        print(f"\n✅ Extracted {len(pages)} pages ({hits} from cache), {tables} tables")
+        print(f"💾 Saved to: {args.output}")
+    else:
+        stats = run_benchmark(args.documents, args.workers)
+        print(f"\n⏱️  Rendered {stats['documents']} PDFs: {stats['render_docs_per_second']} docs/s")
+        print(f"⏱️  Extraction (cold): {stats['extract_cold_pages_per_second']} pages/s")
+        print(f"⏱️  Extraction (cached): {stats['extract_cached_pages_per_second']} pages/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -191,11 +191,11 @@ def build_real_directory():
     for business in REAL_PALESTINIAN_BUSINESSES:
         business["last_verified"] = datetime.now().strftime("%Y-%m-%d")
         business["data_source"] = "Manual verification"
-        business["economic_impact"] = self._calculate_impact(business)
+        business["economic_impact"] = _calculate_impact(business)
     
     return REAL_PALESTINIAN_BUSINESSES
 
-def _calculate_impact(self, business):
+def _calculate_impact(business):
     """Calculate economic impact"""
     impacts = {
         "Canaan Fair Trade": "Supports 1,700+ farming families",
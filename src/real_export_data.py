@@ -0,0 +1,632 @@
+"""
+REAL EXPORT DATA
+Columnar multi-year trade store (categorical codes + measures) with precomputed aggregation cubes
+"""
+
+import csv
+import json
+import time
+import zipfile
+from contextlib import nullcontext
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+# Configuration
+MARKET_DATA_FILE = Path("data/raw/complete_market_data.json")
+STORE_FILE = Path("data/processed/trade_store.npz")
+COUNTRY_FILE = Path("data/reference/countries.csv")
+
+PALESTINE = "PSE"
+PALESTINE_CODE = 275          # UN M49 / Comtrade reporter code
+WORLD = "World"
+UNKNOWN_COUNTRY = "Unknown"
+UNKNOWN_HS = "999999"
+FLOWS = ["export", "import"]
+# Where a row's figure comes from: the reporter's own declaration, a partner's declaration
+# turned round to Palestine's side (mirror), or the scanner's estimates
+BASES = ["reported", "mirror", "scanned"]
+STORE_VERSION = 2
+
+# Every categorical column is stored as int32 codes into a per-column label list
+CATEGORICAL_COLUMNS = ["reporter", "partner", "product", "hs_code", "flow", "year", "basis"]
+MEASURES = ["value_usd", "quantity_kg"]
+DEFAULTS = {"reporter": PALESTINE, "partner": WORLD, "product": "", "hs_code": UNKNOWN_HS, "flow": "export",
+            "basis": "reported"}
+
+# Bulk dump layouts: store column -> source header. PCBS tables are Palestine's own
+# declarations, so the reporter is implicit; *_code columns are numeric country codes.
+DUMP_LAYOUTS = {
+    "comtrade": {"year": "refYear", "flow": "flowCode", "reporter_code": "reporterCode", "reporter": "reporterISO",
+                 "partner_code": "partnerCode", "partner": "partnerISO", "hs_code": "cmdCode",
+                 "product": "cmdDesc", "value_usd": "primaryValue", "quantity_kg": "netWgt",
+                 "is_leaf": "isLeaf", "aggr_level": "aggrLevel", "customs_code": "customsCode",
+                 "mot_code": "motCode", "partner2_code": "partner2Code"},
+    "comtrade_legacy": {"year": "Year", "flow": "Trade Flow", "reporter_code": "Reporter Code",
+                        "reporter": "Reporter ISO", "partner_code": "Partner Code", "partner": "Partner ISO",
+                        "hs_code": "Commodity Code", "product": "Commodity", "value_usd": "Trade Value (US$)",
+                        "quantity_kg": "Netweight (kg)"},
+    "pcbs": {"year": "Year", "flow": "Flow", "partner": "Country", "hs_code": "HS Code", "product": "Description",
+             "value_usd": "Value (USD)", "quantity_kg": "Net Weight (kg)"}
+}
+REQUIRED_DUMP_COLUMNS = ["year", "flow", "hs_code", "value_usd"]
+DUMP_DTYPES = {"year": "float64", "reporter_code": "float64", "partner_code": "float64", "value_usd": "float64",
+               "quantity_kg": "float64", "aggr_level": "float64", "mot_code": "float64",
+               "partner2_code": "float64"}         # everything else is read as category
+FLOW_NAMES = {"x": "export", "1": "export", "exports": "export", "m": "import", "2": "import", "imports": "import",
+              "rx": "re-export", "3": "re-export", "re-exports": "re-export", "rm": "re-import", "4": "re-import",
+              "re-imports": "re-import"}
+# A partner's flow seen from Palestine: goods the partner (re-)imports from Palestine are its exports
+MIRROR_FLOWS = {"export": "import", "re-export": "import", "import": "export", "re-import": "export"}
+# Comtrade aggregate rows, dropped on load so totals are not counted twice
+AGGREGATE_HS_CODES = {"TOTAL"}
+WORLD_PARTNERS = {"W00", "WLD", "World", "WORLD"}
+WORLD_CODE = 0
+# Comtrade splits each flow by customs procedure, mode of transport and second partner; only
+# the all-inclusive breakdown is kept, the others are parts of it
+TOTAL_BREAKDOWN = {"customs_code": "C00", "mot_code": 0, "partner2_code": 0}
+LEAF_VALUES = {"true", "1", "1.0", "yes"}
+BULK_CHUNK_ROWS = 200000
+
+# Deduplication key: label codes packed into one uint64 (bits per column, most significant first)
+KEY_BITS = {"reporter": 12, "partner": 12, "hs_code": 24, "year": 8, "flow": 4, "basis": 4}
+
+# Dense value_usd sums over Palestine's rows (reporter PSE), kept up to date on every append,
+# axes in label-code order; other reporters are answered by scanning the columns
+CUBES = {
+    "product": ["product", "basis", "year", "flow"],
+    "market": ["partner", "basis", "year", "flow"],
+    "hs_code": ["hs_code", "basis", "year", "flow"],
+    "year": ["basis", "year", "flow"]
+}
+
+
+def hs_label(value):
+    """HS code in the store's one format: digits only, zero-padded to an even length ('1509.10' -> '150910')"""
+    code = str(value).replace(".", "").replace(" ", "").strip()
+    return "0" + code if code.isdigit() and len(code) % 2 else code
+
+
+class TradeStore:
+    """Append-only columnar trade table with per-dimension basis × year × flow cubes for Palestine"""
+
+    def __init__(self):
+        self.labels = {column: [] for column in CATEGORICAL_COLUMNS}
+        self.lookup = {column: {} for column in CATEGORICAL_COLUMNS}
+        self.codes = {column: np.zeros(0, dtype=np.int32) for column in CATEGORICAL_COLUMNS}
+        self.measures = {name: np.zeros(0) for name in MEASURES}
+        self.cubes = {name: np.zeros((0,) * len(axes)) for name, axes in CUBES.items()}
+        self._sorted_keys = None
+
+    def __len__(self):
+        return len(self.codes["flow"])
+
+    @staticmethod
+    def _label(column, value):
+        if column == "year":
+            return int(value)
+        return hs_label(value) if column == "hs_code" else str(value)
+
+    def encode(self, column, values):
+        """Codes for raw values, extending the column's label dictionary with unseen ones.
+
+        Categorical input (anything with .categories and .codes, e.g. a pandas Categorical)
+        only has its categories looked up. HS codes are normalized with hs_label.
+        """
+        values = getattr(values, "cat", values)
+        if hasattr(values, "categories") and hasattr(values, "codes"):
+            unique, inverse = np.asarray(values.categories), np.asarray(values.codes)
+            if (inverse < 0).any():
+                raise ValueError(f"Missing values in categorical column: {column}")
+        else:
+            unique, inverse = np.unique(np.asarray(values), return_inverse=True)
+        unique = unique.astype(np.int64 if column == "year" else str).tolist()
+        if column == "hs_code":
+            unique = [hs_label(label) for label in unique]
+        lookup, labels = self.lookup[column], self.labels[column]
+        mapping = np.array([lookup.setdefault(label, len(lookup)) for label in unique], dtype=np.int32)
+        labels.extend(list(lookup)[len(labels):])
+        return mapping[inverse.ravel()] if len(inverse) else np.zeros(0, dtype=np.int32)
+
+    def append(self, columns, dedupe=False):
+        """Append a batch given as {column: values}; year and value_usd are required.
+
+        With dedupe, rows whose (reporter, partner, hs_code, year, flow, basis) is already stored,
+        or repeated earlier in the batch, are dropped; returns the number of rows added.
+        """
+        n = len(columns["value_usd"])
+        codes = {column: self.encode(column, columns[column] if column in columns else [DEFAULTS[column]] * n)
+                 for column in CATEGORICAL_COLUMNS}
+        measures = {name: np.asarray(columns[name] if name in columns else np.full(n, np.nan), dtype=np.float64)
+                    for name in MEASURES}
+        return self._append_codes(codes, measures, dedupe)
+
+    def append_records(self, records):
+        """Append trade dicts carrying the CATEGORICAL_COLUMNS and MEASURES keys"""
+        records = list(records)
+        columns = {column: [record.get(column, DEFAULTS.get(column)) for record in records]
+                   for column in CATEGORICAL_COLUMNS}
+        for name in MEASURES:
+            columns[name] = [record.get(name, np.nan) for record in records]
+        return self.append(columns)
+
+    def row_keys(self, codes):
+        """uint64 deduplication key per row from its KEY_BITS columns"""
+        keys = np.zeros(len(codes["flow"]), dtype=np.uint64)
+        for column, bits in KEY_BITS.items():
+            if len(self.labels[column]) > 2 ** bits:
+                raise ValueError(f"Too many {column} labels for the deduplication key")
+            keys = (keys << np.uint64(bits)) | codes[column].astype(np.uint64)
+        return keys
+
+    def _new_rows(self, codes):
+        """Positions of batch rows whose key is neither stored nor repeated earlier in the batch"""
+        if self._sorted_keys is None:
+            self._sorted_keys = np.sort(self.row_keys(self.codes))
+        keys = self.row_keys(codes)
+        _, first = np.unique(keys, return_index=True)
+        first = np.sort(first)
+        position = np.searchsorted(self._sorted_keys, keys[first])
+        seen = position < len(self._sorted_keys)
+        seen[seen] = self._sorted_keys[position[seen]] == keys[first][seen]
+        fresh = first[~seen]
+        self._sorted_keys = np.sort(np.concatenate([self._sorted_keys, keys[fresh]]), kind="stable")
+        return fresh
+
+    def _append_codes(self, codes, measures, dedupe=False):
+        if dedupe:
+            keep = self._new_rows(codes)
+            codes = {column: values[keep] for column, values in codes.items()}
+            measures = {name: values[keep] for name, values in measures.items()}
+        else:
+            self._sorted_keys = None
+        for column in CATEGORICAL_COLUMNS:
+            self.codes[column] = np.concatenate([self.codes[column], codes[column]])
+        for name in MEASURES:
+            self.measures[name] = np.concatenate([self.measures[name], measures[name]])
+        self._add_to_cubes(codes, measures["value_usd"], 1)
+        return len(measures["value_usd"])
+
+    def _add_to_cubes(self, codes, values, sign):
+        palestine = codes["reporter"] == self.lookup["reporter"].get(PALESTINE, -1)
+        values = np.nan_to_num(values[palestine])
+        for name, axes in CUBES.items():
+            shape = tuple(len(self.labels[axis]) for axis in axes)
+            cube = self.cubes[name]
+            if cube.shape != shape:
+                cube = self.cubes[name] = np.pad(cube, [(0, new - old) for new, old in zip(shape, cube.shape)])
+            if len(values):
+                flat = np.ravel_multi_index([codes[axis][palestine] for axis in axes], shape)
+                cube += sign * np.bincount(flat, weights=values, minlength=cube.size).reshape(shape)
+
+    def _code(self, column, value):
+        try:
+            return self.lookup[column].get(self._label(column, value))
+        except (TypeError, ValueError):
+            return None
+
+    def years(self):
+        """Year labels in chronological order"""
+        return sorted(self.labels["year"])
+
+    def series(self, flow="export", **filters):
+        """Yearly value_usd totals, oldest first, optionally filtered on partner/product/hs_code.
+
+        Covers Palestine's reported trade unless reporter or basis say otherwise. Palestine with
+        at most one cube dimension is a cube read; other combinations scan the columns.
+        """
+        unknown = set(filters) - set(CATEGORICAL_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown trade columns: {', '.join(sorted(unknown))}")
+        filters = {"reporter": PALESTINE, "basis": "reported", **filters}
+        order = np.argsort(self.labels["year"]).astype(np.int64)
+        years = [self.labels["year"][i] for i in order]
+        flow_code = self._code("flow", flow)
+        codes = {column: self._code(column, value) for column, value in filters.items()}
+        if flow_code is None or None in codes.values():
+            return {"years": years, "value_usd": [0.0] * len(years)}
+
+        cube_by_axis = {axes[0]: name for name, axes in CUBES.items() if name != "year"}
+        dims = {column: code for column, code in codes.items() if column not in ("reporter", "basis")}
+        basis = codes["basis"]
+        if str(filters["reporter"]) == PALESTINE and not dims:
+            totals = self.cubes["year"][basis, :, flow_code]
+        elif str(filters["reporter"]) == PALESTINE and len(dims) == 1 and next(iter(dims)) in cube_by_axis:
+            column, code = next(iter(dims.items()))
+            totals = self.cubes[cube_by_axis[column]][code, basis, :, flow_code]
+        else:
+            mask = self.codes["flow"] == flow_code
+            for column, code in codes.items():
+                mask &= self.codes[column] == code
+            totals = np.bincount(self.codes["year"][mask], weights=np.nan_to_num(self.measures["value_usd"][mask]),
+                                 minlength=len(years))
+        return {"years": years, "value_usd": totals[order].tolist()}
+
+    def top(self, by="product", year=None, flow="export", n=10, basis="reported"):
+        """Largest (label, value_usd) pairs of a Palestine cube, for one year or summed over all years"""
+        if by not in CUBES or by == "year":
+            raise ValueError(f"No cube for: {by}")
+        flow_code = self._code("flow", flow)
+        basis_code = self._code("basis", basis)
+        year_code = self._code("year", year) if year is not None else None
+        if flow_code is None or basis_code is None or (year is not None and year_code is None):
+            return []
+        cube = self.cubes[by][:, basis_code, :, flow_code]
+        totals = cube[:, year_code] if year_code is not None else cube.sum(axis=1)
+        ranked = np.argsort(-totals, kind="stable")[:n]
+        return [(self.labels[CUBES[by][0]][i], float(totals[i])) for i in ranked if totals[i] != 0]
+
+    def save(self, path=STORE_FILE):
+        """Columnar .npz: code and measure columns, cubes and the label dictionaries"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        arrays = {f"code_{column}": codes for column, codes in self.codes.items()}
+        arrays.update({f"measure_{name}": values for name, values in self.measures.items()})
+        arrays.update({f"cube_{name}": cube for name, cube in self.cubes.items()})
+        arrays["labels"] = np.array(json.dumps(self.labels, ensure_ascii=False))
+        arrays["version"] = np.array(STORE_VERSION)
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path=STORE_FILE):
+        store = cls()
+        with np.load(path) as data:
+            if "version" not in data.files or int(data["version"]) != STORE_VERSION:
+                raise ValueError(f"Trade store {path} has an older layout; rebuild it")
+            store.labels = json.loads(str(data["labels"]))
+            store.codes = {column: data[f"code_{column}"] for column in CATEGORICAL_COLUMNS}
+            store.measures = {name: data[f"measure_{name}"] for name in MEASURES}
+            store.cubes = {name: data[f"cube_{name}"] for name in CUBES}
+        store.lookup = {column: {label: code for code, label in enumerate(labels)}
+                        for column, labels in store.labels.items()}
+        return store
+
+
+def market_data_records(trade_records, classifier=None):
+    """Store records from scanned trade rows: one export and one import flow per product-year.
+
+    These are the scanner's estimates, not declarations, so they carry basis "scanned".
+    """
+    if classifier is None:
+        from hs_codes import get_classifier
+        classifier = get_classifier()
+    records = []
+    for record in trade_records:
+        base = {"reporter": PALESTINE, "partner": WORLD, "basis": "scanned", "product": record.get("product", ""),
+                "hs_code": classifier.best_code(record.get("product", "")), "year": int(record.get("year") or 0)}
+        for flow in FLOWS:
+            value = record.get(f"{flow}_value_usd")
+            if value not in (None, ""):
+                records.append({**base, "flow": flow, "value_usd": float(value)})
+    return records
+
+
+def load_trade_store(path=STORE_FILE):
+    """Saved store, or an empty one when none exists yet (scanned rows only via build_scanned_store)"""
+    return TradeStore.load(path) if Path(path).exists() else TradeStore()
+
+
+def build_scanned_store(market_data_file=MARKET_DATA_FILE):
+    """Store of the scanner's trade rows alone, kept apart from stores fed with real dumps"""
+    store = TradeStore()
+    with open(market_data_file, "r", encoding="utf-8") as f:
+        store.append_records(market_data_records(json.load(f).get("trade", [])))
+    return store
+
+
+def detect_layout(header):
+    """Name of the first DUMP_LAYOUTS entry whose required columns are all in the header"""
+    for name, layout in DUMP_LAYOUTS.items():
+        if all(layout[column] in header for column in REQUIRED_DUMP_COLUMNS):
+            return name
+    raise ValueError(f"Unrecognized trade dump header: {', '.join(header[:12])}")
+
+
+def _dump_members(path):
+    """(name, opener) per CSV: the dump itself (pandas infers compression) or each .csv/.txt zip member"""
+    path = Path(path)
+    if path.suffix.lower() != ".zip":
+        yield path.name, lambda: nullcontext(path)
+        return
+    with zipfile.ZipFile(path) as archive:
+        for member in archive.namelist():
+            if member.lower().endswith((".csv", ".txt")):
+                yield member, lambda member=member: archive.open(member)
+
+
+def _country_key(name):
+    return " ".join(str(name).replace(".", " ").replace(",", " ").lower().split())
+
+
+@lru_cache(maxsize=None)
+def country_lookup(path=COUNTRY_FILE):
+    """(names, codes): normalized ISO3/name/alias -> ISO3, and Comtrade numeric code -> ISO3"""
+    names, codes = {}, {}
+    with open(path, "r", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            for name in [row["iso3"], row["name"], *(row.get("aliases") or "").split(";")]:
+                if name.strip():
+                    names.setdefault(_country_key(name), row["iso3"])
+            if row.get("comtrade_code"):
+                codes[int(row["comtrade_code"])] = row["iso3"]
+    return names, codes
+
+
+def _country_labels(chunk, column, default):
+    """Reporter/partner ISO3 labels: ISO3 or a country name/alias where the dump has one (PCBS
+    'Jordan' -> JOR), else the numeric code (275 -> PSE); unknown names and codes are kept as given"""
+    import pandas as pd
+
+    names, codes = country_lookup()
+    labels = np.full(len(chunk), None, dtype=object)
+    if column in chunk:
+        values = chunk[column]
+        if values.dtype == "category":
+            mapped = [names.get(_country_key(value), value) for value in values.cat.categories]
+            labels = np.array(mapped + [None], dtype=object)[values.cat.codes.to_numpy()]
+        else:
+            labels = values.to_numpy(dtype=object).copy()
+    if f"{column}_code" in chunk:
+        numbers = chunk[f"{column}_code"].to_numpy(dtype=np.float64, na_value=np.nan)
+        missing = pd.isna(labels) & ~np.isnan(numbers)
+        labels[missing] = [codes.get(int(number), str(int(number))) for number in numbers[missing]]
+    labels[pd.isna(labels)] = default
+    return labels
+
+
+def _flow_labels(flows):
+    """Dump flow values normalized to export/import/re-export/re-import"""
+    categories = [FLOW_NAMES.get(str(flow).strip().lower(), str(flow).strip().lower()) for flow in flows.cat.categories]
+    return np.asarray(categories, dtype=object)[flows.cat.codes.to_numpy()]
+
+
+def _aggregate_rows(chunk):
+    """Mask of Comtrade total rows: commodity TOTAL, or partner World (W00 / code 0)"""
+    hs_codes = chunk["hs_code"].cat.categories.astype(str).str.strip().str.upper()
+    rows = np.asarray(hs_codes.isin(AGGREGATE_HS_CODES))[chunk["hs_code"].cat.codes.to_numpy()]
+    if "partner" in chunk:
+        rows |= chunk["partner"].isin(WORLD_PARTNERS).to_numpy(dtype=bool)
+    if "partner_code" in chunk:
+        rows |= (chunk["partner_code"] == WORLD_CODE).to_numpy(dtype=bool)
+    return rows
+
+
+def _breakdown_rows(chunk):
+    """Mask of rows for one customs procedure, transport mode or second partner rather than the total"""
+    rows = np.zeros(len(chunk), dtype=bool)
+    for column, total in TOTAL_BREAKDOWN.items():
+        if column not in chunk:
+            continue
+        values = chunk[column]
+        if values.dtype == "category":
+            other = ~np.asarray(values.cat.categories.astype(str).str.strip().str.upper() == total)
+            rows |= np.append(other, False)[values.cat.codes.to_numpy()]      # code -1 (missing) -> kept
+        else:
+            rows |= (values.notna() & (values != total)).to_numpy(dtype=bool)
+    return rows
+
+
+def _hs_levels(chunk):
+    """(chapter, level) per row: the code's first two digits, and aggrLevel or else its digit count"""
+    labels = [hs_label(code) for code in chunk["hs_code"].cat.categories]
+    codes = chunk["hs_code"].cat.codes.to_numpy()
+    chapters = np.array([label[:2] for label in labels], dtype=object)[codes]
+    levels = np.array([len(label) for label in labels], dtype=np.float64)[codes]
+    if "aggr_level" in chunk:
+        declared = chunk["aggr_level"].to_numpy(dtype=np.float64, na_value=np.nan)
+        levels = np.where(np.isnan(declared), levels, declared)
+    return chapters, levels
+
+
+def _deepest_levels(opener, columns, chunksize):
+    """Deepest HS level per chapter over a whole dump, read from its commodity columns alone"""
+    import pandas as pd
+
+    columns = {column: source for column, source in columns.items() if column in ("hs_code", "aggr_level")}
+    deepest = {}
+    with opener() as source:
+        reader = pd.read_csv(source, usecols=list(columns.values()),
+                             dtype={source: DUMP_DTYPES.get(column, "category") for column, source in columns.items()},
+                             chunksize=chunksize, encoding="utf-8-sig", skipinitialspace=True, low_memory=False)
+        for chunk in reader:
+            chunk = chunk.rename(columns={source: column for column, source in columns.items()})
+            chunk = chunk[chunk["hs_code"].notna()]
+            chapters, levels = _hs_levels(chunk)
+            for chapter, level in pd.Series(levels).groupby(chapters).max().items():
+                deepest[chapter] = max(level, deepest.get(chapter, level))
+    return deepest
+
+
+def _other_level_rows(chunk, deepest):
+    """Mask of rows above the dump's single HS level: not isLeaf, or coarser than their chapter's deepest code"""
+    if "is_leaf" in chunk:
+        leaf = [str(value).strip().lower() in LEAF_VALUES for value in chunk["is_leaf"].cat.categories]
+        return ~np.append(np.array(leaf, dtype=bool), False)[chunk["is_leaf"].cat.codes.to_numpy()]
+    _, levels = _hs_levels(chunk)
+    floor = [deepest.get(hs_label(code)[:2], 0) for code in chunk["hs_code"].cat.categories]
+    return levels < np.array(floor, dtype=np.float64)[chunk["hs_code"].cat.codes.to_numpy()]
+
+
+def load_bulk_dump(path, store=None, layout=None, chunksize=BULK_CHUNK_ROWS, palestine_only=True):
+    """Stream a bulk Comtrade/PCBS CSV (plain, compressed or zipped) into a TradeStore.
+
+    Only the layout's columns are read, in chunks of `chunksize` rows with explicit dtypes and
+    categoricals, so memory stays bounded by the chunk plus the (Palestine-only) store. TOTAL and
+    World aggregate rows are dropped, as are customs/transport/second-partner breakdowns other than
+    the total and commodity rows above the dump's single HS level (isLeaf where the dump has it,
+    else the deepest code per chapter, found in a first pass over the commodity column). Rows are
+    filtered to Palestine as reporter or partner, and rows with Palestine only as partner are turned
+    round into Palestine's mirror flows (reporter and partner swapped, flow inverted, basis
+    "mirror"). Rows are appended with deduplication on
+    (reporter, partner, hs_code, year, flow, basis), with countries as ISO3 (names mapped through
+    COUNTRY_FILE) so a flow in both a PCBS and a Comtrade dump is only counted once.
+    """
+    import pandas as pd
+
+    store = store if store is not None else TradeStore()
+    if "scanned" in store.lookup["basis"]:
+        raise ValueError("Store holds scanned estimates; load dumps into a separate store")
+    stats = {"files": 0, "chunks": 0, "rows": 0, "aggregates": 0, "breakdowns": 0, "levels": 0, "palestine": 0,
+             "mirror": 0, "added": 0, "duplicates": 0}
+    for _, opener in _dump_members(path):
+        with opener() as source:
+            header = list(pd.read_csv(source, nrows=0, encoding="utf-8-sig", skipinitialspace=True).columns)
+        name = layout or detect_layout(header)
+        columns = {column: source for column, source in DUMP_LAYOUTS[name].items() if source in header}
+        dtypes = {source: DUMP_DTYPES.get(column, "category") for column, source in columns.items()}
+        deepest = _deepest_levels(opener, columns, chunksize) if "is_leaf" not in columns else None
+        stats["files"] += 1
+
+        with opener() as source:
+            reader = pd.read_csv(source, usecols=list(columns.values()), dtype=dtypes, chunksize=chunksize,
+                                 encoding="utf-8-sig", skipinitialspace=True, low_memory=False)
+            for chunk in reader:
+                chunk = chunk.rename(columns={source: column for column, source in columns.items()})
+                stats["chunks"] += 1
+                stats["rows"] += len(chunk)
+                chunk = chunk[chunk["year"].notna() & chunk["hs_code"].notna()]
+                aggregate = _aggregate_rows(chunk)
+                stats["aggregates"] += int(aggregate.sum())
+                chunk = chunk[~aggregate]
+                breakdown = _breakdown_rows(chunk)
+                stats["breakdowns"] += int(breakdown.sum())
+                chunk = chunk[~breakdown]
+                other_level = _other_level_rows(chunk, deepest)
+                stats["levels"] += int(other_level.sum())
+                chunk = chunk[~other_level]
+                if "reporter" not in chunk and "reporter_code" not in chunk:
+                    chunk = chunk.assign(reporter=PALESTINE)
+                if palestine_only:
+                    palestine = np.zeros(len(chunk), dtype=bool)
+                    for column in ("reporter", "partner"):
+                        if column in chunk:
+                            palestine |= (chunk[column] == PALESTINE).to_numpy(dtype=bool)
+                        if f"{column}_code" in chunk:
+                            matches = chunk[f"{column}_code"] == PALESTINE_CODE
+                            palestine |= matches.to_numpy(dtype=bool, na_value=False)
+                    chunk = chunk[palestine]
+                if not len(chunk):
+                    continue
+                stats["palestine"] += len(chunk)
+
+                reporter = _country_labels(chunk, "reporter", UNKNOWN_COUNTRY)
+                partner = _country_labels(chunk, "partner", UNKNOWN_COUNTRY)
+                flow = _flow_labels(chunk["flow"])
+                mirror = (reporter != PALESTINE) & (partner == PALESTINE)
+                if mirror.any():
+                    reporter[mirror], partner[mirror] = PALESTINE, reporter[mirror]
+                    flipped = flow.copy()
+                    for source, target in MIRROR_FLOWS.items():
+                        flipped[mirror & (flow == source)] = target
+                    flow = flipped
+                    stats["mirror"] += int(mirror.sum())
+
+                hs_code = chunk["hs_code"].cat.remove_unused_categories()
+                batch = {
+                    "reporter": reporter,
+                    "partner": partner,
+                    "hs_code": hs_code,
+                    "product": (chunk["product"].astype(object).fillna(hs_code.astype(object)).to_numpy()
+                                if "product" in chunk else hs_code),
+                    "flow": flow,
+                    "year": chunk["year"].to_numpy(dtype=np.int64),
+                    "basis": np.where(mirror, "mirror", "reported"),
+                    "value_usd": chunk["value_usd"].to_numpy(dtype=np.float64, na_value=np.nan)
+                }
+                if "quantity_kg" in chunk:
+                    batch["quantity_kg"] = chunk["quantity_kg"].to_numpy(dtype=np.float64, na_value=np.nan)
+                added = store.append(batch, dedupe=True)
+                stats["added"] += added
+                stats["duplicates"] += len(chunk) - added
+    return store, stats
+
+
+def synthetic_columns(n_records, seed=0, products=5000, partners=200, first_year=1995, years=30):
+    """Random bilateral HS6-level flows for benchmarking"""
+    rng = np.random.default_rng(seed)
+    product = rng.integers(0, products, n_records)
+    return {
+        "partner": np.char.add("P", rng.integers(0, partners, n_records).astype(str)),
+        "product": np.char.add("HS", product.astype(str)),
+        "hs_code": product.astype(str),
+        "flow": np.where(rng.random(n_records) < 0.5, "export", "import"),
+        "year": first_year + rng.integers(0, years, n_records),
+        "value_usd": rng.lognormal(10, 2, n_records)
+    }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Columnar trade store: build, query series and rankings")
+    parser.add_argument("--build", action="store_true",
+                        help="Rebuild the store from the scanned trade rows (estimates; not combinable with --load)")
+    parser.add_argument("--series", nargs="*", metavar="COLUMN=VALUE",
+                        help="Yearly totals, e.g. product='Olive Oil' or partner=EU")
+    parser.add_argument("--top", choices=[name for name in CUBES if name != "year"])
+    parser.add_argument("--year", type=int, default=None)
+    parser.add_argument("--flow", choices=FLOWS, default="export")
+    parser.add_argument("--basis", choices=BASES, default="reported",
+                        help="Palestine's declarations, partners' mirror declarations or scanner estimates")
+    parser.add_argument("--load", nargs="+", metavar="DUMP",
+                        help="Append bulk Comtrade/PCBS dumps (.csv, .csv.gz or .zip) to the store")
+    parser.add_argument("--layout", choices=list(DUMP_LAYOUTS), default=None, help="Dump layout (default: detect)")
+    parser.add_argument("--chunksize", type=int, default=BULK_CHUNK_ROWS)
+    parser.add_argument("--benchmark", type=int, metavar="RECORDS", help="Time ingest and queries on synthetic flows")
+    parser.add_argument("--store", default=str(STORE_FILE))
+    args = parser.parse_args()
+    if args.build and args.load:
+        parser.error("--build makes a store of scanned estimates; load dumps into a separate --store")
+
+    print("="*60)
+    print("📦 TRADE STORE")
+    print("="*60)
+
+    if args.benchmark:
+        columns = synthetic_columns(args.benchmark)
+        store = TradeStore()
+        start = time.perf_counter()
+        store.append(columns)
+        print(f"\n⏱️  {args.benchmark:,} records encoded and cubed in {time.perf_counter() - start:.3f}s")
+        start = time.perf_counter()
+        for product in range(1000):
+            store.series(product=f"HS{product}")
+        print(f"⏱️  1,000 product series in {time.perf_counter() - start:.3f}s")
+        return
+
+    if args.build:
+        store = build_scanned_store()
+        store.save(args.store)
+        print(f"\n✅ {len(store)} trade records, {len(store.labels['product'])} products, "
+              f"years {', '.join(map(str, store.years()))}")
+        print(f"💾 Saved to: {args.store}")
+    else:
+        store = load_trade_store(args.store)
+
+    if args.load:
+        for dump in args.load:
+            start = time.perf_counter()
+            store, stats = load_bulk_dump(dump, store, args.layout, args.chunksize)
+            print(f"\n📥 {dump}: {stats['rows']:,} rows in {stats['chunks']} chunks, "
+                  f"{stats['aggregates']:,} aggregates, {stats['breakdowns']:,} breakdowns and "
+                  f"{stats['levels']:,} coarser HS rows dropped, {stats['palestine']:,} Palestine "
+                  f"({stats['mirror']:,} mirror), {stats['added']:,} added, "
+                  f"{stats['duplicates']:,} duplicates ({time.perf_counter() - start:.1f}s)")
+        store.save(args.store)
+        print(f"💾 Saved to: {args.store}")
+
+    if args.series is not None:
+        filters = {"basis": args.basis, **dict(spec.split("=", 1) for spec in args.series)}
+        series = store.series(args.flow, **filters)
+        print(f"\n📈 {args.flow} {filters or 'all trade'}:")
+        for year, value in zip(series["years"], series["value_usd"]):
+            print(f"   • {year}: ${value:,.0f}")
+    if args.top:
+        print(f"\n🏆 Top {args.flow} by {args.top}" + (f" in {args.year}" if args.year else "") + ":")
+        for label, value in store.top(args.top, args.year, args.flow, basis=args.basis):
+            print(f"   • {label}: ${value:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
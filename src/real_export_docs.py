@@ -2,58 +2,44 @@
 Generates ACTUAL export documents Palestinian businesses need
 """
 
-class ExportDocumentGenerator:
-    """Generates REAL export documentation"""
-    
-    def generate_export_package(self, business_info, product_info):
-        """Generate complete export documentation package"""
-        
-        docs = {
-            "commercial_invoice": self._generate_commercial_invoice(business_info, product_info),
-            "certificate_of_origin": self._generate_certificate_of_origin(business_info),
-            "packing_list": self._generate_packing_list(product_info),
-            "export_declaration": self._generate_export_declaration(business_info),
-            "required_certifications": self._get_required_certs(product_info["destination"]),
-            "shipping_instructions": self._get_shipping_instructions(product_info["destination"])
-        }
-        
-        return docs
-    
-    def _generate_commercial_invoice(self, business, product):
-        """Generate commercial invoice"""
-        return f"""
+from datetime import datetime
+from string import Template
+
+from certification_rules import get_engine, product_flags
+from hs_codes import UNKNOWN_CODE, get_classifier
+
+# Document templates - compiled once, shared by single and batch generation
+COMMERCIAL_INVOICE = Template("""
 COMMERCIAL INVOICE
 ==================
-Exporter: {business['name']}
-Address: {business['location']}
-Tax ID: {business.get('tax_id', 'PAL-{business["id"]}')}
+Exporter: $exporter
+Address: $address
+Tax ID: $tax_id
 
 Consignee: [Buyer's Name]
-Destination: {product.get('destination', 'To be specified')}
+Destination: $destination
 
 PRODUCT DESCRIPTION:
-- {product['name']}
-- Quantity: {product['quantity']} {product['unit']}
-- Unit Price: ${product['unit_price']}
-- Total Value: ${product['total_value']}
+- $product_name
+- Quantity: $quantity $unit
+- Unit Price: $$$unit_price
+- Total Value: $$$total_value
 
 ORIGIN: Made in Palestine
-HS Code: {self._get_hs_code(product['type'])}
-Payment Terms: {product.get('payment_terms', '30% advance, 70% against documents')}
+HS Code: $hs_code
+Payment Terms: $payment_terms
 
 Certified that this invoice shows the actual price of the goods.
-        
+
 Signature: ___________________
-Date: {datetime.now().strftime('%Y-%m-%d')}
-"""
-    
-    def _generate_certificate_of_origin(self, business):
-        """Generate Palestine-specific certificate of origin"""
-        return f"""
+Date: $date
+""")
+
+CERTIFICATE_OF_ORIGIN = Template("""
 CERTIFICATE OF ORIGIN
 =====================
-1. Exporter: {business['name']}
-   Address: {business['location']}
+1. Exporter: $exporter
+   Address: $address
    Country: State of Palestine
 
 2. Consignee: [Buyer's Information]
@@ -66,30 +52,140 @@ CERTIFICATE OF ORIGIN
 
    I, THE UNDERSIGNED, CERTIFY THAT THE GOODS MENTIONED
    IN THIS CERTIFICATE ORIGINATE IN THE STATE OF PALESTINE
-   
-   Place: {business['location']}
-   Date: {datetime.now().strftime('%Y-%m-%d')}
+
+   Place: $address
+   Date: $date
    Stamp & Signature: _________________________
-   
+
    (Issued by Palestinian Chamber of Commerce)
-"""
-    
-    def _get_required_certs(self, destination):
-        """Get certifications needed for specific destinations"""
-        requirements = {
-            "EU": ["Certificate of Origin", "Phytosanitary Certificate (for agriculture)", 
-                   "Organic Certificate (if organic)", "Fair Trade Certificate (if fair trade)"],
-            "USA": ["FDA Registration", "Certificate of Origin", 
-                    "Commercial Invoice", "Packing List"],
-            "Middle East": ["Halal Certificate", "Certificate of Origin", 
-                           "Arabic Labeling", "GCC Conformity"],
-            "Japan": ["JAS Organic Certificate (if organic)", "Certificate of Origin",
-                     "Phytosanitary Certificate", "Commercial Invoice"]
+""")
+
+PACKING_LIST = Template("""
+PACKING LIST
+============
+Product: $product_name
+Quantity: $quantity $unit
+Net Weight: $net_weight
+Destination: $destination
+
+Marks & Numbers: [Carton markings]
+Packages: [Number of cartons]
+
+Date: $date
+""")
+
+EXPORT_DECLARATION = Template("""
+EXPORT DECLARATION
+==================
+Exporter: $exporter
+Address: $address
+Tax ID: $tax_id
+Country of Export: State of Palestine
+
+Goods declared for export as per attached commercial invoice.
+Exit point: [Allenby/King Hussein Bridge or Ashdod/Haifa port]
+
+Declarant Signature: ___________________
+Date: $date
+""")
+
+DOCUMENT_TEMPLATES = {
+    "commercial_invoice": COMMERCIAL_INVOICE,
+    "certificate_of_origin": CERTIFICATE_OF_ORIGIN,
+    "packing_list": PACKING_LIST,
+    "export_declaration": EXPORT_DECLARATION
+}
+
+class ExportDocumentGenerator:
+    """Generates REAL export documentation"""
+
+    def __init__(self, issue_date=None):
+        self.issue_date = issue_date
+
+    def generate_export_package(self, business_info, product_info):
+        """Generate complete export documentation package"""
+
+        docs = {
+            "commercial_invoice": self._generate_commercial_invoice(business_info, product_info),
+            "certificate_of_origin": self._generate_certificate_of_origin(business_info),
+            "packing_list": self._generate_packing_list(product_info),
+            "export_declaration": self._generate_export_declaration(business_info),
+            "required_certifications": self._get_required_certs(product_info["destination"], product_info),
+            "shipping_instructions": self._get_shipping_instructions(product_info["destination"])
         }
-        
-        return requirements.get(destination, ["Certificate of Origin", "Commercial Invoice"])
-    
-    def _get_hs_code(self, product_type):
+
+        return docs
+
+    def _date(self):
+        """Issue date printed on documents"""
+        return self.issue_date or datetime.now().strftime('%Y-%m-%d')
+
+    def _business_fields(self, business):
+        """Template fields describing the exporter"""
+        return {
+            "exporter": business['name'],
+            "address": business['location'],
+            "tax_id": business.get('tax_id') or f"PAL-{business.get('id', '')}",
+            "date": self._date()
+        }
+
+    def _generate_commercial_invoice(self, business, product):
+        """Generate commercial invoice"""
+        fields = self._business_fields(business)
+        fields.update({
+            "destination": product.get('destination', 'To be specified'),
+            "product_name": product['name'],
+            "quantity": product['quantity'],
+            "unit": product['unit'],
+            "unit_price": product['unit_price'],
+            "total_value": product['total_value'],
+            "hs_code": self._get_hs_code(product['type'], product.get('name')),
+            "payment_terms": product.get('payment_terms', '30% advance, 70% against documents')
+        })
+        return COMMERCIAL_INVOICE.substitute(fields)
+
+    def _generate_certificate_of_origin(self, business):
+        """Generate Palestine-specific certificate of origin"""
+        return CERTIFICATE_OF_ORIGIN.substitute(self._business_fields(business))
+
+    def _generate_packing_list(self, product):
+        """Generate packing list"""
+        weight = product.get('weight_kg')
+        return PACKING_LIST.substitute({
+            "product_name": product['name'],
+            "quantity": product['quantity'],
+            "unit": product['unit'],
+            "net_weight": f"{weight * float(product['quantity']):.2f} kg" if weight else "[To be weighed]",
+            "destination": product.get('destination', 'To be specified'),
+            "date": self._date()
+        })
+
+    def _generate_export_declaration(self, business):
+        """Generate export declaration"""
+        return EXPORT_DECLARATION.substitute(self._business_fields(business))
+
+    def _get_required_certs(self, destination, product=None):
+        """Get certifications needed for a product shipped to a specific destination"""
+        flags = 0
+        hs_code = None
+        if product:
+            hs_code = self._get_hs_code(product.get('type'), product.get('name'))
+            flags = product_flags(" ".join([product.get('name', ''), product.get('description', ''),
+                                            " ".join(product.get('certifications', []))]))
+        return get_engine().requirements_for(destination, hs_code, flags)
+
+    def _get_shipping_instructions(self, destination):
+        """Get shipping route guidance for specific destinations"""
+        instructions = {
+            "EU": "Sea freight via Ashdod or Haifa, EUR.1 movement certificate for EU-PLO preferential duty",
+            "USA": "Sea freight via Ashdod, prior notice to FDA before arrival",
+            "Middle East": "Land freight via Allenby/King Hussein Bridge to Jordan, then onward",
+            "Japan": "Sea freight via Ashdod, consolidate with other shipments to lower cost"
+        }
+
+        return instructions.get(destination, "Contact a freight forwarder for the best route")
+
+    def _get_hs_code(self, product_type, product_name=None):
         """Get Harmonized System codes for Palestinian products"""
         hs_codes = {
             "olive_oil": "1509.10",
@@ -101,5 +197,11 @@ CERTIFICATE OF ORIGIN
             "ceramics": "6911.10",
             "soap": "3401.11"
         }
-        
-        return hs_codes.get(product_type, "9999.99")
\ No newline at end of file
+
+        if product_type in hs_codes:
+            return hs_codes[product_type]
+
+        # Anything outside the core product types goes through the HS classifier
+        if product_name:
+            return get_classifier().best_code(product_name)
+        return UNKNOWN_CODE
@@ -2,125 +2,293 @@
 ACTUAL tools to help Palestinian businesses access REAL markets
 """
 
+import json
+import threading
+import time
+from collections.abc import Mapping
+from pathlib import Path
+from types import MappingProxyType
+
+# Configuration
+MARKET_DATA_FILE = Path("data/reference/verified_markets.json")  # optional override of the built-in data
+RELOAD_CHECK_SECONDS = 5.0
+
+# Markets that ACTUALLY buy Palestinian products
+VERIFIED_MARKETS = {
+    "EUROPE": {
+        "countries": ["UK", "Germany", "France", "Netherlands", "Switzerland", "Sweden"],
+        "entry_points": [
+            "Whole Earth (UK distributor)",
+            "GEPA (German fair trade)",
+            "Alter Eco (French fair trade)",
+            "Fair Trade Original (Netherlands)"
+        ],
+        "requirements": ["Fair Trade certification", "Organic certification", "EU import regulations"],
+        "price_premium": "20-30% for fair trade/organic",
+        "contact": "European Fair Trade Association (EFTA)"
+    },
+
+    "USA": {
+        "countries": ["United States"],
+        "entry_points": [
+            "Whole Foods Market",
+            "Ten Thousand Villages",
+            "Fair Trade USA partners",
+            "Specialty food importers"
+        ],
+        "requirements": ["FDA approval", "Fair Trade certification", "Organic (optional)"],
+        "price_premium": "15-25% for specialty/organic",
+        "contact": "Fair Trade USA"
+    },
+
+    "MIDDLE EAST": {
+        "countries": ["UAE", "Qatar", "Kuwait", "Saudi Arabia", "Jordan"],
+        "entry_points": [
+            "Gulfood exhibition",
+            "Specialty stores in Dubai",
+            "Halal certification bodies",
+            "Arab trade delegations"
+        ],
+        "requirements": ["Halal certification", "Arabic labeling", "GCC standards"],
+        "price_premium": "Quality premium, cultural connection",
+        "contact": "Gulf Cooperation Council trade offices"
+    },
+
+    "JAPAN": {
+        "countries": ["Japan"],
+        "entry_points": [
+            "Japanese fair trade organizations",
+            "Specialty food importers",
+            "Organic stores",
+            "UNESCO cultural heritage angle"
+        ],
+        "requirements": ["JAS organic certification", "High quality standards", "Storytelling"],
+        "price_premium": "30-50% for premium/organic",
+        "contact": "Japan Fair Trade Commission"
+    }
+}
+
+# ACTUAL success stories of Palestinian exports
+SUCCESS_STORIES = [
+    {
+        "company": "Canaan Fair Trade",
+        "achievement": "$5M+ annual exports to 15+ countries",
+        "key_factor": "Fair Trade + Organic certification",
+        "lesson": "Certification opens premium markets",
+        "markets": ["EUROPE", "USA"]
+    },
+    {
+        "company": "Zaytoun CIC",
+        "achievement": "First Palestinian olive oil in UK supermarkets",
+        "key_factor": "Social enterprise model + storytelling",
+        "lesson": "Consumer connection through story",
+        "markets": ["EUROPE"]
+    },
+    {
+        "company": "Palestine Fair Trade Association",
+        "achievement": "1700+ farmers accessing international markets",
+        "key_factor": "Farmer collective + fair prices",
+        "lesson": "Collective action increases bargaining power",
+        "markets": ["EUROPE", "USA"]
+    },
+    {
+        "company": "Tent of Nations",
+        "achievement": "International recognition + export partnerships",
+        "key_factor": "Strong narrative + resilience story",
+        "lesson": "Story can be as valuable as product",
+        "markets": ["EUROPE"]
+    }
+]
+
+# Step-by-step plans per product category
+CATEGORY_PLANS = {
+    "food": {
+        "step1": "Get Halal certification (opens $2T market)",
+        "step2": "Get Organic certification (EU/US premium)",
+        "step3": "Get Fair Trade certification (ethical premium)",
+        "step4": "Contact: Whole Earth (UK), GEPA (Germany)",
+        "step5": "Exhibit at: BioFach (organic), Gulfood",
+        "timeline": "6-12 months for certifications"
+    },
+    "handicrafts": {
+        "step1": "Document traditional techniques",
+        "step2": "Apply for UNESCO intangible heritage",
+        "step3": "Contact: Ten Thousand Villages (US), Oxfam shops",
+        "step4": "Use Etsy + social media storytelling",
+        "step5": "Partner with fair trade organizations",
+        "timeline": "3-6 months for market entry"
+    },
+    "cosmetics": {
+        "step1": "Natural/organic certification",
+        "step2": "Halal cosmetic certification",
+        "step3": "Contact: specialty natural stores",
+        "step4": "E-commerce + Instagram marketing",
+        "step5": "Partner with Palestinian online stores",
+        "timeline": "4-8 months"
+    }
+}
+
+# Scanner/business categories that share a plan
+CATEGORY_ALIASES = {
+    "agriculture": "food",
+    "crafts": "handicrafts",
+    "textiles": "handicrafts",
+    "other": "handicrafts"
+}
+
+# What a producer should do first, depending on how it is organised
+BUSINESS_TYPES = {
+    "cooperative": ["Join Palestine Fair Trade Association for collective certification",
+                    "Pool volumes with other cooperatives for full containers"],
+    "family_business": ["Register with the Palestinian Chamber of Commerce",
+                        "Start with small consolidated shipments"],
+    "social_enterprise": ["Lead with the impact story in buyer pitches",
+                          "Approach fair trade importers first"],
+    "company": ["Register with PalTrade export development programs",
+                "Appoint an importer of record in the destination market"]
+}
+
+# Destination spellings that resolve to the same market
+DESTINATION_ALIASES = {
+    "EU": "EUROPE",
+    "GCC": "MIDDLE EAST",
+    "US": "USA"
+}
+
+_indexes = {}
+_index_lock = threading.Lock()
+
+
+def load_market_data(path=MARKET_DATA_FILE):
+    """Verified markets and success stories, with an optional JSON override on disk"""
+    markets, stories = VERIFIED_MARKETS, SUCCESS_STORIES
+    path = Path(path)
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        markets = {**markets, **data.get("markets", {})}
+        stories = data.get("success_stories", stories)
+    return markets, stories
+
+
+def market_data_fingerprint(path=MARKET_DATA_FILE):
+    """Cheap change marker for the market data (None = built-in data only)"""
+    try:
+        stat = Path(path).stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _compose_plan(business_type, category, destination, market, stories):
+    """Full plan for one (business_type, product_category, destination)"""
+    plan = dict(CATEGORY_PLANS[category])
+    plan.update({
+        "business_type": business_type,
+        "product_category": category,
+        "destination": destination,
+        "first_steps": BUSINESS_TYPES[business_type],
+        "countries": market.get("countries", []),
+        "entry_points": market.get("entry_points", []),
+        "requirements": market.get("requirements", []),
+        "price_premium": market.get("price_premium", ""),
+        "contact": market.get("contact", ""),
+        "success_stories": [
+            f"{story['company']}: {story['lesson']}"
+            for story in stories if destination in story.get("markets", [])
+        ]
+    })
+    return plan
+
+
+def build_plan_index(markets, stories):
+    """Precompute every (business_type, product_category, destination) plan"""
+    plans = {}
+    for business_type in BUSINESS_TYPES:
+        for category in CATEGORY_PLANS:
+            for destination, market in markets.items():
+                plans[(business_type, category, destination)] = _compose_plan(
+                    business_type, category, destination, market, stories
+                )
+
+    destinations = {name: name for name in markets}
+    for name, market in markets.items():
+        for country in market.get("countries", []):
+            destinations.setdefault(country.upper(), name)
+    for alias, name in DESTINATION_ALIASES.items():
+        if name in markets:
+            destinations.setdefault(alias, name)
+    return {"plans": plans, "destinations": destinations}
+
+
+def _freeze(value):
+    """Read-only copy: dicts become MappingProxyType views, lists become tuples"""
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value):
+    """Mutable deep copy of a frozen value, for handing to callers"""
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+def get_plan_index(path=MARKET_DATA_FILE):
+    """Shared read-only plan index, rebuilt when the market data file changes (checked every few seconds)"""
+    key = str(path)
+    entry = _indexes.get(key)
+    now = time.monotonic()
+    if entry is not None and now - entry["checked_at"] < RELOAD_CHECK_SECONDS:
+        return entry["index"]
+
+    fingerprint = market_data_fingerprint(path)
+    with _index_lock:
+        entry = _indexes.get(key)
+        if entry is None or entry["fingerprint"] != fingerprint:
+            markets, stories = load_market_data(path)
+            entry = {"fingerprint": fingerprint, "index": _freeze({"markets": markets, "stories": stories,
+                                                                   **build_plan_index(markets, stories)})}
+            _indexes[key] = entry
+        entry["checked_at"] = now
+    return entry["index"]
+
+
 class RealMarketAccess:
     """Real market access strategies that ACTUALLY work"""
-    
-    def __init__(self):
+
+    def __init__(self, market_data_file=MARKET_DATA_FILE):
+        self.market_data_file = market_data_file
         self.verified_markets = self._load_verified_markets()
         self.success_stories = self._load_success_stories()
-    
+
     def _load_verified_markets(self):
         """Markets that ACTUALLY buy Palestinian products"""
-        return {
-            "EUROPE": {
-                "countries": ["UK", "Germany", "France", "Netherlands", "Switzerland", "Sweden"],
-                "entry_points": [
-                    "Whole Earth (UK distributor)",
-                    "GEPA (German fair trade)",
-                    "Alter Eco (French fair trade)",
-                    "Fair Trade Original (Netherlands)"
-                ],
-                "requirements": ["Fair Trade certification", "Organic certification", "EU import regulations"],
-                "price_premium": "20-30% for fair trade/organic",
-                "contact": "European Fair Trade Association (EFTA)"
-            },
-            
-            "USA": {
-                "countries": ["United States"],
-                "entry_points": [
-                    "Whole Foods Market",
-                    "Ten Thousand Villages",
-                    "Fair Trade USA partners",
-                    "Specialty food importers"
-                ],
-                "requirements": ["FDA approval", "Fair Trade certification", "Organic (optional)"],
-                "price_premium": "15-25% for specialty/organic",
-                "contact": "Fair Trade USA"
-            },
-            
-            "MIDDLE EAST": {
-                "countries": ["UAE", "Qatar", "Kuwait", "Saudi Arabia", "Jordan"],
-                "entry_points": [
-                    "Gulfood exhibition",
-                    "Specialty stores in Dubai",
-                    "Halal certification bodies",
-                    "Arab trade delegations"
-                ],
-                "requirements": ["Halal certification", "Arabic labeling", "GCC standards"],
-                "price_premium": "Quality premium, cultural connection",
-                "contact": "Gulf Cooperation Council trade offices"
-            },
-            
-            "JAPAN": {
-                "countries": ["Japan"],
-                "entry_points": [
-                    "Japanese fair trade organizations",
-                    "Specialty food importers",
-                    "Organic stores",
-                    "UNESCO cultural heritage angle"
-                ],
-                "requirements": ["JAS organic certification", "High quality standards", "Storytelling"],
-                "price_premium": "30-50% for premium/organic",
-                "contact": "Japan Fair Trade Commission"
-            }
-        }
-    
+        return _thaw(get_plan_index(self.market_data_file)["markets"])
+
     def _load_success_stories(self):
         """ACTUAL success stories of Palestinian exports"""
-        return [
-            {
-                "company": "Canaan Fair Trade",
-                "achievement": "$5M+ annual exports to 15+ countries",
-                "key_factor": "Fair Trade + Organic certification",
-                "lesson": "Certification opens premium markets"
-            },
-            {
-                "company": "Zaytoun CIC",
-                "achievement": "First Palestinian olive oil in UK supermarkets",
-                "key_factor": "Social enterprise model + storytelling",
-                "lesson": "Consumer connection through story"
-            },
-            {
-                "company": "Palestine Fair Trade Association",
-                "achievement": "1700+ farmers accessing international markets",
-                "key_factor": "Farmer collective + fair prices",
-                "lesson": "Collective action increases bargaining power"
-            },
-            {
-                "company": "Tent of Nations",
-                "achievement": "International recognition + export partnerships",
-                "key_factor": "Strong narrative + resilience story",
-                "lesson": "Story can be as valuable as product"
-            }
-        ]
-    
-    def generate_market_plan(self, business_type, product_category):
-        """Generate REAL market access plan"""
-        plans = {
-            "food": {
-                "step1": "Get Halal certification (opens $2T market)",
-                "step2": "Get Organic certification (EU/US premium)",
-                "step3": "Get Fair Trade certification (ethical premium)",
-                "step4": "Contact: Whole Earth (UK), GEPA (Germany)",
-                "step5": "Exhibit at: BioFach (organic), Gulfood",
-                "timeline": "6-12 months for certifications"
-            },
-            "handicrafts": {
-                "step1": "Document traditional techniques",
-                "step2": "Apply for UNESCO intangible heritage",
-                "step3": "Contact: Ten Thousand Villages (US), Oxfam shops",
-                "step4": "Use Etsy + social media storytelling",
-                "step5": "Partner with fair trade organizations",
-                "timeline": "3-6 months for market entry"
-            },
-            "cosmetics": {
-                "step1": "Natural/organic certification",
-                "step2": "Halal cosmetic certification",
-                "step3": "Contact: specialty natural stores",
-                "step4": "E-commerce + Instagram marketing",
-                "step5": "Partner with Palestinian online stores",
-                "timeline": "4-8 months"
-            }
-        }
-        
-        return plans.get(product_category, plans["food"])
\ No newline at end of file
+        return _thaw(get_plan_index(self.market_data_file)["stories"])
+
+    def generate_market_plan(self, business_type, product_category, destination=None):
+        """Generate REAL market access plan (O(1) lookup in the precomputed index)"""
+        category = str(product_category).lower()
+        category = CATEGORY_ALIASES.get(category, category)
+        if category not in CATEGORY_PLANS:
+            category = "food"
+        if destination is None:
+            return dict(CATEGORY_PLANS[category])
+
+        index = get_plan_index(self.market_data_file)
+        market = index["destinations"].get(str(destination).upper())
+        if market is None:
+            raise KeyError(f"Unknown destination: {destination}")
+        business_type = str(business_type).lower().replace(" ", "_")
+        if business_type not in BUSINESS_TYPES:
+            business_type = "company"
+        return _thaw(index["plans"][(business_type, category, market)])
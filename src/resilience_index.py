@@ -0,0 +1,897 @@
+"""
+RESILIENCE INDEX ENGINE
+Composite resilience scores for businesses and regions from normalized, weighted sub-indicators
+"""
+
+import hashlib
+import itertools
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from business_directory import CERT_FAMILIES, name_key, normalize_market
+
+# Configuration
+DATA_FILE = Path("data/raw/complete_market_data.json")
+OUTPUT_FILE = Path("data/processed/resilience_index.json")
+STATE_FILE = Path("data/processed/resilience_entities.json")
+CUBE_FILE = Path("data/processed/resilience_cube.npz")
+
+# Raw sub-indicators per entity (higher = more resilient), min-max normalized before weighting:
+#   export_diversification   distinct export markets
+#   product_diversification  1 - HHI of the entity's products weighted by national trade value
+#   data_reliability         1 unless the record is fallback/mock data (group mean = 1 - fallback share)
+#   bds_compliance           1 compliant, 0.5 needs review, 0 non-compliant or unverified
+#   certification_coverage   certification families held (fair trade, organic, halal)
+INDICATORS = ["export_diversification", "product_diversification", "data_reliability",
+              "bds_compliance", "certification_coverage"]
+DEFAULT_WEIGHTS = {
+    "export_diversification": 0.25,
+    "product_diversification": 0.20,
+    "data_reliability": 0.15,
+    "bds_compliance": 0.25,
+    "certification_coverage": 0.15
+}
+
+# Categorical columns every entity carries; any subset can be grouped on
+GROUP_COLUMNS = ["locality", "governorate", "region", "category", "data_quality", "year"]
+LOW_QUALITY = {"fallback", "mock"}
+BDS_SCORES = {"compliant": 1.0, "needs review": 0.5, "non-compliant": 0.0}
+UNKNOWN = "Unknown"
+# Bootstrap weight per data_quality level in quality-weighted mode (other levels weigh 1)
+QUALITY_WEIGHTS = {"fallback": 0.3, "mock": 0.1}
+BOOTSTRAP_REPLICATES = 10000
+BOOTSTRAP_CELLS = 2 ** 22          # resampling-matrix entries per worker job
+# Group sets kept up to date by the incremental index
+DEFAULT_ROLLUPS = [("region",), ("region", "category")]
+# Rollup cube: geography hierarchy (finest first) crossed with every subset of the other columns
+GEOGRAPHY = ["locality", "governorate", "region"]
+CUBE_COLUMNS = ["category", "data_quality", "year"]
+ALL = -1
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+|[؀-ۿ]+")
+
+
+def _tokens(text):
+    return {token[:-1] if len(token) > 3 and token.endswith("s") else token
+            for token in TOKEN_PATTERN.findall(str(text).lower())}
+
+
+def _as_list(value):
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [part.strip() for part in value.split(",") if part.strip()]
+    return list(value)
+
+
+class EntityTable:
+    """Columnar entity store: categorical columns as int codes + labels, indicators as a float matrix"""
+
+    def __init__(self, ids, codes, labels, raw):
+        self.ids = list(ids)
+        self.codes = codes            # column -> int32 codes (n,)
+        self.labels = labels          # column -> list of labels, code i -> labels[i]
+        self.raw = raw                # (n, len(INDICATORS)) float64, NaN when unknown
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build from entity dicts carrying the GROUP_COLUMNS and INDICATORS keys"""
+        codes, labels = {}, {}
+        for column in GROUP_COLUMNS:
+            lookup = {}
+            codes[column] = np.array([lookup.setdefault(str(row.get(column, UNKNOWN)), len(lookup))
+                                      for row in rows], dtype=np.int32)
+            labels[column] = list(lookup)
+        raw = np.array([[row.get(name, np.nan) for name in INDICATORS] for row in rows],
+                       dtype=np.float64).reshape(len(rows), len(INDICATORS))
+        return cls([row["id"] for row in rows], codes, labels, raw)
+
+    def column(self, name):
+        """Decoded label array for a categorical column"""
+        return np.asarray(self.labels[name], dtype=object)[self.codes[name]]
+
+
+class ResilienceIndex:
+    """Vectorized normalization, weighting and group aggregation over an EntityTable"""
+
+    def __init__(self, weights=None):
+        weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        unknown = set(weights) - set(INDICATORS)
+        if unknown:
+            raise ValueError(f"Unknown indicators: {', '.join(sorted(unknown))}")
+        self.weights = np.array([weights[name] for name in INDICATORS], dtype=np.float64)
+
+    @staticmethod
+    def bounds(raw):
+        """Per-indicator (min, max) over entities, ignoring unknowns"""
+        with np.errstate(all="ignore"):
+            known = ~np.isnan(raw)
+            low = np.where(known.any(axis=0), np.nanmin(np.where(known, raw, np.inf), axis=0), 0.0)
+            high = np.where(known.any(axis=0), np.nanmax(np.where(known, raw, -np.inf), axis=0), 0.0)
+        return low, high
+
+    @staticmethod
+    def normalize(values, low, high):
+        """Min-max scale into [0, 1]; a constant indicator scores 1 if positive, else 0"""
+        span = high - low
+        scaled = (values - low) / np.where(span > 0, span, 1.0)
+        constant = np.where(high > 0, 1.0, 0.0)
+        scaled = np.where(span > 0, scaled, np.where(np.isnan(values), np.nan, constant))
+        return np.clip(scaled, 0.0, 1.0)
+
+    def composite(self, normalized):
+        """Weighted mean over the known indicators of each row"""
+        known = ~np.isnan(normalized)
+        weights = known * self.weights
+        total = weights.sum(axis=1)
+        score = np.where(known, normalized, 0.0) @ self.weights
+        return np.divide(score, total, out=np.full(len(normalized), np.nan), where=total > 0)
+
+    def score(self, table, bounds=None):
+        """Entity-level normalized indicators and composite score"""
+        low, high = bounds if bounds is not None else self.bounds(table.raw)
+        normalized = self.normalize(table.raw, low, high)
+        return {"normalized": normalized, "composite": self.composite(normalized), "bounds": (low, high)}
+
+    @staticmethod
+    def group_codes(table, by):
+        """(group index per entity, unique combined codes) for the given categorical columns"""
+        sizes = [max(len(table.labels[column]), 1) for column in by]
+        combined = np.ravel_multi_index([table.codes[column] for column in by], sizes)
+        unique, inverse = np.unique(combined, return_inverse=True)
+        return inverse, unique, sizes
+
+    def aggregate(self, table, by=("region",), bounds=None):
+        """Group means of the raw indicators, normalized with entity bounds, plus composite scores.
+
+        Min-max scaling is affine, so the normalized group mean equals the mean of the
+        normalized entity values; only per-group sums and counts are needed.
+        """
+        by = list(by)
+        inverse, unique, sizes = self.group_codes(table, by)
+        n_groups = len(unique)
+        known = ~np.isnan(table.raw)
+        values = np.where(known, table.raw, 0.0)
+        sums = np.column_stack([np.bincount(inverse, weights=values[:, j], minlength=n_groups)
+                                for j in range(len(INDICATORS))])
+        counts = np.column_stack([np.bincount(inverse, weights=known[:, j], minlength=n_groups)
+                                  for j in range(len(INDICATORS))])
+        means = np.divide(sums, counts, out=np.full(sums.shape, np.nan), where=counts > 0)
+
+        low, high = bounds if bounds is not None else self.bounds(table.raw)
+        normalized = self.normalize(means, low, high)
+        keys = np.unravel_index(unique, sizes) if by else []
+        return {
+            "by": by,
+            "keys": {column: np.asarray(table.labels[column], dtype=object)[codes] for column, codes in zip(by, keys)},
+            "count": np.bincount(inverse, minlength=n_groups),
+            "indicators": normalized,
+            "composite": self.composite(normalized)
+        }
+
+
+def aggregate_rows(aggregate):
+    """List-of-dicts view of an aggregate, highest composite first"""
+    rows = []
+    for i in range(len(aggregate["count"])):
+        row = {column: aggregate["keys"][column][i] for column in aggregate["by"]}
+        row["entities"] = int(aggregate["count"][i])
+        row["composite"] = None if np.isnan(aggregate["composite"][i]) else round(float(aggregate["composite"][i]), 4)
+        for j, name in enumerate(INDICATORS):
+            value = aggregate["indicators"][i, j]
+            row[name] = None if np.isnan(value) else round(float(value), 4)
+        rows.append(row)
+    return sorted(rows, key=lambda row: -(row["composite"] or 0))
+
+
+def quality_weights(table):
+    """Per-entity bootstrap weight from its data_quality label"""
+    levels = np.array([QUALITY_WEIGHTS.get(str(label).lower(), 1.0) for label in table.labels["data_quality"]])
+    return levels[table.codes["data_quality"]] if len(levels) else np.ones(len(table))
+
+
+def _bootstrap_job(index, values, known, weights, n_replicates, seed):
+    """Worker: composite scores of n_replicates resamples (with replacement) of one group"""
+    rng = np.random.default_rng(seed)
+    n = len(values)
+    samples = rng.integers(0, n, size=(n_replicates, n))
+    samples += n * np.arange(n_replicates)[:, None]
+    counts = np.bincount(samples.ravel(), minlength=n_replicates * n).reshape(n_replicates, n) * weights
+    sums = counts @ np.where(known, values, 0.0)
+    totals = counts @ known
+    means = np.divide(sums, totals, out=np.full(sums.shape, np.nan), where=totals > 0)
+    return index.composite(means)
+
+
+def bootstrap_intervals(table, by=("region",), replicates=BOOTSTRAP_REPLICATES, level=0.95, weighted=False,
+                        seed=0, workers=None, index=None):
+    """Percentile bootstrap intervals of group composites, resampling entities within each group.
+
+    Each replicate block is one resampling index matrix turned into per-entity counts, so a
+    block's group means are a single matrix product. Blocks are seeded from the group and
+    block position only, so results do not depend on the number of workers. In weighted mode
+    entity values are averaged with QUALITY_WEIGHTS, shrinking the say of fallback/mock rows.
+    """
+    index = index or ResilienceIndex()
+    by = list(by)
+    low, high = index.bounds(table.raw)
+    normalized = index.normalize(table.raw, low, high)
+    known = ~np.isnan(normalized)
+    weights = quality_weights(table) if weighted else np.ones(len(table))
+    inverse, unique, sizes = index.group_codes(table, by)
+    order = np.argsort(inverse, kind="stable")
+    bounds = np.searchsorted(inverse[order], np.arange(len(unique) + 1))
+
+    jobs = []
+    for group, group_seed in enumerate(np.random.SeedSequence(seed).spawn(len(unique))):
+        members = order[bounds[group]:bounds[group + 1]]
+        per_job = max(1, BOOTSTRAP_CELLS // len(members))
+        starts = range(0, replicates, per_job)
+        for start, job_seed in zip(starts, group_seed.spawn(len(starts))):
+            jobs.append((group, (index, normalized[members], known[members], weights[members],
+                                 min(per_job, replicates - start), job_seed)))
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+    if workers == 1:
+        outputs = [_bootstrap_job(*job) for _, job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            outputs = list(pool.map(_bootstrap_job, *zip(*(job for _, job in jobs))))
+    scores = [[] for _ in unique]
+    for (group, _), output in zip(jobs, outputs):
+        scores[group].append(output)
+
+    keys = np.unravel_index(unique, sizes) if by else []
+    labels = {column: np.asarray(table.labels[column], dtype=object)[codes] for column, codes in zip(by, keys)}
+    tail = (1.0 - level) / 2 * 100
+    rows = []
+    for group in range(len(unique)):
+        members = order[bounds[group]:bounds[group + 1]]
+        w = weights[members]
+        sums = w @ np.where(known[members], normalized[members], 0.0)
+        totals = w @ known[members]
+        means = np.divide(sums, totals, out=np.full(sums.shape, np.nan), where=totals > 0)
+        point = index.composite(means[None, :])[0]
+        replicate_scores = np.concatenate(scores[group])
+        replicate_scores = replicate_scores[~np.isnan(replicate_scores)]
+        row = {column: labels[column][group] for column in by}
+        row["entities"] = len(members)
+        row["effective_entities"] = round(float(w.sum() ** 2 / (w ** 2).sum()), 1)
+        row["composite"] = None if np.isnan(point) else round(float(point), 4)
+        if len(replicate_scores):
+            ci_low, ci_high = np.percentile(replicate_scores, [tail, 100 - tail])
+            se = replicate_scores.std(ddof=1) if len(replicate_scores) > 1 else 0.0
+            row.update(ci_low=round(float(ci_low), 4), ci_high=round(float(ci_high), 4), se=round(float(se), 4))
+        else:
+            row.update(ci_low=None, ci_high=None, se=None)
+        rows.append(row)
+    return sorted(rows, key=lambda row: -(row["composite"] or 0))
+
+
+def _same_row(a, b):
+    """Row equality with missing (NaN) indicators equal to each other, as after a JSON round trip"""
+    return a.keys() == b.keys() and all(a[k] == b[k] or (a[k] != a[k] and b[k] != b[k]) for k in a)
+
+
+def entities_digest(rows):
+    """Content digest of a set of entity rows, order-independent; ties a cube to the rows it holds"""
+    digest = hashlib.sha256()
+    for row in sorted(rows, key=lambda row: str(row["id"])):
+        digest.update(json.dumps(row, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def diff_entities(previous, rows):
+    """Changelog [{"op", "id", "row"}] turning previous ({id: row}) into the current rows"""
+    current = {row["id"]: row for row in rows}
+    changes = [{"op": "delete", "id": entity_id} for entity_id in previous if entity_id not in current]
+    for entity_id, row in current.items():
+        if entity_id not in previous:
+            changes.append({"op": "insert", "id": entity_id, "row": row})
+        elif not _same_row(previous[entity_id], row):
+            changes.append({"op": "update", "id": entity_id, "row": row})
+    return changes
+
+
+class IncrementalResilienceIndex:
+    """Running per-group sums/counts and global min/max, updated from a changelog in O(changed).
+
+    Group and entity scores depend on the normalization bounds; as long as a change keeps
+    every bound in place only the touched entities and groups are rescored. A bound that
+    moves (new extreme inserted, or the last entity at an extreme removed) triggers a rebuild.
+    """
+
+    def __init__(self, index=None, rollups=DEFAULT_ROLLUPS):
+        self.index = index or ResilienceIndex()
+        self.rollups = [tuple(by) for by in rollups]
+        self.entities = {}                  # id -> (row, raw vector)
+        self.groups = {by: {} for by in self.rollups}   # by -> key -> {"sum", "known", "count"}
+        self.group_scores = {by: {} for by in self.rollups}
+        self.entity_scores = {}
+        self.low = np.zeros(len(INDICATORS))
+        self.high = np.zeros(len(INDICATORS))
+        self.at_low = np.zeros(len(INDICATORS), dtype=np.int64)    # entities sitting on each bound
+        self.at_high = np.zeros(len(INDICATORS), dtype=np.int64)
+        self.rebuilds = 0
+
+    @staticmethod
+    def _raw(row):
+        return np.array([row.get(name, np.nan) for name in INDICATORS], dtype=np.float64)
+
+    def load(self, rows):
+        """Full build from entity rows"""
+        self.entities = {row["id"]: (row, self._raw(row)) for row in rows}
+        self.groups = {by: {} for by in self.rollups}
+        for row, raw in self.entities.values():
+            self._add_to_groups(row, raw, 1)
+        self._rebuild()
+        return self
+
+    def _keys(self, row):
+        return [(by, tuple(str(row.get(column, UNKNOWN)) for column in by)) for by in self.rollups]
+
+    def _add_to_groups(self, row, raw, sign):
+        known = ~np.isnan(raw)
+        values = np.where(known, raw, 0.0)
+        touched = []
+        for by, key in self._keys(row):
+            group = self.groups[by].get(key)
+            if group is None:
+                group = self.groups[by][key] = {"sum": np.zeros(len(INDICATORS)),
+                                                "known": np.zeros(len(INDICATORS)), "count": 0}
+            group["sum"] += sign * values
+            group["known"] += sign * known
+            group["count"] += sign
+            if group["count"] == 0:
+                del self.groups[by][key]
+                self.group_scores[by].pop(key, None)
+            else:
+                touched.append((by, key))
+        return touched
+
+    def _rebuild(self):
+        """Recompute bounds from every entity and rescore everything"""
+        self.rebuilds += 1
+        raw = np.array([raw for _, raw in self.entities.values()]).reshape(len(self.entities), len(INDICATORS))
+        if not len(raw):
+            self.low, self.high = np.zeros(len(INDICATORS)), np.zeros(len(INDICATORS))
+            self.entity_scores, self.group_scores = {}, {by: {} for by in self.rollups}
+            return
+        self.low, self.high = self.index.bounds(raw)
+        self.at_low = np.sum(raw == self.low, axis=0)
+        self.at_high = np.sum(raw == self.high, axis=0)
+        composite = self.index.composite(self.index.normalize(raw, self.low, self.high))
+        self.entity_scores = dict(zip(self.entities, composite.tolist()))
+        self.group_scores = {by: {} for by in self.rollups}
+        for by, groups in self.groups.items():
+            for key in groups:
+                self._score_group(by, key)
+
+    def _score_group(self, by, key):
+        group = self.groups[by][key]
+        mean = np.divide(group["sum"], group["known"], out=np.full(len(INDICATORS), np.nan), where=group["known"] > 0)
+        normalized = self.index.normalize(mean, self.low, self.high)
+        self.group_scores[by][key] = (normalized, float(self.index.composite(normalized[None, :])[0]))
+
+    def _bounds_hold_after_remove(self, raw):
+        on_low, on_high = raw == self.low, raw == self.high
+        self.at_low -= on_low
+        self.at_high -= on_high
+        return not ((on_low & (self.at_low == 0)) | (on_high & (self.at_high == 0))).any()
+
+    def _bounds_hold_after_add(self, raw):
+        known = ~np.isnan(raw)
+        if (known & ((raw < self.low) | (raw > self.high))).any():
+            return False
+        self.at_low += raw == self.low
+        self.at_high += raw == self.high
+        return True
+
+    def apply(self, changes):
+        """Apply insert/update/delete changes; returns counts, touched groups and whether bounds moved"""
+        stable = bool(self.entities)
+        touched = set()
+        counts = {"insert": 0, "update": 0, "delete": 0}
+        for change in changes:
+            op, entity_id = change["op"], change["id"]
+            if op not in counts:
+                raise ValueError(f"Unknown change op: {op}")
+            old = self.entities.pop(entity_id, None)
+            if old is not None:
+                touched.update(self._add_to_groups(old[0], old[1], -1))
+                self.entity_scores.pop(entity_id, None)
+                stable = stable and self._bounds_hold_after_remove(old[1])
+            if op != "delete":
+                row = change["row"]
+                raw = self._raw(row)
+                self.entities[entity_id] = (row, raw)
+                touched.update(self._add_to_groups(row, raw, 1))
+                stable = stable and self._bounds_hold_after_add(raw)
+            counts[op] += 1
+
+        if not stable:
+            self._rebuild()
+            return {**counts, "rebuilt": True, "groups_rescored": sum(len(g) for g in self.groups.values())}
+
+        rescored = 0
+        for by, key in touched:
+            if key in self.groups[by]:
+                self._score_group(by, key)
+                rescored += 1
+        for change in changes:
+            if change["op"] != "delete" and change["id"] in self.entities:
+                raw = self.entities[change["id"]][1]
+                normalized = self.index.normalize(raw, self.low, self.high)
+                self.entity_scores[change["id"]] = float(self.index.composite(normalized[None, :])[0])
+        return {**counts, "rebuilt": False, "groups_rescored": rescored}
+
+    def save(self, path=STATE_FILE):
+        """Entity rows plus the running state (group sums, bounds and bound counts, entity scores)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        state = {"rollups": [list(by) for by in self.rollups], "weights": self.index.weights.tolist(),
+                 "low": self.low.tolist(), "high": self.high.tolist(),
+                 "at_low": self.at_low.tolist(), "at_high": self.at_high.tolist(),
+                 "entities": [row for row, _ in self.entities.values()],
+                 "entity_scores": [self.entity_scores.get(entity_id) for entity_id in self.entities],
+                 "groups": [[list(by), [[list(key), group["sum"].tolist(), group["known"].tolist(), group["count"]]
+                                        for key, group in groups.items()]]
+                            for by, groups in self.groups.items()]}
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, default=str)
+        os.replace(tmp, path)
+
+    @classmethod
+    def restore(cls, path=STATE_FILE, index=None, rollups=DEFAULT_ROLLUPS):
+        """Resume from save() without a full build; falls back to one when rollups or weights differ"""
+        incremental = cls(index, rollups)
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if isinstance(state, list):         # bare entity snapshot from older runs
+            return incremental.load(state)
+        if [tuple(by) for by in state["rollups"]] != incremental.rollups or \
+                not np.allclose(state["weights"], incremental.index.weights):
+            return incremental.load(state["entities"])
+        incremental.entities = {row["id"]: (row, cls._raw(row)) for row in state["entities"]}
+        incremental.entity_scores = {entity_id: score for entity_id, score
+                                     in zip(incremental.entities, state["entity_scores"]) if score is not None}
+        incremental.low, incremental.high = np.array(state["low"]), np.array(state["high"])
+        incremental.at_low = np.array(state["at_low"], dtype=np.int64)
+        incremental.at_high = np.array(state["at_high"], dtype=np.int64)
+        for by, groups in state["groups"]:
+            by = tuple(by)
+            incremental.groups[by] = {tuple(key): {"sum": np.array(sums), "known": np.array(known), "count": count}
+                                      for key, sums, known, count in groups}
+            for key in incremental.groups[by]:
+                incremental._score_group(by, key)
+        return incremental
+
+    def rows(self, by):
+        """Current group scores for one rollup, highest composite first"""
+        by = tuple(by)
+        rows = []
+        for key, (normalized, composite) in self.group_scores[by].items():
+            row = dict(zip(by, key))
+            row["entities"] = self.groups[by][key]["count"]
+            row["composite"] = None if np.isnan(composite) else round(composite, 4)
+            for name, value in zip(INDICATORS, normalized):
+                row[name] = None if np.isnan(value) else round(float(value), 4)
+            rows.append(row)
+        return sorted(rows, key=lambda row: -(row["composite"] or 0))
+
+
+class ResilienceCube:
+    """Materialized rollups over (locality → governorate → region) × category × data_quality × year.
+
+    Every cell (a geography level and code, plus a code or ALL for each other column) holds
+    additive measures only: per-indicator sums and known counts, and the entity count. Cells
+    live in columnar arrays with a key → row dict, so a slice is one lookup; normalization
+    runs at query time with the cube bounds. Refreshing adds or subtracts the changed rows in
+    every cuboid and keeps per-bound entity counts, like IncrementalResilienceIndex; when the
+    last entity on a bound leaves, the cube is rebuilt.
+    """
+
+    def __init__(self, index=None):
+        self.index = index or ResilienceIndex()
+        self.labels = {column: [] for column in GROUP_COLUMNS}
+        self.lookup = {column: {} for column in GROUP_COLUMNS}
+        self.keys = np.zeros((0, 1 + 1 + len(CUBE_COLUMNS)), dtype=np.int32)   # level, geo code, columns
+        self.sums = np.zeros((0, len(INDICATORS)))
+        self.known = np.zeros((0, len(INDICATORS)))
+        self.count = np.zeros(0, dtype=np.int64)
+        self.cells = {}
+        self.low = np.zeros(len(INDICATORS))
+        self.high = np.zeros(len(INDICATORS))
+        self.at_low = np.zeros(len(INDICATORS), dtype=np.int64)     # entities sitting on each bound
+        self.at_high = np.zeros(len(INDICATORS), dtype=np.int64)
+        self.revision = None    # entities_digest of the rows the cube holds, when the caller records it
+
+    def build(self, table):
+        """Full materialization from an EntityTable"""
+        self.__init__(self.index)
+        if len(table):
+            self.low, self.high = self.index.bounds(table.raw)
+            self.at_low = np.sum(table.raw == self.low, axis=0)
+            self.at_high = np.sum(table.raw == self.high, axis=0)
+        self._accumulate(table, 1)
+        return self
+
+    def refresh(self, added=None, removed=None, current=None):
+        """Apply changed entities: removed (old versions) are subtracted, added are summed in.
+
+        When a removal takes the last entity off a bound the cube is rebuilt from current,
+        the full EntityTable after the change; ValueError if it is needed but not given.
+        """
+        if removed is not None and len(removed):
+            self._accumulate(removed, -1)
+            if self.at_low is not None:
+                self.at_low = self.at_low - np.sum(removed.raw == self.low, axis=0)
+                self.at_high = self.at_high - np.sum(removed.raw == self.high, axis=0)
+        if added is not None and len(added):
+            self._widen(added.raw)
+            self._accumulate(added, 1)
+
+        known = self._total_known()
+        if self.at_low is None or ((known > 0) & ((self.at_low <= 0) | (self.at_high <= 0))).any():
+            if current is None:
+                raise ValueError("A normalization bound left the cube; pass current to rebuild it")
+            return self.build(current)
+        self.low, self.high = np.where(known > 0, self.low, 0.0), np.where(known > 0, self.high, 0.0)
+        return self
+
+    def _total_known(self):
+        """Known values per indicator over every entity in the cube"""
+        total = self.cells.get((len(GEOGRAPHY), ALL) + (ALL,) * len(CUBE_COLUMNS))
+        return self.known[total] if total is not None else np.zeros(len(INDICATORS))
+
+    def _widen(self, raw):
+        """Move bounds out to cover inserted rows, restarting the count on any bound that moves"""
+        if self.at_low is None:
+            return
+        low, high = self.index.bounds(raw)
+        has = (~np.isnan(raw)).any(axis=0)
+        empty = self._total_known() == 0
+        moved_low = has & (empty | (low < self.low))
+        moved_high = has & (empty | (high > self.high))
+        self.low = np.where(moved_low, low, self.low)
+        self.high = np.where(moved_high, high, self.high)
+        self.at_low = np.where(moved_low, 0, self.at_low) + np.sum(raw == self.low, axis=0)
+        self.at_high = np.where(moved_high, 0, self.at_high) + np.sum(raw == self.high, axis=0)
+
+    def _codes(self, table, column):
+        """Table codes translated into the cube's code space for a column"""
+        lookup, labels = self.lookup[column], self.labels[column]
+        mapping = np.array([lookup.setdefault(label, len(lookup)) for label in table.labels[column]] or [0],
+                           dtype=np.int32)
+        labels.extend(list(lookup)[len(labels):])
+        return mapping[table.codes[column]]
+
+    def _accumulate(self, table, sign):
+        # Collapse entities to base cells once, then roll the base cells up into every cuboid
+        codes = [self._codes(table, column) for column in GROUP_COLUMNS]
+        sizes = [max(len(self.labels[column]), 1) for column in GROUP_COLUMNS]
+        unique, inverse = np.unique(np.ravel_multi_index(codes, sizes), return_inverse=True)
+        base = dict(zip(GROUP_COLUMNS, (c.astype(np.int32) for c in np.unravel_index(unique, sizes))))
+        known = ~np.isnan(table.raw)
+        values = np.where(known, table.raw, 0.0)
+        base_sums = np.column_stack([np.bincount(inverse, weights=values[:, j], minlength=len(unique))
+                                     for j in range(len(INDICATORS))])
+        base_known = np.column_stack([np.bincount(inverse, weights=known[:, j], minlength=len(unique))
+                                      for j in range(len(INDICATORS))])
+        base_count = np.bincount(inverse, minlength=len(unique))
+
+        everywhere = np.full(len(unique), ALL, dtype=np.int32)
+        for level in range(len(GEOGRAPHY) + 1):
+            geo = base[GEOGRAPHY[level]] if level < len(GEOGRAPHY) else everywhere
+            geo_size = sizes[GROUP_COLUMNS.index(GEOGRAPHY[min(level, len(GEOGRAPHY) - 1)])]
+            for kept in itertools.product([True, False], repeat=len(CUBE_COLUMNS)):
+                columns = [geo] + [base[column] if keep else everywhere for column, keep in zip(CUBE_COLUMNS, kept)]
+                shape = [geo_size + 1] + [sizes[GROUP_COLUMNS.index(column)] + 1 for column in CUBE_COLUMNS]
+                combined, cells = np.unique(np.ravel_multi_index([c + 1 for c in columns], shape), return_inverse=True)
+                rows = self._rows(level, np.column_stack(np.unravel_index(combined, shape)) - 1)
+                for j in range(len(INDICATORS)):
+                    self.sums[rows, j] += sign * np.bincount(cells, weights=base_sums[:, j], minlength=len(rows))
+                    self.known[rows, j] += sign * np.bincount(cells, weights=base_known[:, j], minlength=len(rows))
+                self.count[rows] += sign * np.bincount(cells, weights=base_count, minlength=len(rows)).astype(int)
+
+    def _rows(self, level, keys):
+        """Row index per key, appending empty cells for keys not seen before"""
+        rows = np.empty(len(keys), dtype=np.int64)
+        new = []
+        for i, key in enumerate(map(tuple, keys.tolist())):
+            key = (level,) + key
+            row = self.cells.get(key)
+            if row is None:
+                row = self.cells[key] = len(self.count) + len(new)
+                new.append(key)
+            rows[i] = row
+        if new:
+            self.keys = np.vstack([self.keys, np.array(new, dtype=np.int32)])
+            self.sums = np.vstack([self.sums, np.zeros((len(new), len(INDICATORS)))])
+            self.known = np.vstack([self.known, np.zeros((len(new), len(INDICATORS)))])
+            self.count = np.concatenate([self.count, np.zeros(len(new), dtype=np.int64)])
+        return rows
+
+    def slice(self, **filters):
+        """Scores of one cell, e.g. slice(governorate="Hebron", year=2026); None if no entities match"""
+        unknown = set(filters) - set(GROUP_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown cube columns: {', '.join(sorted(unknown))}")
+        geography = [column for column in GEOGRAPHY if column in filters]
+        if len(geography) > 1:
+            raise ValueError("Slice on one geography level at a time")
+        level = GEOGRAPHY.index(geography[0]) if geography else len(GEOGRAPHY)
+        key = [level, self.lookup[geography[0]].get(str(filters[geography[0]])) if geography else ALL]
+        for column in CUBE_COLUMNS:
+            key.append(self.lookup[column].get(str(filters[column])) if column in filters else ALL)
+        row = None if None in key else self.cells.get(tuple(key))
+        if row is None or self.count[row] <= 0:
+            return None
+        means = np.divide(self.sums[row], self.known[row], out=np.full(len(INDICATORS), np.nan),
+                          where=self.known[row] > 0)
+        normalized = self.index.normalize(means, self.low, self.high)
+        composite = self.index.composite(normalized[None, :])[0]
+        result = {**{column: str(value) for column, value in filters.items()}, "entities": int(self.count[row])}
+        result["composite"] = None if np.isnan(composite) else round(float(composite), 4)
+        for name, value in zip(INDICATORS, normalized):
+            result[name] = None if np.isnan(value) else round(float(value), 4)
+        return result
+
+    def save(self, path=CUBE_FILE):
+        """Columnar .npz: cell keys, measures, bounds and the label dictionaries"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        labels = np.array(json.dumps(self.labels, ensure_ascii=False))
+        np.savez_compressed(path, keys=self.keys, sums=self.sums, known=self.known, count=self.count,
+                            low=self.low, high=self.high, at_low=self.at_low, at_high=self.at_high, labels=labels,
+                            revision=np.array(self.revision or ""))
+
+    @classmethod
+    def load(cls, path=CUBE_FILE, index=None):
+        cube = cls(index)
+        with np.load(path) as data:
+            cube.keys, cube.sums, cube.known, cube.count = data["keys"], data["sums"], data["known"], data["count"]
+            cube.low, cube.high = data["low"], data["high"]
+            # Cubes saved before bound counts were kept rebuild on their next refresh
+            cube.at_low = data["at_low"] if "at_low" in data.files else None
+            cube.at_high = data["at_high"] if "at_high" in data.files else None
+            cube.revision = (str(data["revision"]) or None) if "revision" in data.files else None
+            cube.labels = json.loads(str(data["labels"]))
+        cube.lookup = {column: {label: code for code, label in enumerate(labels)}
+                       for column, labels in cube.labels.items()}
+        cube.cells = {tuple(key): row for row, key in enumerate(cube.keys.tolist())}
+        return cube
+
+
+def _trade_reference(trade_records):
+    """(category -> export markets, [(product tokens, export value)]) from trade records"""
+    markets = {}
+    products = []
+    for record in trade_records:
+        category = str(record.get("category", "")).strip().lower()
+        markets.setdefault(category, set()).update(normalize_market(m) for m in _as_list(record.get("main_markets")))
+        products.append((_tokens(record.get("product", "")), float(record.get("export_value_usd") or 0.0)))
+    return markets, products
+
+
+def product_diversification(products, trade_products):
+    """1 - HHI of a product list, each product weighted by its best-matching national export value"""
+    if not products:
+        return np.nan
+    floor = min((value for _, value in trade_products if value > 0), default=1.0)
+    weights = []
+    for product in products:
+        tokens = _tokens(product)
+        matches = [(len(trade_tokens), value) for trade_tokens, value in trade_products
+                   if trade_tokens and trade_tokens <= tokens]
+        weights.append(max(matches)[1] if matches else floor)
+    shares = np.asarray(weights) / sum(weights)
+    return float(1.0 - np.square(shares).sum())
+
+
+def certification_count(texts):
+    text = " ".join(str(t).lower() for t in texts)
+    return float(sum(any(keyword in text for keyword in keywords) for keywords in CERT_FAMILIES.values()))
+
+
+def entity_row(record, gazetteer, trade_markets, trade_products, bds_status=None, verified=None):
+    """Raw indicators and hierarchy for one business or product-listing record"""
+    verified = verified or {}
+    place = gazetteer.lookup(record.get("location") or verified.get("location") or "")
+    category = str(record.get("category") or verified.get("category") or UNKNOWN).strip().lower()
+
+    markets = {normalize_market(m) for m in _as_list(verified.get("export_markets") or record.get("export_markets"))}
+    if not markets:
+        markets = trade_markets.get(category, set())
+    products = _as_list(verified.get("products") or record.get("products")) or \
+        [record[field] for field in ("english_title", "title") if record.get(field)][:1]
+
+    status = str(verified.get("bds_status") or bds_status or "").strip().lower()
+    if not status and "bds_compliant" in record:
+        status = "compliant" if record["bds_compliant"] else "non-compliant"
+    quality = record.get("data_quality") or ("verified" if verified else UNKNOWN)
+    stamp = str(record.get("scraped_at") or verified.get("last_verified") or "")
+
+    return {
+        "id": record.get("id") or verified.get("key") or name_key(record.get("name", "")),
+        "name": record.get("name") or record.get("seller") or verified.get("name", ""),
+        "locality": place["name_en"] if place and place["level"] == "locality" else UNKNOWN,
+        "governorate": (place.get("governorate") or UNKNOWN) if place else UNKNOWN,
+        "region": place["region"] if place else UNKNOWN,
+        "category": category,
+        "data_quality": quality,
+        "year": int(stamp[:4]) if stamp[:4].isdigit() else 0,
+        "export_diversification": float(len(markets)),
+        "product_diversification": product_diversification(products, trade_products),
+        "data_reliability": 0.0 if quality in LOW_QUALITY else 1.0,
+        "bds_compliance": BDS_SCORES.get(status, 0.0),
+        "certification_coverage": certification_count(
+            list(verified.get("certifications", [])) + list(record.get("tags", [])) +
+            [record.get("description", ""), verified.get("notes", "")])
+    }
+
+
+def load_entities(data_file=DATA_FILE, directory=None, gazetteer=None):
+    """Entity rows for every scanned business and product listing, enriched from the directory"""
+    from gazetteer import get_gazetteer
+
+    if directory is None:
+        from business_directory import build_directory
+        directory = build_directory()
+    gazetteer = gazetteer or get_gazetteer()
+    with open(data_file, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    trade_markets, trade_products = _trade_reference(data.get("trade", []))
+    bds = {name_key(r.get("company", "")): r.get("bds_status") for r in data.get("bds", [])}
+
+    rows = []
+    seen = set()
+    for record in data.get("businesses", []):
+        verified = directory.get(record.get("name", "")) or {}
+        seen.add(verified.get("key"))
+        rows.append(entity_row(record, gazetteer, trade_markets, trade_products,
+                               bds.get(name_key(record.get("name", ""))), verified))
+    for record in data.get("products", []):
+        rows.append(entity_row(record, gazetteer, trade_markets, trade_products))
+    for key, verified in directory.records.items():
+        if key not in seen:
+            rows.append(entity_row({}, gazetteer, trade_markets, trade_products, bds.get(key), verified))
+    return rows
+
+
+def synthetic_table(n_entities, seed=0):
+    """Random EntityTable for benchmarking"""
+    rng = np.random.default_rng(seed)
+    sizes = {"locality": 48, "governorate": 16, "region": 3, "category": 6, "data_quality": 6, "year": 5}
+    codes = {column: rng.integers(0, size, n_entities).astype(np.int32) for column, size in sizes.items()}
+    labels = {column: [f"{column}_{i}" for i in range(size)] for column, size in sizes.items()}
+    raw = np.column_stack([rng.integers(0, 8, n_entities), rng.random(n_entities),
+                           rng.random(n_entities) < 0.7, rng.choice([0.0, 0.5, 1.0], n_entities),
+                           rng.integers(0, 4, n_entities)]).astype(np.float64)
+    raw[rng.random(n_entities) < 0.05, 1] = np.nan
+    return EntityTable(range(n_entities), codes, labels, raw)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compute the composite resilience index")
+    parser.add_argument("--by", nargs="+", default=["region"], choices=GROUP_COLUMNS)
+    parser.add_argument("--weights", default=None, help='JSON weights, e.g. \'{"bds_compliance": 0.4}\'')
+    parser.add_argument("--benchmark", type=int, metavar="ENTITIES", help="Time scoring on synthetic entities")
+    parser.add_argument("--bootstrap", type=int, nargs="?", const=BOOTSTRAP_REPLICATES, metavar="REPLICATES",
+                        help="Add bootstrap confidence intervals to the group scores")
+    parser.add_argument("--quality-weighted", action="store_true",
+                        help="Down-weight fallback/mock records in the bootstrap")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--incremental", action="store_true",
+                        help=f"Apply only the changes since the last run (running state in {STATE_FILE})")
+    parser.add_argument("--cube", action="store_true", help=f"Materialize the rollup cube into {CUBE_FILE}")
+    parser.add_argument("--slice", nargs="*", metavar="COLUMN=VALUE",
+                        help="Answer a slice from the rollup cube, e.g. governorate=Hebron year=2026")
+    parser.add_argument("--output", default=str(OUTPUT_FILE))
+    args = parser.parse_args()
+
+    print("="*60)
+    print("🛡️  RESILIENCE INDEX")
+    print("="*60)
+
+    index = ResilienceIndex(json.loads(args.weights) if args.weights else None)
+    if args.benchmark:
+        table = synthetic_table(args.benchmark)
+        start = time.perf_counter()
+        index.score(table)
+        index.aggregate(table, args.by)
+        print(f"\n⏱️  {args.benchmark:,} entities scored and grouped in {time.perf_counter() - start:.3f}s")
+        if args.bootstrap:
+            start = time.perf_counter()
+            bootstrap_intervals(table, args.by, args.bootstrap, weighted=args.quality_weighted, workers=args.workers)
+            print(f"⏱️  {args.bootstrap:,} bootstrap replicates per group in {time.perf_counter() - start:.3f}s")
+        return
+
+    if args.slice is not None:
+        cube = ResilienceCube.load(CUBE_FILE, index) if CUBE_FILE.exists() else None
+        if cube is None:
+            rows = load_entities()
+            cube = ResilienceCube(index).build(EntityTable.from_rows(rows))
+            cube.revision = entities_digest(rows)
+            cube.save(CUBE_FILE)
+        filters = dict(spec.split("=", 1) for spec in args.slice)
+        cell = cube.slice(**filters)
+        print(f"\n🧊 {filters or 'all entities'}: " + (json.dumps(cell, ensure_ascii=False) if cell else "no entities"))
+        return
+
+    if args.cube:
+        rows = load_entities()
+        table = EntityTable.from_rows(rows)
+        cube = ResilienceCube(index).build(table)
+        cube.revision = entities_digest(rows)
+        cube.save(CUBE_FILE)
+        print(f"\n🧊 {len(cube.count):,} cube cells over {len(table)} entities")
+        print(f"💾 Saved to: {CUBE_FILE}")
+        return
+
+    if args.incremental:
+        rows = load_entities()
+        if STATE_FILE.exists():
+            incremental = IncrementalResilienceIndex.restore(STATE_FILE, index, [args.by])
+        else:
+            incremental = IncrementalResilienceIndex(index, [args.by]).load([])
+        previous = {entity_id: row for entity_id, (row, _) in incremental.entities.items()}
+        changes = diff_entities(previous, rows)
+        summary = incremental.apply(changes)
+        if CUBE_FILE.exists():
+            # The changelog only applies to a cube holding exactly the previous rows; a cube
+            # built from other rows (e.g. by --cube after the data changed) is rebuilt instead
+            cube = ResilienceCube.load(CUBE_FILE, index)
+            if previous and cube.revision == entities_digest(previous.values()):
+                removed = [previous[change["id"]] for change in changes if change["op"] != "insert"]
+                added = [change["row"] for change in changes if change["op"] != "delete"]
+                cube.refresh(EntityTable.from_rows(added), EntityTable.from_rows(removed),
+                             current=EntityTable.from_rows(rows))
+            else:
+                cube = ResilienceCube(index).build(EntityTable.from_rows(rows))
+            cube.revision = entities_digest(rows)
+            cube.save(CUBE_FILE)
+        work = "full rebuild (bounds moved)" if summary["rebuilt"] else f"{summary['groups_rescored']} groups rescored"
+        print(f"\n♻️  {summary['insert']} inserted, {summary['update']} updated, {summary['delete']} deleted; {work}")
+        for row in incremental.rows(args.by):
+            label = " / ".join(str(row[column]) for column in args.by)
+            print(f"   • {label}: {row['composite']} ({row['entities']} entities)")
+        incremental.save(STATE_FILE)
+        return
+
+    table = EntityTable.from_rows(load_entities())
+    scores = index.score(table)
+    rows = aggregate_rows(index.aggregate(table, args.by))
+    if args.bootstrap:
+        rows = bootstrap_intervals(table, args.by, args.bootstrap, weighted=args.quality_weighted,
+                                   workers=args.workers, index=index)
+    print(f"\n✅ {len(table)} entities, {len(rows)} groups by {', '.join(args.by)}")
+    for row in rows:
+        label = " / ".join(str(row[column]) for column in args.by)
+        interval = f" [{row['ci_low']}, {row['ci_high']}]" if "ci_low" in row else ""
+        print(f"   • {label}: {row['composite']}{interval} ({row['entities']} entities)")
+
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"weights": dict(zip(INDICATORS, index.weights.tolist())), "by": args.by, "groups": rows,
+                   "entities": [{"id": entity_id, "composite": None if np.isnan(score) else round(float(score), 4)}
+                                for entity_id, score in zip(table.ids, scores["composite"])]},
+                  f, ensure_ascii=False, indent=2, default=str)
+    print(f"💾 Saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
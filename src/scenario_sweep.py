@@ -0,0 +1,266 @@
+"""
+SCENARIO SWEEP RUNNER
+Runs a Monte Carlo simulation per cell of a parameter grid, memoizing cells in a content-addressed cache
+"""
+
+import csv
+import hashlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from monte_carlo_simulation import (DEFAULT_MODEL, DEFAULT_YEARS, DISTRIBUTIONS, MODEL_VERSION, PERCENTILES,
+                                    MonteCarloSimulator, load_trade_products, merge_model)
+
+# Configuration
+CACHE_DIR = Path("data/processed/.scenario_cache")
+OUTPUT_DIR = Path("data/processed")
+DEFAULT_PATHS = 200000
+
+
+def _olive_yield(products, value):
+    """Harvest yield multiplier on olive-based products' export volume"""
+    for product in products:
+        if "olive" in product["product"].lower():
+            product["export_value_usd"] *= value
+
+
+def _eu_price(products, value):
+    """Relative EU price change, applied to the EU share of each product's markets"""
+    for product in products:
+        markets = [m.upper() for m in product.get("main_markets", [])]
+        if "EU" in markets:
+            product["export_value_usd"] *= 1.0 + value / len(markets)
+
+
+# Named scenario parameters that adjust the product inputs; any other parameter is a dotted
+# path into the revenue model (e.g. "disruption.prob", "growth.sd", "disruption.loss.high")
+SCENARIO_ADJUSTERS = {
+    "olive_yield": _olive_yield,
+    "eu_price": _eu_price
+}
+PARAMETER_ALIASES = {"border_closure_prob": "disruption.prob"}
+# Parameters each distribution needs (see transform); any distribution spec may take any of them
+DIST_FIELDS = {"normal": {"sd"}, "lognormal": {"sigma"}, "uniform": {"low", "high"},
+               "triangular": {"low", "mode", "high"}, "constant": set()}
+SPEC_FIELDS = {"dist", "mean", "mu", "value"}.union(*DIST_FIELDS.values())
+
+
+def normalize_params(params):
+    """Canonical parameter dict: aliases resolved, numbers as floats, sorted keys"""
+    normalized = {}
+    for name, value in params.items():
+        name = PARAMETER_ALIASES.get(name, name)
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            pass
+        normalized[name] = value
+    return dict(sorted(normalized.items()))
+
+
+def expand_grid(grid):
+    """Cartesian product of {param: [values]} as a list of parameter dicts, in grid order"""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _override(model, name, value):
+    """Set one dotted model parameter in the overrides dict, checked against DEFAULT_MODEL"""
+    *path, field = name.split(".")
+    spec = DEFAULT_MODEL
+    for part in path:
+        spec = spec.get(part) if isinstance(spec, dict) else None
+        if not isinstance(spec, dict):
+            raise ValueError(f"Unknown scenario parameter: {name}")
+    if not path or (field not in spec and not ("dist" in spec and field in SPEC_FIELDS)):
+        raise ValueError(f"Unknown scenario parameter: {name}")
+    if isinstance(spec.get(field), dict):
+        raise ValueError(f"{name} is a distribution; set its fields instead (e.g. {name}.high)")
+    if field == "dist" and value not in DIST_FIELDS:
+        raise ValueError(f"Unknown distribution for {name}: {value}")
+    if field != "dist" and not _is_number(value):
+        raise ValueError(f"{name} must be a number, got: {value!r}")
+    for part in path:
+        model = model.setdefault(part, {})
+    model[field] = value
+
+
+def _check_specs(spec, name="model"):
+    """Every distribution spec in the merged model has the parameters its dist needs"""
+    if "dist" in spec:
+        missing = DIST_FIELDS.get(spec["dist"], set()) - set(spec)
+        if spec["dist"] not in DISTRIBUTIONS or missing:
+            raise ValueError(f"{name}: {spec['dist']} distribution needs {', '.join(sorted(missing))}")
+    for key, value in spec.items():
+        if isinstance(value, dict):
+            _check_specs(value, key if name == "model" else f"{name}.{key}")
+
+
+def apply_scenario(products, params):
+    """(adjusted products, model overrides) for one cell; ValueError for a parameter the model cannot take"""
+    products = [dict(product) for product in products]
+    model = {}
+    for name, value in params.items():
+        if name in SCENARIO_ADJUSTERS:
+            SCENARIO_ADJUSTERS[name](products, value)
+        else:
+            _override(model, name, value)
+    _check_specs(merge_model(model))
+    return products, model
+
+
+def cell_key(params, settings, products):
+    """Content address of a cell: parameters, seed and run settings, inputs and model version"""
+    payload = json.dumps({"params": params, "settings": settings, "products": products,
+                          "version": MODEL_VERSION}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _run_cell(products, params, settings):
+    """Worker: one full Monte Carlo run for a cell"""
+    cell_products, model = apply_scenario(products, params)
+    simulator = MonteCarloSimulator(cell_products, settings["years"], model, sampler=settings["sampler"],
+                                    batch_paths=settings["batch_paths"])
+    result = simulator.run(settings["paths"], settings["seed"])
+    return {"params": params, "seconds": result["seconds"], "products": simulator.report(result)}
+
+
+class ScenarioSweep:
+    """Expands grids, skips duplicate and cached cells, runs the rest in parallel"""
+
+    def __init__(self, products=None, paths=DEFAULT_PATHS, years=DEFAULT_YEARS, seed=0, sampler="random",
+                 batch_paths=None, cache_dir=CACHE_DIR, workers=None):
+        self.products = products if products is not None else load_trade_products()
+        self.settings = {"paths": paths, "years": years, "seed": seed, "sampler": sampler,
+                         "batch_paths": batch_paths or min(paths, 65536)}
+        self.cache_dir = Path(cache_dir)
+        self.workers = workers
+
+    def _cache_path(self, key):
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _load(self, key):
+        path = self._cache_path(key)
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, key, result):
+        path = self._cache_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def run(self, grid):
+        """Run a grid ({param: [values]}) or an explicit list of cells; returns cells in input order"""
+        cells = expand_grid(grid) if isinstance(grid, dict) else list(grid)
+        start = time.perf_counter()
+
+        keys = []
+        unique = {}
+        for params in cells:
+            params = normalize_params(params)
+            apply_scenario(self.products, params)   # fail on an unknown parameter before any cell runs
+            key = cell_key(params, self.settings, self.products)
+            keys.append(key)
+            unique.setdefault(key, params)
+
+        results = {}
+        todo = []
+        for key, params in unique.items():
+            cached = self._load(key)
+            if cached is None:
+                todo.append(key)
+            else:
+                results[key] = cached
+
+        workers = max(1, min(self.workers or os.cpu_count() or 1, len(todo) or 1))
+        if workers == 1:
+            for key in todo:
+                results[key] = _run_cell(self.products, unique[key], self.settings)
+                self._store(key, results[key])
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {key: pool.submit(_run_cell, self.products, unique[key], self.settings) for key in todo}
+                for key, future in futures.items():
+                    results[key] = future.result()
+                    self._store(key, results[key])
+
+        return {"cells": [{"key": key[:16], **results[key]} for key in keys],
+                "computed": len(todo), "cached": len(unique) - len(todo), "duplicates": len(cells) - len(unique),
+                "seconds": round(time.perf_counter() - start, 3)}
+
+
+def sweep_table(sweep):
+    """One row per cell and product: parameters, then final-year and horizon-total revenue stats"""
+    rows = []
+    for cell in sweep["cells"]:
+        for product in cell["products"]:
+            row = {**cell["params"], "product": product["product"]}
+            for output in ("final", "total"):
+                row[f"{output}_mean_usd"] = product[output]["mean"]
+                for q in PERCENTILES:
+                    row[f"{output}_p{q}_usd"] = product[output][f"p{q}"]
+            rows.append(row)
+    return rows
+
+
+def parse_grid(specs):
+    """['disruption.prob=0.05,0.15', 'olive_yield=0.6,1'] -> {param: [values]}"""
+    grid = {}
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        if not values:
+            raise ValueError(f"Expected name=v1,v2,... but got: {spec}")
+        grid[name.strip()] = [v.strip() for v in values.split(",") if v.strip()]
+    return grid
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sweep Monte Carlo export scenarios over a parameter grid")
+    parser.add_argument("grid", nargs="+", help="name=v1,v2,... e.g. border_closure_prob=0.05,0.2 "
+                                                "olive_yield=0.6,1.0 eu_price=-0.1,0,0.1")
+    parser.add_argument("--paths", type=int, default=DEFAULT_PATHS)
+    parser.add_argument("--years", type=int, default=DEFAULT_YEARS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default=str(OUTPUT_DIR / "scenario_sweep.csv"))
+    args = parser.parse_args()
+
+    print("="*60)
+    print("🧭 SCENARIO SWEEP")
+    print("="*60)
+
+    sweep = ScenarioSweep(paths=args.paths, years=args.years, seed=args.seed, workers=args.workers)
+    result = sweep.run(parse_grid(args.grid))
+    print(f"\n✅ {len(result['cells'])} cells: {result['computed']} computed, {result['cached']} cached, "
+          f"{result['duplicates']} duplicates in {result['seconds']}s")
+
+    rows = sweep_table(result)
+    fieldnames = list(dict.fromkeys(key for row in rows for key in row))
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"💾 Saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
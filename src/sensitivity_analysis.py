@@ -0,0 +1,186 @@
+"""
+SOBOL SENSITIVITY ANALYSIS
+First-order and total Sobol indices of simulated export revenue per input factor (Saltelli sampling)
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+from monte_carlo_simulation import DEFAULT_YEARS, MODEL_VERSION, RevenueModel, draws_from_uniforms, load_trade_products
+
+# Configuration
+CACHE_DIR = Path("data/processed/.sensitivity_cache")
+OUTPUT_FILE = Path("data/processed/sensitivity_indices.json")
+BASE_SAMPLES = 8192          # N: the analysis costs N x (factors + 2) model evaluations
+EVAL_BATCH = 4096
+
+# Input factors as groups of the revenue model's standard variates
+FACTORS = {
+    "growth": ("growth",),
+    "price": ("price",),
+    "market_access": ("hit", "loss"),
+    "certification": ("delay",)
+}
+
+# Outputs are functions of annual revenue (products, n, years) -> (series, n). Evaluations are
+# cached as annual revenue, so new outputs never need new simulations.
+OUTPUTS = {
+    "final": lambda revenue: revenue[:, :, -1],
+    "total": lambda revenue: revenue.sum(axis=2),
+    "worst_year": lambda revenue: revenue.min(axis=2),
+    "portfolio_total": lambda revenue: revenue.sum(axis=(0, 2))[None, :]
+}
+
+
+def factor_columns(model, factors=FACTORS):
+    """Unit-cube column indices of each factor, plus the total dimension"""
+    columns = {}
+    offset = 0
+    for name, _, (rows, years) in model.dimensions:
+        columns[name] = np.arange(offset, offset + rows * years)
+        offset += rows * years
+    return {factor: np.concatenate([columns[name] for name in names])
+            for factor, names in factors.items()}, offset
+
+
+def sobol_indices(y_a, y_b, y_ab):
+    """First-order (Saltelli 2010) and total (Jansen) indices per series from (series, N) arrays"""
+    variance = np.concatenate([y_a, y_b], axis=1).var(axis=1)
+    safe = np.where(variance > 0, variance, 1.0)
+    first = np.mean(y_b * (y_ab - y_a), axis=1) / safe
+    total = 0.5 * np.mean(np.square(y_a - y_ab), axis=1) / safe
+    zero = variance <= 0
+    first[zero] = 0.0
+    total[zero] = 0.0
+    return first, total, variance
+
+
+class SensitivityAnalysis:
+    """Saltelli design over factor groups; model evaluations are cached in memory and on disk"""
+
+    def __init__(self, products=None, years=DEFAULT_YEARS, model=None, n_base=BASE_SAMPLES, seed=0,
+                 factors=FACTORS, cache_dir=CACHE_DIR, batch_size=EVAL_BATCH):
+        self.model = RevenueModel(products if products is not None else load_trade_products(), years, model)
+        self.n_base = n_base
+        self.seed = seed
+        self.factors = dict(factors)
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.batch_size = batch_size
+        self.columns, self.dims = factor_columns(self.model, self.factors)
+        self._evaluations = None
+        self.stats = {"evaluations": 0, "cache": "miss", "seconds": 0.0}
+
+    def key(self):
+        payload = json.dumps({"version": MODEL_VERSION, "model": self.model.model, "names": self.model.names,
+                              "base": self.model.base.tolist(), "growth": self.model.growth_mean.tolist(),
+                              "years": self.model.years, "n": self.n_base, "seed": self.seed,
+                              "factors": {k: list(v) for k, v in self.factors.items()}}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:24]
+
+    def _base_samples(self):
+        """N x 2D points: scrambled Sobol when scipy is available, else pseudo-random"""
+        try:
+            from scipy.stats import qmc
+        except ImportError:
+            return np.random.default_rng(self.seed).random((self.n_base, 2 * self.dims))
+        return qmc.Sobol(2 * self.dims, scramble=True, rng=self.seed).random(self.n_base)
+
+    def _evaluate(self, points):
+        batches = []
+        for start in range(0, len(points), self.batch_size):
+            batches.append(self.model.revenue(draws_from_uniforms(self.model, points[start:start + self.batch_size])))
+        self.stats["evaluations"] += len(points)
+        return np.concatenate(batches, axis=1)
+
+    def evaluations(self):
+        """Annual revenue for matrices A, B and each AB_factor, simulated once per design"""
+        if self._evaluations is not None:
+            return self._evaluations
+        path = self.cache_dir / f"{self.key()}.npz" if self.cache_dir else None
+        if path is not None and path.exists():
+            with np.load(path) as data:
+                self._evaluations = {name: data[name] for name in data.files}
+            if set(self._evaluations) == {"A", "B", *self.factors}:
+                self.stats["cache"] = "disk"
+                return self._evaluations
+
+        start = time.perf_counter()
+        base = self._base_samples()
+        a, b = base[:, :self.dims], base[:, self.dims:]
+        evaluations = {"A": self._evaluate(a), "B": self._evaluate(b)}
+        for factor, columns in self.columns.items():
+            ab = a.copy()
+            ab[:, columns] = b[:, columns]
+            evaluations[factor] = self._evaluate(ab)
+        self.stats["seconds"] = round(time.perf_counter() - start, 3)
+        self._evaluations = evaluations
+
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            with open(tmp, "wb") as f:
+                np.savez(f, **evaluations)
+            os.replace(tmp, path)
+        return evaluations
+
+    def indices(self, outputs=("final", "total")):
+        """{output: [{series, variance, factors: {factor: {S1, ST}}}]} for named or callable outputs"""
+        evaluations = self.evaluations()
+        results = {}
+        for output in outputs:
+            func = OUTPUTS[output] if isinstance(output, str) else output
+            name = output if isinstance(output, str) else getattr(output, "__name__", "output")
+            y_a = func(evaluations["A"]).astype(np.float64)
+            y_b = func(evaluations["B"]).astype(np.float64)
+            labels = self.model.names if len(y_a) == len(self.model.names) else ["All products"]
+            rows = [{"series": label, "factors": {}} for label in labels]
+            for factor in self.factors:
+                first, total, variance = sobol_indices(y_a, y_b, func(evaluations[factor]).astype(np.float64))
+                for i, row in enumerate(rows):
+                    row["variance"] = float(variance[i])
+                    row["factors"][factor] = {"S1": round(float(first[i]), 4), "ST": round(float(total[i]), 4)}
+            results[name] = rows
+        return results
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sobol sensitivity of export revenue to model inputs")
+    parser.add_argument("--samples", type=int, default=BASE_SAMPLES, help="Base samples N (power of two)")
+    parser.add_argument("--years", type=int, default=DEFAULT_YEARS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--outputs", nargs="+", choices=sorted(OUTPUTS), default=["final", "total", "portfolio_total"])
+    parser.add_argument("--output", default=str(OUTPUT_FILE))
+    args = parser.parse_args()
+
+    print("="*60)
+    print("🔬 SOBOL SENSITIVITY ANALYSIS")
+    print("="*60)
+
+    analysis = SensitivityAnalysis(years=args.years, n_base=args.samples, seed=args.seed)
+    results = analysis.indices(args.outputs)
+    stats = analysis.stats
+    print(f"\n✅ {stats['evaluations']:,} model evaluations ({stats['cache']} cache) in {stats['seconds']}s")
+
+    for output, rows in results.items():
+        print(f"\n📊 {output}:")
+        for row in rows:
+            ranked = sorted(row["factors"].items(), key=lambda item: -item[1]["ST"])
+            print(f"   • {row['series']}: " + " | ".join(
+                f"{factor} S1 {values['S1']:.2f} ST {values['ST']:.2f}" for factor, values in ranked))
+
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"samples": args.samples, "years": args.years, "seed": args.seed,
+                   "model": analysis.model.model, "indices": results}, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
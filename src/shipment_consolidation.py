@@ -0,0 +1,320 @@
+"""
+SHIPMENT CONSOLIDATION PLANNER
+Packs order lines from several producers into cartons and pallets, grouped by pickup area and ready date
+"""
+
+import csv
+import json
+import math
+import time
+from datetime import date, timedelta
+from functools import lru_cache
+from itertools import permutations
+from pathlib import Path
+
+from business_directory import build_directory
+from gazetteer import SpatialIndex, get_gazetteer
+from trade_terms import parse_lead_time_days
+
+# Configuration
+INVENTORY_FILE = Path("data/processed/master_product_inventory.json")
+OUTPUT_FILE = Path("data/processed/shipping_plan.json")
+
+# Standard export carton and EUR pallet
+CARTON = {"inner_cm": (58, 38, 38), "outer_cm": (60, 40, 40), "max_kg": 25.0, "tare_kg": 0.6}
+PALLET = {"footprint_cm": (120, 80), "max_load_height_cm": 145, "max_kg": 1000.0, "tare_kg": 25.0, "height_cm": 15}
+MIXED_FILL = 0.8            # usable share of carton volume when mixing SKUs
+DEFAULT_DIMENSIONS_CM = (20, 15, 10)
+DEFAULT_WEIGHT_KG = 0.5
+DEFAULT_LEAD_DAYS = 21
+SEASONAL_LEAD_DAYS = 60
+
+PICKUP_RADIUS_KM = 15.0
+READY_WINDOW_DAYS = 7
+
+# Rough planning rates (USD): courier per chargeable kg, consolidated freight per pallet
+FREIGHT_RATES = {
+    "EU": {"courier_per_kg": 8.0, "per_pallet": 280.0},
+    "UK": {"courier_per_kg": 8.0, "per_pallet": 300.0},
+    "USA": {"courier_per_kg": 11.0, "per_pallet": 420.0},
+    "Canada": {"courier_per_kg": 11.0, "per_pallet": 440.0},
+    "Middle East": {"courier_per_kg": 5.0, "per_pallet": 180.0},
+    "Japan": {"courier_per_kg": 12.0, "per_pallet": 480.0}
+}
+DEFAULT_RATES = {"courier_per_kg": 12.0, "per_pallet": 500.0}
+PICKUP_COST_PER_STOP = 25.0
+VOLUMETRIC_DIVISOR = 5000   # courier volumetric weight: cm3 / 5000
+
+
+@lru_cache(maxsize=4096)
+def units_per_carton(dimensions_cm, weight_kg, inner_cm=CARTON["inner_cm"], max_kg=CARTON["max_kg"],
+                     tare_kg=CARTON["tare_kg"]):
+    """Most units of one SKU fitting a carton as an aligned grid, over all six orientations, net of carton tare"""
+    best = 0
+    for l, w, h in set(permutations(dimensions_cm)):
+        best = max(best, (inner_cm[0] // l) * (inner_cm[1] // w) * (inner_cm[2] // h))
+    if weight_kg > 0:
+        best = min(best, int((max_kg - tare_kg) // weight_kg))
+    return int(best)
+
+
+def cartons_per_pallet(carton_cm=CARTON["outer_cm"], pallet=PALLET):
+    """Cartons per pallet: best footprint grid times layers"""
+    length, width = pallet["footprint_cm"]
+    per_layer = max((length // carton_cm[0]) * (width // carton_cm[1]),
+                    (length // carton_cm[1]) * (width // carton_cm[0]))
+    return int(per_layer * (pallet["max_load_height_cm"] // carton_cm[2]))
+
+
+def pack_lines(lines):
+    """Pack {sku: (quantity, dimensions_cm, weight_kg)} into full single-SKU and mixed cartons"""
+    carton_volume = CARTON["inner_cm"][0] * CARTON["inner_cm"][1] * CARTON["inner_cm"][2]
+    cartons = []
+    oversize = []
+    leftovers = []
+
+    mixed_volume = carton_volume * MIXED_FILL
+    mixed_kg = CARTON["max_kg"] - CARTON["tare_kg"]
+
+    def flag(sku, quantity, dimensions, weight):
+        oversize.append({"sku": sku, "units": quantity, "dimensions_cm": list(dimensions),
+                         "weight_kg": round(quantity * weight, 2)})
+
+    for sku, (quantity, dimensions, weight) in lines.items():
+        if quantity <= 0:
+            raise ValueError(f"Quantity must be positive for {sku}: {quantity}")
+        per = units_per_carton(tuple(dimensions), weight)
+        if per == 0:
+            flag(sku, quantity, dimensions, weight)
+            continue
+        full, rest = divmod(quantity, per)
+        cartons.extend({"contents": {sku: per}, "weight_kg": per * weight + CARTON["tare_kg"]}
+                       for _ in range(full))
+        if rest:
+            leftovers.append((dimensions[0] * dimensions[1] * dimensions[2], weight, sku, rest))
+
+    # First-fit decreasing by unit volume for the remainders
+    mixed = []
+    for volume, weight, sku, count in sorted(leftovers, reverse=True):
+        for carton in mixed:
+            if count == 0:
+                break
+            fit = min(count, int(carton["free_volume"] // volume),
+                      int((CARTON["max_kg"] - carton["weight_kg"]) // weight) if weight else count)
+            if fit > 0:
+                carton["contents"][sku] = carton["contents"].get(sku, 0) + fit
+                carton["free_volume"] -= fit * volume
+                carton["weight_kg"] += fit * weight
+                count -= fit
+        # A unit too big or heavy for a fresh mixed carton is shipped loose, never forced into one
+        fresh = min(int(mixed_volume // volume), int(mixed_kg // weight) if weight else count)
+        if count and fresh == 0:
+            flag(sku, count, lines[sku][1], weight)
+            continue
+        while count > 0:
+            fit = min(count, fresh)
+            mixed.append({"contents": {sku: fit}, "weight_kg": CARTON["tare_kg"] + fit * weight,
+                          "free_volume": mixed_volume - fit * volume})
+            count -= fit
+
+    for carton in mixed:
+        del carton["free_volume"]
+    cartons.extend(mixed)
+    for carton in cartons:
+        carton["weight_kg"] = round(carton["weight_kg"], 2)
+    return cartons, oversize
+
+
+def estimate_cost(destination, cartons, oversize, pickup_stops):
+    """Cheaper of courier (by chargeable weight) and palletised freight, plus pickups"""
+    rates = FREIGHT_RATES.get(destination, DEFAULT_RATES)
+    outer = CARTON["outer_cm"]
+    weight = sum(c["weight_kg"] for c in cartons) + sum(item["weight_kg"] for item in oversize)
+    volume_cm3 = len(cartons) * outer[0] * outer[1] * outer[2]
+    volume_cm3 += sum(math.prod(item["dimensions_cm"]) * item["units"] for item in oversize)
+
+    chargeable = max(weight, volume_cm3 / VOLUMETRIC_DIVISOR)
+    courier = chargeable * rates["courier_per_kg"]
+
+    per_pallet = cartons_per_pallet()
+    pallets = max(math.ceil(len(cartons) / per_pallet),
+                  math.ceil(weight / (PALLET["max_kg"] - PALLET["tare_kg"]))) if weight else 0
+    pallet_volume = math.prod(PALLET["footprint_cm"]) * PALLET["max_load_height_cm"]
+    pallets += math.ceil(sum(math.prod(item["dimensions_cm"]) * item["units"] for item in oversize) / pallet_volume)
+    freight = pallets * rates["per_pallet"]
+
+    mode, cost = ("courier", courier) if courier <= freight or pallets == 0 else ("pallet", freight)
+    return {
+        "mode": mode,
+        "pallets": pallets if mode == "pallet" else 0,
+        "gross_weight_kg": round(weight + (pallets * PALLET["tare_kg"] if mode == "pallet" else 0), 2),
+        "volume_m3": round(volume_cm3 / 1e6, 3),
+        "chargeable_weight_kg": round(chargeable, 2),
+        "estimated_cost_usd": round(cost + pickup_stops * PICKUP_COST_PER_STOP, 2)
+    }
+
+
+def load_inventory(path=INVENTORY_FILE):
+    """SKU -> (title, dimensions_cm, weight_kg)"""
+    products = {}
+    if Path(path).exists():
+        with open(path, "r", encoding="utf-8") as f:
+            for item in json.load(f):
+                dims = item["inventory"].get("dimensions_cm") or {}
+                dimensions = tuple(int(math.ceil(dims.get(k, d)))
+                                   for k, d in zip(("length", "width", "height"), DEFAULT_DIMENSIONS_CM))
+                products[item["sku"]] = (item["product_info"]["title"], dimensions,
+                                         float(item["inventory"].get("weight_kg") or DEFAULT_WEIGHT_KG))
+    return products
+
+
+def iter_order_lines(orders_csv):
+    with open(orders_csv, "r", newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            yield {k.strip().lower(): (v or "").strip() for k, v in row.items() if k}
+
+
+class ConsolidationPlanner:
+    """Groups order lines into shipments and packs each one"""
+
+    def __init__(self, inventory_file=INVENTORY_FILE, directory=None,
+                 pickup_radius_km=PICKUP_RADIUS_KM, ready_window_days=READY_WINDOW_DAYS):
+        self.products = load_inventory(inventory_file)
+        self.directory = directory if directory is not None else build_directory()
+        self.gazetteer = get_gazetteer()
+        self.pickup_radius_km = pickup_radius_km
+        self.ready_window_days = ready_window_days
+
+    def _ready_date(self, line, producer, order_date):
+        if line.get("ready_date"):
+            return date.fromisoformat(line["ready_date"])
+        lead = producer.get("lead_time", "")
+        days = parse_lead_time_days(lead, SEASONAL_LEAD_DAYS if "season" in str(lead).lower() else DEFAULT_LEAD_DAYS)
+        start = date.fromisoformat(line["order_date"]) if line.get("order_date") else order_date
+        return start + timedelta(days=days)
+
+    def _pickup_clusters(self, locations):
+        """Group pickup locations lying within pickup_radius_km of a cluster seed"""
+        index = SpatialIndex()
+        clusters = {}
+        for location in sorted(locations):
+            place = self.gazetteer.lookup(location)
+            if place is None:
+                clusters[location] = location
+            else:
+                index.insert(location, place["lat"], place["lon"], place)
+        for location in sorted(index.items):
+            if location in clusters:
+                continue
+            lat, lon, place = index.items[location]
+            for _, member, _ in index.within(lat, lon, self.pickup_radius_km):
+                clusters.setdefault(member, place["name_en"])
+        return clusters
+
+    def plan(self, order_lines, order_date=None):
+        """Shipping plan: one shipment per (destination, pickup area, ready window)"""
+        order_date = order_date or date.today()
+        errors = []
+        resolved = []
+        for row_no, line in enumerate(order_lines, start=1):
+            producer = self.directory.get(line.get("producer", ""))
+            product = self.products.get(line.get("sku", ""))
+            if producer is None or product is None:
+                missing = "producer" if producer is None else "sku"
+                errors.append({"row": row_no, "error": f"Unknown {missing}: {line.get(missing, '')}"})
+                continue
+            try:
+                quantity = int(float(line["quantity"]))
+                if quantity <= 0:
+                    raise ValueError(f"Quantity must be positive: {line['quantity']}")
+                ready = self._ready_date(line, producer, order_date)
+            except (KeyError, ValueError) as e:
+                errors.append({"row": row_no, "error": str(e)})
+                continue
+            resolved.append((line.get("destination") or "Unknown", producer, line["sku"], quantity, ready))
+
+        clusters = self._pickup_clusters({p.get("location", "Palestine") for _, p, _, _, _ in resolved})
+
+        # Ready-date windows per (destination, pickup area): a window opens at its earliest ready date
+        grouped = {}
+        for destination, producer, sku, quantity, ready in sorted(resolved, key=lambda r: r[4]):
+            area = clusters[producer.get("location", "Palestine")]
+            windows = grouped.setdefault((destination, area), [])
+            if not windows or (ready - windows[-1]["opens"]).days > self.ready_window_days:
+                windows.append({"opens": ready, "ready": ready, "lines": {}, "producers": set()})
+            window = windows[-1]
+            window["ready"] = max(window["ready"], ready)
+            window["producers"].add(producer["name"])
+            _, dimensions, weight = self.products[sku]
+            count = window["lines"].get(sku, (0,))[0]
+            window["lines"][sku] = (count + quantity, dimensions, weight)
+
+        shipments = []
+        for (destination, area), windows in sorted(grouped.items()):
+            for window in windows:
+                cartons, oversize = pack_lines(window["lines"])
+                shipment = {
+                    "destination": destination,
+                    "pickup_area": area,
+                    "producers": sorted(window["producers"]),
+                    "ready_date": window["ready"].isoformat(),
+                    "units": sum(q for q, _, _ in window["lines"].values()),
+                    "cartons": len(cartons),
+                    "oversize_items": oversize,
+                    "carton_contents": [c["contents"] for c in cartons]
+                }
+                shipment.update(estimate_cost(destination, cartons, oversize, len(window["producers"])))
+                shipments.append(shipment)
+
+        return {
+            "shipments": shipments,
+            "errors": errors,
+            "totals": {
+                "order_lines": len(resolved) + len(errors),
+                "shipments": len(shipments),
+                "cartons": sum(s["cartons"] for s in shipments),
+                "pallets": sum(s["pallets"] for s in shipments),
+                "estimated_cost_usd": round(sum(s["estimated_cost_usd"] for s in shipments), 2)
+            }
+        }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Consolidate producer orders into a shipping plan")
+    parser.add_argument("orders_csv", help="CSV with producer, sku, quantity, destination [, ready_date, order_date]")
+    parser.add_argument("--radius", type=float, default=PICKUP_RADIUS_KM, help="Pickup grouping radius (km)")
+    parser.add_argument("--window", type=int, default=READY_WINDOW_DAYS, help="Ready-date window (days)")
+    parser.add_argument("--output", default=str(OUTPUT_FILE))
+    args = parser.parse_args()
+
+    print("="*60)
+    print("🚚 SHIPMENT CONSOLIDATION PLAN")
+    print("="*60)
+
+    planner = ConsolidationPlanner(pickup_radius_km=args.radius, ready_window_days=args.window)
+    start = time.perf_counter()
+    plan = planner.plan(iter_order_lines(args.orders_csv))
+    seconds = time.perf_counter() - start
+
+    for shipment in plan["shipments"]:
+        print(f"\n📦 {shipment['destination']} from {shipment['pickup_area']} (ready {shipment['ready_date']})")
+        print(f"   Producers: {', '.join(shipment['producers'])}")
+        print(f"   {shipment['units']} units in {shipment['cartons']} cartons, {shipment['mode']}"
+              f"{' x' + str(shipment['pallets']) if shipment['pallets'] else ''}: ~${shipment['estimated_cost_usd']:,.2f}")
+
+    totals = plan["totals"]
+    print(f"\n✅ {totals['order_lines']} order lines -> {totals['shipments']} shipments, "
+          f"~${totals['estimated_cost_usd']:,.2f} in {seconds:.3f}s")
+    if plan["errors"]:
+        print(f"⚠️  {len(plan['errors'])} lines skipped")
+
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(plan, f, ensure_ascii=False, indent=2)
+    print(f"💾 Saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
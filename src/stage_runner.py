@@ -0,0 +1,251 @@
+"""
+STAGE RUNNER
+Small DAG executor: concurrent independent stages, input-hash caching, per-stage time and peak memory
+"""
+
+import ast
+import hashlib
+import inspect
+import json
+import os
+import time
+import tracemalloc
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+# Configuration
+CACHE_DIR = Path("data/real/.stage_cache")
+
+# Module-level values of these types that a stage function reads are part of its code hash
+DATA_TYPES = (dict, list, tuple, set, frozenset, str, bytes, int, float)
+
+
+class Stage:
+    """One step of a pipeline: func(*dependency_outputs) -> JSON-serialisable output"""
+
+    def __init__(self, name, func, deps=(), params=None, outputs=()):
+        self.name = name
+        self.func = func
+        self.deps = list(deps)
+        self.params = params or {}
+        self.outputs = [Path(path) for path in outputs]
+
+    def code_hash(self):
+        """Hash of the stage function's source, the module-level data it reads and the source of its
+        module and every project module that module imports, so edits to any of them invalidate the cache"""
+        func = getattr(self.func, "__func__", self.func)
+        try:
+            source = inspect.getsource(func)
+        except (OSError, TypeError):
+            source = getattr(func, "__qualname__", repr(func))
+        digest = hashlib.sha256(source.encode("utf-8"))
+        for path in _project_modules(func):
+            digest.update(f"\n{path.name}:".encode("utf-8"))
+            digest.update(path.read_bytes())
+        for name, value in _data_globals(func):
+            digest.update(f"\n{name}=".encode("utf-8"))
+            digest.update(json.dumps(value, sort_keys=True, default=_stable_repr).encode("utf-8"))
+        return digest.hexdigest()[:16]
+
+
+def _project_modules(func):
+    """Source files of func's module and the modules beside it that it imports, transitively.
+
+    Imports anywhere in a file count, including ones inside functions.
+    """
+    module = inspect.getmodule(func)
+    path = getattr(module, "__file__", None)
+    if not path:
+        return []
+    root = Path(path).resolve().parent
+    seen, stack = set(), [Path(path).resolve()]
+    while stack:
+        path = stack.pop()
+        if path in seen or not path.exists():
+            continue
+        seen.add(path)
+        for node in ast.walk(ast.parse(path.read_bytes(), filename=str(path))):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names = [node.module]
+            else:
+                continue
+            stack.extend(root / f"{name.split('.')[0]}.py" for name in names)
+    return sorted(seen)
+
+
+def _data_globals(func):
+    """(name, value) for module-level data (not functions, classes or modules) named in func's code"""
+    namespace = getattr(func, "__globals__", {})
+    names, codes = set(), [getattr(func, "__code__", None)]
+    while codes:
+        code = codes.pop()
+        if code is not None:
+            names.update(code.co_names)
+            codes.extend(const for const in code.co_consts if inspect.iscode(const))
+    return [(name, namespace[name]) for name in sorted(names) if isinstance(namespace.get(name), DATA_TYPES)]
+
+
+def _stable_repr(value):
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    return repr(value)
+
+
+def _run_stage(func, args):
+    """Worker: run one stage and measure wall time and peak traced memory"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        output = func(*args)
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return output, seconds, peak
+
+
+class StageRunner:
+    """Runs a stage graph, reusing cached outputs whose inputs have not changed"""
+
+    def __init__(self, stages, cache_dir=CACHE_DIR, workers=None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.cache_dir = Path(cache_dir)
+        self.workers = workers or min(len(self.stages), os.cpu_count() or 1)
+        for stage in stages:
+            for dep in stage.deps:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+        self.order = self._topological_order()
+
+    def _topological_order(self):
+        order, state = [], {}
+
+        def visit(name):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Dependency cycle at stage '{name}'")
+            state[name] = "visiting"
+            for dep in self.stages[name].deps:
+                visit(dep)
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return order
+
+    def descendants(self, name):
+        """The stage and every stage downstream of it"""
+        found = {name}
+        for stage_name in self.order:
+            if any(dep in found for dep in self.stages[stage_name].deps):
+                found.add(stage_name)
+        return found
+
+    def ancestors(self, names):
+        """The stages and everything they depend on"""
+        found = set()
+        pending = list(names)
+        while pending:
+            name = pending.pop()
+            if name not in found:
+                found.add(name)
+                pending.extend(self.stages[name].deps)
+        return found
+
+    def plan(self, only=None, start=None):
+        """(stages needed, stages forced to re-run) for a full, --only or --from run"""
+        for name in list(only or []) + ([start] if start else []):
+            if name not in self.stages:
+                raise KeyError(f"Unknown stage: {name} (choose from {', '.join(self.order)})")
+        if only:
+            selected = set(only)
+        elif start:
+            selected = self.descendants(start)
+        else:
+            return set(self.order), set()
+        return self.ancestors(selected), selected
+
+    def input_hash(self, stage, dep_hashes):
+        payload = json.dumps({
+            "stage": stage.name,
+            "code": stage.code_hash(),
+            "params": stage.params,
+            "deps": [dep_hashes[dep] for dep in stage.deps]
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _cache_path(self, stage, key):
+        return self.cache_dir / f"{stage.name}-{key[:24]}.json"
+
+    def _load_cached(self, stage, key):
+        path = self._cache_path(stage, key)
+        if not path.exists() or not all(output.exists() for output in stage.outputs):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _store(self, stage, key, output):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._cache_path(stage, key)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"output": output}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def run(self, only=None, start=None, use_cache=True):
+        """Run the needed stages; independent stages execute concurrently in worker processes"""
+        needed, forced = self.plan(only, start)
+        results, hashes, stats = {}, {}, {}
+        pending = [name for name in self.order if name in needed]
+        total_start = time.perf_counter()
+
+        def ready():
+            return [name for name in pending if all(dep in results for dep in self.stages[name].deps)]
+
+        def finish(name, output, status, seconds=0.0, peak=0):
+            results[name] = output
+            stats[name] = {"stage": name, "status": status, "seconds": round(seconds, 4),
+                           "peak_memory_kb": round(peak / 1024, 1), "input_hash": hashes[name][:12]}
+
+        pool = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        running = {}
+        try:
+            while pending or running:
+                for name in ready():
+                    pending.remove(name)
+                    stage = self.stages[name]
+                    hashes[name] = self.input_hash(stage, hashes)
+                    if use_cache and name not in forced:
+                        cached = self._load_cached(stage, hashes[name])
+                        if cached is not None:
+                            finish(name, cached["output"], "cached")
+                            continue
+                    args = [results[dep] for dep in stage.deps]
+                    if pool is None:
+                        output, seconds, peak = _run_stage(stage.func, args)
+                        self._store(stage, hashes[name], output)
+                        finish(name, output, "run", seconds, peak)
+                    else:
+                        running[pool.submit(_run_stage, stage.func, args)] = name
+
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    output, seconds, peak = future.result()
+                    self._store(self.stages[name], hashes[name], output)
+                    finish(name, output, "run", seconds, peak)
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+        return {
+            "results": results,
+            "stats": [stats[name] for name in self.order if name in stats],
+            "seconds": round(time.perf_counter() - total_start, 4)
+        }
@@ -0,0 +1,57 @@
+"""
+TRADE TERMS PARSING
+Turns free-text producer terms ("$500", "2-4 weeks") into structured values
+"""
+
+import re
+
+AMOUNT_PATTERN = re.compile(r"(?P<symbol>[$€£])?\s*(?P<number>\d[\d,]*(?:\.\d+)?)\s*(?P<k>k\b)?\s*(?P<code>usd|eur|gbp|ils|jod)?",
+                            re.IGNORECASE)
+CURRENCY_SYMBOLS = {"$": "USD", "€": "EUR", "£": "GBP"}
+# Planning rates only (USD per unit of currency); refresh before quoting buyers
+USD_PER_UNIT = {"USD": 1.0, "EUR": 1.08, "GBP": 1.27, "ILS": 0.27, "JOD": 1.41}
+DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(?:\s*-\s*(\d+(?:\.\d+)?))?\s*(day|week|month)", re.IGNORECASE)
+DAYS_PER_UNIT = {"day": 1, "week": 7, "month": 30}
+
+
+def parse_amount(text):
+    """(amount, currency) from '$500', '1,000 USD', '2k EUR'; None when there is no number"""
+    match = AMOUNT_PATTERN.search(str(text or ""))
+    if not match:
+        return None
+    amount = float(match.group("number").replace(",", ""))
+    if match.group("k"):
+        amount *= 1000
+    currency = (match.group("code") or "").upper() or CURRENCY_SYMBOLS.get(match.group("symbol"), "USD")
+    return amount, currency
+
+
+def to_usd(amount, currency):
+    """Amount converted to USD at the planning rate; ValueError for an unknown currency"""
+    if currency not in USD_PER_UNIT:
+        raise ValueError(f"No USD rate for currency: {currency}")
+    return amount * USD_PER_UNIT[currency]
+
+
+def parse_lead_time_days(text, default=None):
+    """Upper bound of a lead time in days ('2-4 weeks' -> 28); default for 'Seasonal' etc."""
+    match = DURATION_PATTERN.search(str(text or ""))
+    if not match:
+        return default
+    upper = float(match.group(2) or match.group(1))
+    return int(round(upper * DAYS_PER_UNIT[match.group(3).lower()]))
+
+
+def parse_payment_terms(text):
+    """Staged payment terms as [{"percent", "due"}]: '30% advance, balance on harvest' -> 30/70"""
+    stages = []
+    for part in re.split(r"[,;]", str(text or "")):
+        part = part.strip()
+        match = re.match(r"(\d+(?:\.\d+)?)\s*%\s*(.*)", part)
+        if match:
+            stages.append({"percent": float(match.group(1)), "due": match.group(2).strip() or "unspecified"})
+        elif part.lower().startswith(("balance", "remainder", "rest")):
+            paid = sum(stage["percent"] for stage in stages)
+            due = part.split(None, 1)[1] if " " in part else "unspecified"
+            stages.append({"percent": max(0.0, 100.0 - paid), "due": due.strip()})
+    return stages
@@ -0,0 +1,62 @@
+"""
+TEST: Barcode-level BDS screening
+GS1 prefix trie, code normalization and bulk CSV screening
+"""
+
+import csv
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from barcode_screening import BarcodeScreener, check_digit, normalize_barcode
+from real_bds_verifier import RealBDSVerifier
+
+
+def _ean(body):
+    return body + check_digit(body)
+
+
+def test_normalize_barcode():
+    assert normalize_barcode("4006381333931") == "4006381333931"
+    assert normalize_barcode("036000291452") == "0036000291452"  # UPC-A
+    assert normalize_barcode("4006381333932") is None  # bad check digit
+    assert normalize_barcode("12345") is None
+    assert normalize_barcode("14006381333938") == "4006381333931"  # GTIN-14 case pack
+    assert normalize_barcode("14006381333939") is None  # mistyped GTIN-14
+
+
+def test_longest_prefix_wins():
+    screener = BarcodeScreener(extra_entries=[
+        {"prefix": "7291234", "kind": "company", "label": "Test settlement company"},
+    ])
+    assert screener.screen(_ean("729000000001"))["bds_status"] == "NEEDS VERIFICATION"
+    flagged = screener.screen(_ean("729123400001"))
+    assert flagged["bds_status"] == "NON-COMPLIANT"
+    assert flagged["match_kind"] == "company"
+    assert screener.screen(_ean("500000000001"))["bds_status"] == "NO FLAG"
+
+
+def test_screen_csv(tmp_path):
+    inventory = tmp_path / "inventory.csv"
+    with open(inventory, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["sku", "EAN"])
+        writer.writerow(["A1", _ean("729555500001")])
+        writer.writerow(["A2", _ean("625000000001")])
+        writer.writerow(["A3", "not-a-code"])
+
+    summary = BarcodeScreener().screen_csv(inventory)
+    assert summary["total"] == 3
+    assert summary["by_status"] == {"NEEDS VERIFICATION": 1, "NO FLAG": 1, "INVALID": 1}
+
+    with open(summary["output_file"], encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [r["bds_status"] for r in rows] == ["NEEDS VERIFICATION", "NO FLAG", "INVALID"]
+
+
+def test_verifier_screen_barcode():
+    verifier = RealBDSVerifier()
+    result = verifier.screen_barcode(_ean("729555500001"))
+    assert result["status"] == "NEEDS VERIFICATION"
+    assert result["action"] == "Requires due diligence"
@@ -0,0 +1,68 @@
+"""
+TEST: Bulk BDS compliance job
+Verdicts, summary and resuming after an interrupted run
+"""
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from bulk_compliance import BulkComplianceJob, iter_records, load_table
+
+
+def _write_scan(path):
+    data = {
+        "businesses": [
+            {"id": "b1", "name": "Palestine Olive Cooperative", "location": "Jenin", "category": "Food"},
+            {"id": "b2", "name": "Angel Bakeries", "location": "Unknown", "category": "Food"},
+        ],
+        "products": [
+            {"id": "p1", "title": "Olive oil", "seller": "Palestinian Soap House", "location": "Gaza",
+             "category": "food", "bds_compliant": True},
+            {"id": "p2", "title": "Ahava cosmetics gift set", "seller": "Shop", "location": "Online",
+             "category": "cosmetics", "bds_compliant": True},
+        ],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def test_bulk_compliance_verdicts_and_resume(tmp_path):
+    data_file = tmp_path / "scan.json"
+    _write_scan(data_file)
+    out = tmp_path / "out"
+
+    summary = BulkComplianceJob(data_file, out, chunk_size=1, workers=2).run()
+    assert summary["total_records"] == 4
+    assert summary["by_status"]["NON-COMPLIANT"] == 2
+    assert summary["scanner_flag_mismatches"] == 1
+    assert summary["by_category"]["Food"]["COMPLIANT"] == 2
+
+    # Drop one part and mark it unfinished: only that chunk is recomputed
+    progress = json.loads((out / "progress.json").read_text())
+    progress["done"].remove(3)
+    (out / "progress.json").write_text(json.dumps(progress))
+    (out / "parts" / "part-00003.npz").unlink()
+
+    resumed = BulkComplianceJob(data_file, out, chunk_size=1, workers=2).run()
+    assert resumed["chunks_resumed"] == 3
+    assert resumed["by_status"] == summary["by_status"]
+
+    table = load_table(resumed["table_file"])
+    assert table["record_id"].tolist() == ["b1", "b2", "p1", "p2"]
+    assert table["bds_status"][1] == "NON-COMPLIANT" and table["flag_mismatch"].tolist() == [False, False, False, True]
+
+
+def test_records_stream_in_small_reads(tmp_path, monkeypatch):
+    import bulk_compliance
+
+    data_file = tmp_path / "scan.json"
+    records = [{"id": f"p{i}", "title": "Olive oil \u0632\u064a\u062a", "price": 12.5 + i} for i in range(50)]
+    data_file.write_text(json.dumps({"trade": [{"product": "Dates", "export_value_usd": 2000000}],
+                                     "products": records, "businesses": [{"id": "b1", "name": "Co-op"}],
+                                     "total": 51}, indent=1), encoding="utf-8")
+    monkeypatch.setattr(bulk_compliance, "READ_SIZE", 7)
+    streamed = list(iter_records(data_file))
+    assert streamed == [("product", record) for record in records] + [("business", {"id": "b1", "name": "Co-op"})]
@@ -0,0 +1,60 @@
+"""
+TEST: Unified Business Directory
+Checks source merging, incremental upserts and indexed queries
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from business_directory import BusinessDirectory, build_directory  # noqa: E402
+
+
+def test_sources_merge_into_one_record(tmp_path):
+    (tmp_path / "verified_businesses.json").write_text(json.dumps([
+        {"id": "PAL-REAL-001", "name": "Canaan Fair Trade", "contact": "info@canaanpalestine.com",
+         "shop_url": "https://shop.canaanpalestine.com", "products": ["Organic olive oil"]}
+    ]), encoding="utf-8")
+    directory = build_directory(tmp_path)
+
+    canaan = directory.get("Canaan Fair Trade")
+    assert canaan["shop_url"] == "https://shop.canaanpalestine.com"
+    assert {"PAL-REAL-001", "PAL-CORE-001", "PAL-EXP-001"} <= set(canaan["source_ids"])
+    assert len(canaan["sources"]) == 4
+    assert canaan["economic_impact"] == "Supports 1,700+ farming families"
+
+    # Matched on e-mail despite the shorter name in the toolkit source
+    assert directory.get("Holy Land Handicrafts")["name"] == "Holy Land Handicrafts Cooperative Society"
+
+    names = [record["name"] for record in directory.query("olive oil", "fair trade", "Japan")]
+    assert names == ["Canaan Fair Trade"]
+
+
+def test_upsert_updates_indexes_and_snapshot(tmp_path):
+    directory = BusinessDirectory()
+    directory.upsert({"name": "Al Bireh Spices", "products": "zaatar, sumac", "location": "Al-Bireh",
+                      "export_markets": ["GCC countries"]})
+    assert [r["name"] for r in directory.query(market="Middle East")] == ["Al Bireh Spices"]
+    assert directory.query(certification="organic") == []
+
+    directory.upsert({"name": "Al Bireh Spices", "certifications": ["EU Organic"], "export_markets": ["Japan"]})
+    assert [r["name"] for r in directory.query(product="sumac", certification="organic", market="Japan")] == \
+        ["Al Bireh Spices"]
+
+    restored = BusinessDirectory.load(directory.save(tmp_path / "directory.json"))
+    assert restored.query(location="Bireh")[0]["products"] == ["zaatar", "sumac"]
+    restored.remove("al-bireh-spices")
+    assert len(restored) == 0 and restored.query(product="zaatar") == []
+
+
+def test_records_without_identity_are_rejected():
+    directory = BusinessDirectory()
+    with pytest.raises(ValueError):
+        directory.upsert({"products": ["olive oil"], "location": "Jenin"})
+    keys = directory.upsert_many([{"location": "Gaza"}, {"name": "Nablus Soap Co"}], "scanner")
+    assert keys == ["nablus-soap-co"] and len(directory) == 1
+    assert [(r["source"], r["record"]) for r in directory.rejected] == [("scanner", {"location": "Gaza"})]
@@ -0,0 +1,57 @@
+"""
+TEST: Certification Requirements Rules Engine
+Checks the decision table per destination, HS chapter and product attributes
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+np = pytest.importorskip("numpy")
+
+from certification_rules import ORGANIC, CertificationRulesEngine, hs_chapter, product_flags  # noqa: E402
+from real_export_docs import ExportDocumentGenerator  # noqa: E402
+
+
+def test_requirements_depend_on_chapter_and_attributes():
+    engine = CertificationRulesEngine()
+
+    olive_oil = engine.requirements_for("EU", "1509.10")
+    assert "Phytosanitary Certificate" not in olive_oil
+    assert "EU Food Labelling (Regulation 1169/2011)" in olive_oil
+    assert "EU Organic Certificate of Inspection" not in olive_oil
+    assert "EU Organic Certificate of Inspection" in engine.requirements_for("EU", "1509.10", ORGANIC)
+
+    assert "Phytosanitary Certificate" in engine.requirements_for("Japan", "0910.99")
+    assert "Halal Certificate" not in engine.requirements_for("Middle East", "5810.92")
+    assert engine.requirements_for("Mars", "1509.10") == ["Certificate of Origin", "Commercial Invoice"]
+
+
+def test_vectorized_matrix_matches_single_lookups():
+    engine = CertificationRulesEngine()
+    codes = ["1509.10", "0910.99", "3401.11", "5810.92", None]
+    flags = [ORGANIC, 0, 0, 0, ORGANIC]
+    requirements, matrix = engine.evaluate([hs_chapter(code) for code in codes], flags, ["USA"])["USA"]
+
+    assert matrix.shape == (len(codes), len(requirements))
+    for row, (code, flag) in enumerate(zip(codes, flags)):
+        expected = engine.requirements_for("USA", code, flag)
+        assert [req for req, needed in zip(requirements, matrix[row]) if needed] == expected
+
+
+def test_catalog_report_and_document_hook():
+    engine = CertificationRulesEngine()
+    items = [("SKU1", "Organic Extra Virgin Olive Oil", ""), ("SKU2", "Hand embroidered cushion", "")]
+    report = engine.requirements_matrix(items, ["EU"])
+
+    assert "EU Organic Certificate of Inspection" in report["products"]["SKU1"]["EU"]
+    assert "Textile Fibre Composition Label" in report["products"]["SKU2"]["EU"]
+    assert report["markets"]["EU"]["Certificate of Origin"] == 2
+    assert product_flags("Fairtrade certified zaatar") & ORGANIC == 0
+
+    certs = ExportDocumentGenerator()._get_required_certs("USA", {"name": "Nabulsi Olive Oil Soap", "type": "soap"})
+    assert "FDA Cosmetic Labeling Compliance" in certs
+    assert "FDA Prior Notice" not in certs
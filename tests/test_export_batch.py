@@ -0,0 +1,55 @@
+"""
+TEST: Batch export document generation
+Precompiled templates rendered for an order table into a zip archive
+"""
+
+import csv
+import json
+import sys
+import zipfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from export_batch import ExportBatchEngine, guess_product_type
+from real_export_docs import ExportDocumentGenerator
+
+
+def test_guess_product_type():
+    assert guess_product_type("Traditional Nablus Olive Oil Soap") == "soap"
+    assert guess_product_type("Extra Virgin Olive Oil") == "olive_oil"
+    assert guess_product_type("زعتر فلسطيني") == "zaatar"
+
+
+def test_single_package_matches_template():
+    docs = ExportDocumentGenerator(issue_date="2026-01-01").generate_export_package(
+        {"id": "X1", "name": "Canaan Fair Trade", "location": "Jenin"},
+        {"name": "Olive oil", "type": "olive_oil", "quantity": 10, "unit": "bottles",
+         "unit_price": "35.00", "total_value": "350.00", "destination": "EU"}
+    )
+    assert "Tax ID: PAL-X1" in docs["commercial_invoice"]
+    assert "Unit Price: $35.00" in docs["commercial_invoice"]
+    assert "HS Code: 1509.10" in docs["commercial_invoice"]
+    assert "Date: 2026-01-01" in docs["certificate_of_origin"]
+
+
+def test_batch_to_zip(tmp_path):
+    businesses = tmp_path / "businesses.json"
+    businesses.write_text(json.dumps([{"id": "B1", "name": "Canaan Fair Trade", "location": "Jenin"}]))
+    orders = tmp_path / "orders.csv"
+    with open(orders, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["business", "product", "destination", "quantity"])
+        for i in range(25):
+            writer.writerow(["Canaan Fair Trade", "PAL-FOOD-001", "EU", i + 1])
+        writer.writerow(["Unknown Co", "PAL-FOOD-001", "EU", 1])
+
+    engine = ExportBatchEngine(business_files=[businesses], workers=2, chunk_size=4, issue_date="2026-01-01")
+    summary = engine.run(orders, tmp_path / "packages.zip")
+    assert summary["packages"] == 25
+    assert summary["errors"] == [{"row": 26, "error": "Unknown business: Unknown Co"}]
+
+    with zipfile.ZipFile(tmp_path / "packages.zip") as archive:
+        invoice = archive.read("000003_canaan-fair-trade_eu/commercial_invoice.txt").decode("utf-8")
+        assert "Total Value: $105.00" in invoice
+        assert archive.read("manifest.csv").decode("utf-8").count("OK") == 25
@@ -0,0 +1,50 @@
+"""
+TEST: Gazetteer and Spatial Index
+Checks location normalization and grid queries against brute-force distances
+"""
+
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from business_directory import BusinessDirectory  # noqa: E402
+from gazetteer import Gazetteer, SpatialIndex, haversine_km  # noqa: E402
+
+
+def test_free_text_normalization():
+    gazetteer = Gazetteer()
+    assert gazetteer.resolve("Jenin, West Bank") == "jenin"
+    assert gazetteer.resolve("Nahalin, Bethlehem area") == "nahalin"
+    assert gazetteer.resolve("زيت زيتون بكر ممتاز من الخليل") == "hebron"
+    assert gazetteer.resolve("Made in Gaza Strip") == "gaza_strip"
+    assert gazetteer.resolve("AL-BIREH") == "al_bireh"
+    assert gazetteer.resolve("Khan Younis") == "khan_yunis"
+    assert gazetteer.resolve("UK/Palestine") is None
+    assert 29 < haversine_km(*gazetteer.coordinates("Hebron"), *gazetteer.coordinates("Jerusalem")) < 32
+
+
+def test_grid_queries_match_brute_force():
+    rng = random.Random(7)
+    points = {f"p{i}": (rng.uniform(31.2, 32.6), rng.uniform(34.2, 35.6)) for i in range(500)}
+    index = SpatialIndex()
+    for item_id, (lat, lon) in points.items():
+        index.insert(item_id, lat, lon)
+
+    lat, lon = 31.532, 35.095
+    brute = sorted((haversine_km(lat, lon, *coords), item_id) for item_id, coords in points.items())
+
+    assert [item_id for _, item_id, _ in index.within(lat, lon, 20)] == [i for d, i in brute if d <= 20]
+    assert [item_id for _, item_id, _ in index.nearest(lat, lon, k=5)] == [i for _, i in brute[:5]]
+    assert [item_id for _, item_id, _ in index.nearest(40.0, 30.0, k=1)] == \
+        [min((haversine_km(40.0, 30.0, *c), i) for i, c in points.items())[1]]
+
+
+def test_directory_near_query():
+    directory = BusinessDirectory()
+    directory.upsert({"name": "Halhul Grapes", "location": "Halhul"})
+    directory.upsert({"name": "Jenin Oil Press", "location": "Jenin, West Bank"})
+    directory.upsert({"name": "Diaspora Shop", "location": "UK/Palestine"})
+
+    assert [record["name"] for _, record in directory.near("Hebron", 20)] == ["Halhul Grapes"]
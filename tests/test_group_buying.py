@@ -0,0 +1,66 @@
+"""
+TEST: Group-Buy Order Pooling
+Checks term parsing, incremental batch filling and deadline expiry
+"""
+
+import sys
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from group_buying import GroupBuyPool  # noqa: E402
+from palestine_real_toolkit import VERIFIED_BUSINESSES  # noqa: E402
+from trade_terms import parse_payment_terms  # noqa: E402
+
+
+def test_payment_terms_parsing():
+    assert parse_payment_terms("30% advance, balance on harvest") == [
+        {"percent": 30.0, "due": "advance"}, {"percent": 70.0, "due": "on harvest"}
+    ]
+    assert parse_payment_terms("50% advance, 50% on delivery")[1]["due"] == "on delivery"
+
+
+def test_orders_pool_until_minimum_then_expire():
+    pool = GroupBuyPool(VERIFIED_BUSINESSES)
+    assert pool.producers["Zaytoun CIC"]["min_order_usd"] == 300
+
+    first = pool.submit({"id": 1, "buyer": "cafe", "producer": "Zaytoun CIC", "amount_usd": 120,
+                         "deadline": "2026-05-01"})
+    assert first["status"] == "pooled" and first["fill_ratio"] == 0.4
+    pool.submit({"id": 2, "buyer": "shop", "producer": "Zaytoun CIC", "amount_usd": 100, "deadline": "2026-04-15"})
+    filled = pool.submit({"id": 3, "buyer": "cafe", "producer": "Zaytoun CIC", "amount_usd": "$90",
+                          "deadline": "2026-05-10"})
+    assert filled["status"] == "filled"
+
+    batch = pool.filled[0]
+    assert batch["total_usd"] == 310 and batch["deadline"] == date(2026, 4, 15)
+    assert batch["payment_schedule"][0]["per_buyer"] == {"cafe": 105.0, "shop": 50.0}
+
+    assert pool.submit({"id": 4, "product": "olive wood carvings", "amount_usd": 200,
+                        "deadline": "2026-03-01"})["producer"] == "Holy Land Handicrafts"
+    pool.submit({"id": 5, "product": "grapes", "amount_usd": 600, "deadline": "2026-06-01"})
+    assert [b["producer"] for b in pool.urgent(2)] == ["Holy Land Handicrafts", "Tent of Nations"]
+    assert pool.submit({"id": 6, "product": "caviar", "amount_usd": 50, "deadline": "2026-06-01"})["status"] == "rejected"
+
+    expired = pool.expire(date(2026, 3, 2))
+    assert [b["producer"] for b in expired] == ["Holy Land Handicrafts"]
+    assert list(pool.open) == ["Tent of Nations"]
+
+
+def test_assignment_prefers_batch_closest_to_minimum():
+    pool = GroupBuyPool([
+        {"name": "Press A", "min_order": "€500", "products": "olive oil"},
+        {"name": "Press B", "min_order": "$200", "products": "olive oil"}
+    ])
+    assert pool.producers["Press A"]["min_order"] == {"amount": 500.0, "currency": "EUR"}
+    assert pool.producers["Press A"]["min_order_usd"] == 540.0
+
+    # 180 takes B to 0.9 of its minimum; A would only reach a third
+    order = {"product": "olive oil", "deadline": "2026-05-01"}
+    assert pool.submit({**order, "id": 1, "amount_usd": 180})["producer"] == "Press B"
+    # 400 would overshoot B to 2.9x; A lands at 0.74, nearer its minimum
+    assert pool.submit({**order, "id": 2, "amount_usd": 400})["producer"] == "Press A"
+    # £20 (25.40 USD) just clears B's minimum, nearer than A
+    assert pool.submit({**order, "id": 3, "amount_usd": "£20"})["status"] == "filled"
+    assert pool.filled[0]["producer"] == "Press B" and pool.filled[0]["total_usd"] == 205.4
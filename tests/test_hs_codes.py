@@ -0,0 +1,63 @@
+"""
+TEST: HS nomenclature index and product classification
+Prefix/hierarchy lookup, English/Arabic classification and cached catalog batches
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from hs_codes import KEYWORDS_FILE, HSClassifier, format_hs_code
+from real_export_docs import ExportDocumentGenerator
+
+classifier = HSClassifier()
+
+
+def test_prefix_and_hierarchy_lookup():
+    nomenclature = classifier.nomenclature
+    assert [e["hscode"] for e in nomenclature.prefix_search("1509")] == ["1509", "150910", "150990"]
+    assert [e["hscode"] for e in nomenclature.ancestors("5810.92")] == ["58", "5810", "581092"]
+    assert "5810" in [e["hscode"] for e in nomenclature.children("58")]
+    assert format_hs_code("150910") == "1509.10"
+
+
+def test_classify_english_and_arabic():
+    assert classifier.best_code("Premium Organic Extra Virgin Olive Oil from Hebron") == "1509.10"
+    assert classifier.best_code("Traditional Nablus Olive Oil Soap") == "3401.11"
+    assert classifier.best_code("Olive Wood Hand-Carved Nativity Set") == "4420.10"
+    assert classifier.best_code("زيت زيتون بكر ممتاز من الخليل") == "1509.10"
+    assert classifier.best_code("صابون نابلسي بزيت الزيتون") == "3401.11"
+    assert classifier.best_code("Palestinian Zaatar with Sesame") == "0910.99"
+    assert classifier.best_code("Quantum flux capacitor") == "9999.99"
+
+
+def test_classify_batch_uses_cache(tmp_path):
+    cache = tmp_path / "cache.json"
+    items = [("a", "Medjoul dates", ""), ("b", "Orange blossom honey", "")]
+    first = classifier.classify_batch(items, cache)
+    assert first["a"][0]["hscode"] == "0804.10"
+    assert first["b"][0]["hscode"] == "0409.00"
+
+    classifier.classify = None  # a cache hit must not reclassify
+    try:
+        assert classifier.classify_batch(items, cache) == first
+    finally:
+        del classifier.classify
+
+
+def test_classify_batch_cache_follows_reference_files(tmp_path):
+    cache = tmp_path / "cache.json"
+    items = [("x", "Quantum flux capacitor", "")]
+    assert classifier.classify_batch(items, cache)["x"] == []
+
+    keywords = tmp_path / "hs_keywords.csv"
+    keywords.write_text(KEYWORDS_FILE.read_text(encoding="utf-8") + "040900,en,flux capacitor\n", encoding="utf-8")
+    edited = HSClassifier(classifier.nomenclature, keywords_file=keywords)
+    assert edited.classify_batch(items, cache)["x"][0]["hscode"] == "0409.00"
+
+
+def test_export_docs_fall_back_to_classifier():
+    generator = ExportDocumentGenerator()
+    assert generator._get_hs_code("olive_oil") == "1509.10"
+    assert generator._get_hs_code("other", "Keffiyeh scarf") == "6214.90"
@@ -0,0 +1,57 @@
+"""
+TEST: Product-to-Market Matching
+Checks chunked top-k ranking against a full brute-force sort
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+np = pytest.importorskip("numpy")
+
+from market_matching import MarketMatcher, load_markets, parse_premium, product_features  # noqa: E402
+
+
+def test_chunked_top_k_matches_brute_force():
+    rng = np.random.default_rng(1)
+    markets = [{"name": f"m{i}", "demand": {"food": float(rng.random()), "crafts": float(rng.random())},
+                "price_premium": f"{i}%", "shipping_cost_per_kg": float(rng.uniform(1, 8))} for i in range(40)]
+    products = [{"id": f"p{i}", "category": ["food", "crafts", "apparel"][i % 3],
+                 "price_usd": float(rng.uniform(2, 500)), "weight_kg": float(rng.uniform(0.1, 3))}
+                for i in range(1000)]
+
+    matcher = MarketMatcher(markets, chunk_size=64)
+    ids, features = product_features(products)
+    result = matcher.match(features, k=5)
+
+    scores = features @ matcher.weights.T
+    expected_products = np.sort(scores, axis=0)[::-1][:5].T
+    expected_markets = np.sort(scores, axis=1)[:, ::-1][:, :5]
+    assert np.allclose(result["market_scores"], expected_products)
+    assert np.allclose(result["product_scores"], expected_markets)
+    assert result["product_top"].shape == (1000, 5)
+
+
+def test_catalog_recommendations():
+    assert parse_premium("20-30% for fair trade/organic") == pytest.approx(0.25)
+
+    matcher = MarketMatcher(load_markets())
+    report = matcher.recommend([
+        {"id": "oil", "title": "Organic olive oil", "category": "Food & Beverage", "price_usd": 35,
+         "weight_kg": 1.2, "text": "organic fair trade olive oil"},
+        {"id": "lamp", "title": "Hebron glass lamp", "category": "Home Decor", "price_usd": 95, "weight_kg": 2.0}
+    ], k=2)
+
+    assert len(report["by_product"]["oil"]) == 2
+    assert report["by_market"]["EUROPE"][0]["product"] == "oil"
+    assert set(report["by_market"]) == set(matcher.market_names)
+
+
+def test_empty_catalogues_give_empty_rankings():
+    products = [{"id": "oil", "category": "food", "price_usd": 35, "weight_kg": 1.2}]
+    report = MarketMatcher([]).recommend(products, k=3)
+    assert report["by_product"] == {"oil": []} and report["by_market"] == {}
+    assert MarketMatcher([{"name": "EUROPE", "demand": {"food": 1.0}}]).recommend([], k=3)["by_market"] == {"EUROPE": []}
@@ -0,0 +1,137 @@
+"""
+TEST: Monte Carlo Export Simulation
+Checks the vectorized revenue model and histogram percentiles against exact ones
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+np = pytest.importorskip("numpy")
+
+from monte_carlo_simulation import (HistogramReducer, MonteCarloSimulator, OnlineMoments,  # noqa: E402
+                                    QuantileSketch, transform)
+
+PRODUCTS = [
+    {"product": "Olive Oil", "export_value_usd": 5000000, "growth_rate": 8.5},
+    {"product": "Dates", "export_value_usd": 2000000, "growth_rate": 12.3},
+    {"product": "Honey", "export_value_usd": 250000, "growth_rate": 7.3}
+]
+
+
+def test_deterministic_model_matches_growth_projection():
+    model = {"growth": {"sd": 0.0}, "price": {"sigma": 0.0}, "disruption": {"prob": 0.0},
+             "certification": {"share": 0.0}}
+    simulator = MonteCarloSimulator(PRODUCTS, years=4, model=model, chunk_paths=100)
+    result = simulator.run(250, seed=0)
+    rows = simulator.report(result)
+
+    assert rows[0]["projection_final_usd"] == pytest.approx(5000000 * 1.085 ** 4)
+    for row in rows:
+        assert row["final"]["mean"] == pytest.approx(row["projection_final_usd"], rel=1e-5)
+        assert row["total"]["p50"] == pytest.approx(row["projection_total_usd"], rel=0.003)
+
+
+def test_histogram_percentiles_track_exact_percentiles():
+    simulator = MonteCarloSimulator(PRODUCTS, years=5, chunk_paths=7000, quantiles="histogram")
+    result = simulator.run(20000, seed=42)
+    assert result["reducers"]["final"].n == 20000
+
+    # One batch: its SeedSequence child and the same chunking reproduce the raw paths
+    rng = np.random.default_rng(np.random.SeedSequence(42).spawn(1)[0])
+    finals = np.concatenate([simulator.model.revenue(simulator.model.draw(rng, n))[:, :, -1]
+                             for n in (7000, 7000, 6000)], axis=1)
+    estimated = result["reducers"]["final"].percentiles((5, 50, 95))
+    exact = np.percentile(finals, (5, 50, 95), axis=1).T
+    np.testing.assert_allclose(estimated, exact, rtol=0.005)
+
+    # Disruptions only ever remove revenue
+    assert (simulator.model.revenue(simulator.model.draw(rng, 10)) > 0).all()
+
+
+def test_triangular_and_reducer_merge():
+    u = np.linspace(0, 1, 100001)
+    values = transform({"dist": "triangular", "low": 0.1, "mode": 0.3, "high": 0.8}, u=u)
+    assert values.min() == pytest.approx(0.1) and values.max() == pytest.approx(0.8)
+    assert values.mean() == pytest.approx((0.1 + 0.3 + 0.8) / 3, rel=1e-3)
+
+    a, b = HistogramReducer([1.0]), HistogramReducer([1.0])
+    a.add(np.array([[0.5, 1.0]]))
+    b.add(np.array([[2.0, 0.0]]))
+    merged = a.merge(b)
+    assert merged.n == 4 and merged.counts.sum() == 4
+    assert merged.mean()[0] == pytest.approx(0.875)
+    assert merged.percentiles((10,))[0, 0] == 0.0
+
+
+def test_results_identical_across_workers_and_resume(tmp_path):
+    simulator = MonteCarloSimulator(PRODUCTS, years=3, chunk_paths=500, batch_paths=1000)
+    serial = simulator.run(4500, seed=7, workers=1)
+    parallel = simulator.run(4500, seed=7, workers=2)
+    assert serial["batches"] == 5
+    for name in ("final", "total"):
+        a, b = serial["reducers"][name].state(), parallel["reducers"][name].state()
+        assert all(a[key].tobytes() == b[key].tobytes() for key in a)
+
+    # Kill after two batches: the resumed run reuses them and still matches
+    simulator.run(2000, seed=7, checkpoint_dir=tmp_path)
+    resumed = simulator.run(4500, seed=7, workers=2, checkpoint_dir=tmp_path)
+    assert resumed["resumed_batches"] == 2
+    assert resumed["reducers"]["total"].percentiles().tobytes() == serial["reducers"]["total"].percentiles().tobytes()
+    assert simulator.run(4500, seed=7, checkpoint_dir=tmp_path)["resumed_batches"] == 5
+
+    # Unseeded: the first run's entropy is kept with the checkpoint, so the resume continues it
+    unseeded = simulator.run(2000, checkpoint_dir=tmp_path / "unseeded")
+    resumed = simulator.run(4500, checkpoint_dir=tmp_path / "unseeded")
+    assert resumed["entropy"] == unseeded["entropy"] and resumed["resumed_batches"] == 2
+
+
+def test_samplers_reduce_standard_error_and_stop_at_target():
+    pytest.importorskip("scipy")
+    from monte_carlo_simulation import compare_samplers, convergence
+
+    rows = {row["sampler"]: row for row in compare_samplers(PRODUCTS, 32768, seed=3, batch_paths=2048,
+                                                            chunk_paths=1024)}
+    assert rows["random"]["variance_reduction"] == 1.0
+    for kind in ("antithetic", "control", "lhs", "sobol"):
+        assert rows[kind]["rel_se"] < rows["random"]["rel_se"]
+    assert rows["sobol"]["variance_reduction"] > 10
+
+    simulator = MonteCarloSimulator(PRODUCTS, batch_paths=1024, sampler="sobol")
+    result = simulator.run(10 ** 6, seed=3, target_rel_se=0.002)
+    assert result["paths"] < 10 ** 6 and result["reducers"]["final"].n == result["paths"]
+    assert convergence(result)[-1]["rel_se"] <= 0.002
+    assert simulator.run(10 ** 6, seed=3, workers=2, target_rel_se=0.002)["paths"] == result["paths"]
+
+    control = MonteCarloSimulator(PRODUCTS, sampler="control", batch_paths=4096).run(4096, seed=3)
+    mean_cv, se_cv, reduction = control["reducers"]["final_cv"].estimate()
+    assert (reduction > 1).all()
+    assert np.allclose(mean_cv, control["reducers"]["final"].mean(), rtol=0.02)
+
+
+def test_streaming_sketch_and_moments_merge_in_constant_memory():
+    rng = np.random.default_rng(11)
+    values = rng.lognormal(15.0, 0.5, size=(2, 400000))
+    sketch, other = QuantileSketch(2, rng=np.random.default_rng(0)), QuantileSketch(2, rng=np.random.default_rng(1))
+    for i, chunk in enumerate(np.split(values, 20, axis=1)):
+        (sketch if i % 2 else other).add(chunk)
+    merged = sketch.merge(other)
+    assert merged.n == 400000
+    assert merged.state()["items"].size < 20000              # sketch size is independent of n
+
+    # Rank error of P5/P50/P95 stays within half a percentile point
+    estimated = merged.percentiles((5, 50, 95))
+    for row, est in zip(values, estimated):
+        ranks = np.searchsorted(np.sort(row), est) / row.size * 100
+        assert np.abs(ranks - [5, 50, 95]).max() < 0.5
+
+    np.testing.assert_allclose(merged.mean(), values.mean(axis=1), rtol=1e-12)
+    np.testing.assert_allclose(merged.std(), values.std(axis=1), rtol=1e-9)
+
+    moments = OnlineMoments(1)
+    for chunk in ([[1e9 + 1, 1e9 + 2]], [[1e9 + 3]]):
+        moments.add(np.array(chunk))
+    assert moments.std()[0] == pytest.approx(np.std([1, 2, 3]))
@@ -0,0 +1,61 @@
+"""
+TEST: PDF pipeline for export paperwork
+Rendering documents to PDF and cached page-by-page extraction
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+pytest.importorskip("PyPDF2")
+
+from pdf_pipeline import extract_pdfs, extract_tables, render_documents, text_to_pdf
+
+
+REPORT = """PALESTINIAN EXPORTS 2023
+Product       Value USD     Growth
+Olive Oil     5000000       8.5
+Dates         2000000       12.3
+Source: PCBS (estimates)
+"""
+
+
+def test_text_to_pdf_paginates():
+    pdf = text_to_pdf("\n".join(f"line {i}" for i in range(150)))
+    assert pdf.startswith(b"%PDF-1.4")
+    assert pdf.count(b"/Type /Page ") == 3
+
+
+def test_unsupported_text_fails_loudly(tmp_path):
+    with pytest.raises(ValueError, match="not representable"):
+        text_to_pdf("Exporter: تعاونية زيت الزيتون")
+    assert b"(Exporter: ??" in text_to_pdf("Exporter: تع", replace_unsupported=True)
+    assert text_to_pdf("Caf\u00e9 \u2013 total \u20ac350").startswith(b"%PDF")   # WinAnsi covers these
+
+    rendered = render_documents([("ok", "Invoice"), ("arabic", "المصدر: جنين")], tmp_path, workers=1)
+    assert rendered[0]["file"] and rendered[1]["file"] is None and "not representable" in rendered[1]["error"]
+    assert not (tmp_path / "arabic.pdf").exists()
+
+
+def test_extract_tables():
+    tables = extract_tables(REPORT)
+    assert tables == [[["Product", "Value USD", "Growth"], ["Olive Oil", "5000000", "8.5"],
+                       ["Dates", "2000000", "12.3"]]]
+
+
+def test_render_and_extract_roundtrip(tmp_path):
+    rendered = render_documents([("report", REPORT), ("invoice", "COMMERCIAL INVOICE\nTotal: $350.00")],
+                                tmp_path / "pdf", workers=2)
+    paths = [item["file"] for item in rendered]
+
+    pages = extract_pdfs(paths, tmp_path / "cache", workers=2)
+    assert [page["cache_hit"] for page in pages] == [False, False]
+    assert "Source: PCBS (estimates)" in pages[0]["text"]
+    assert pages[0]["tables"][0][1] == ["Olive Oil", "5000000", "8.5"]
+
+    again = extract_pdfs(paths, tmp_path / "cache", workers=2)
+    assert all(page["cache_hit"] for page in again)
+    assert again[1]["text"] == pages[1]["text"]
@@ -0,0 +1,156 @@
+"""
+TEST: Columnar Trade Store
+Checks categorical encoding, cube-backed series, store persistence and chunked bulk-dump loading
+"""
+
+import sys
+import zipfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+np = pytest.importorskip("numpy")
+
+from real_export_data import TradeStore, load_bulk_dump, market_data_records, synthetic_columns  # noqa: E402
+
+
+class FixedClassifier:
+    def best_code(self, title, description=""):
+        return {"Olive Oil": "1509.20", "Dates": "0804.10"}.get(title, "9999.99")
+
+
+def test_scanned_rows_become_flows():
+    records = market_data_records([
+        {"product": "Olive Oil", "export_value_usd": 5000000, "import_value_usd": 7500000, "year": 2023},
+        {"product": "Dates", "export_value_usd": 2000000, "year": "2022"}
+    ], FixedClassifier())
+    store = TradeStore()
+    assert store.append_records(records) == 3
+    assert store.labels["flow"] == ["export", "import"] and store.years() == [2022, 2023]
+    assert store.labels["hs_code"] == ["080410", "150920"]
+    # Scanner estimates stay out of the reported figures
+    assert store.series(product="Olive Oil")["value_usd"] == [0.0, 0.0]
+    assert store.series(product="Olive Oil", basis="scanned") == {"years": [2022, 2023], "value_usd": [0.0, 5000000.0]}
+    assert store.series("import", hs_code="150920", basis="scanned")["value_usd"] == [0.0, 7500000.0]
+    assert store.series("import", hs_code="1509.20", basis="scanned")["value_usd"] == [0.0, 7500000.0]
+    assert store.top("product", basis="scanned") == [("Olive Oil", 5000000.0), ("Dates", 2000000.0)]
+    assert store.series(product="Soap", basis="scanned")["value_usd"] == [0.0, 0.0]
+
+
+def test_cubes_track_appends_and_persist(tmp_path):
+    store = TradeStore()
+    first = synthetic_columns(20000, seed=1, products=50, partners=10, first_year=2005, years=10)
+    store.append(first)
+    second = synthetic_columns(5000, seed=2, products=60, partners=12, first_year=2000, years=20)
+    store.append(second)
+    assert len(store) == 25000 and store.years() == list(range(2000, 2020))
+
+    def scanned(flow, **filters):
+        mask = np.concatenate([first["flow"], second["flow"]]) == flow
+        for column, value in filters.items():
+            mask &= np.concatenate([first[column], second[column]]) == value
+        years = np.concatenate([first["year"], second["year"]])[mask]
+        values = np.concatenate([first["value_usd"], second["value_usd"]])[mask]
+        return [values[years == year].sum() for year in range(2000, 2020)]
+
+    np.testing.assert_allclose(store.series(product="HS55")["value_usd"], scanned("export", product="HS55"))
+    np.testing.assert_allclose(store.series("import", partner="P3")["value_usd"], scanned("import", partner="P3"))
+    np.testing.assert_allclose(store.series(product="HS7", partner="P3")["value_usd"],
+                               scanned("export", product="HS7", partner="P3"))
+    np.testing.assert_allclose(store.series()["value_usd"], scanned("export"))
+
+    store.save(tmp_path / "trade.npz")
+    loaded = TradeStore.load(tmp_path / "trade.npz")
+    assert loaded.top("market", year=2010) == store.top("market", year=2010)
+    loaded.append({"product": ["HS7"], "year": [2030], "value_usd": [1.0]})
+    assert loaded.series(product="HS7")["years"][-1] == 2030 and loaded.series(product="HS7")["value_usd"][-1] == 1.0
+    with pytest.raises(ValueError):
+        store.series(country="PSE")
+
+    # Another reporter's rows are kept and scanned, but never enter Palestine's cubes
+    total = store.series()["value_usd"]
+    store.append({"reporter": ["JOR"], "partner": ["P3"], "year": [2010], "value_usd": [5.0]})
+    assert store.series()["value_usd"] == total and store.top("market", year=2010) == loaded.top("market", year=2010)
+    assert store.series(reporter="JOR")["value_usd"][10] == 5.0
+
+
+def test_bulk_dump_streams_palestine_rows(tmp_path):
+    pytest.importorskip("pandas")
+    header = ("refYear,flowCode,reporterCode,reporterISO,partnerCode,partnerISO,cmdCode,cmdDesc,primaryValue,"
+              "netWgt,qtyUnit")
+    rows = [
+        "2021,X,275,PSE,842,USA,150910,Olive oil,1200000,300000,kg",
+        "2021,X,275,PSE,842,USA,150910,Olive oil,1200000,300000,kg",      # exact duplicate
+        "2021,M,376,ISR,275,PSE,150910,Olive oil,50000,,kg",              # Palestine as partner
+        "2021,X,400,JOR,842,USA,150910,Olive oil,9900000,1,kg",           # unrelated
+        "2022,X,275,,784,ARE,080410,Dates,800000,90000,kg",                # ISO missing, code only
+        "2022,1,275,PSE,842,USA,150910,Olive oil,1500000,310000,kg",
+        "2022,X,275,PSE,842,USA,TOTAL,All Commodities,2300000,,kg",      # commodity total
+        "2022,X,275,PSE,0,W00,150910,Olive oil,1500000,310000,kg",         # partner World
+    ]
+    dump = tmp_path / "comtrade.csv"
+    dump.write_text("\n".join([header] + rows) + "\n", encoding="utf-8")
+
+    store, stats = load_bulk_dump(dump, chunksize=2)
+    assert (stats["rows"], stats["chunks"], stats["aggregates"], stats["palestine"], stats["mirror"],
+            stats["added"], stats["duplicates"]) == (8, 4, 2, 5, 1, 4, 1)
+    assert store.series()["value_usd"] == [1200000.0, 2300000.0]
+    assert store.series(partner="USA")["value_usd"] == [1200000.0, 1500000.0]
+    assert store.series(hs_code="080410", reporter="PSE")["value_usd"] == [0.0, 800000.0]
+
+    # Israel's import from Palestine is kept as Palestine's export, on the mirror basis
+    assert store.series(basis="mirror")["value_usd"] == [50000.0, 0.0]
+    assert store.top("market", basis="mirror") == [("ISR", 50000.0)]
+    assert store.top("market", flow="import") == []
+    assert store.series("import", reporter="ISR")["value_usd"] == [0.0, 0.0]
+    assert store.labels["hs_code"] == ["150910", "080410"]
+
+    # The same rows again, as a zipped legacy-format dump, add nothing
+    legacy = ("Year,Trade Flow,Reporter Code,Reporter ISO,Partner Code,Partner ISO,Commodity Code,Trade Value (US$)\n"
+              "2021,Export,275,PSE,842,USA,150910,1200000\n2023,Export,275,PSE,842,USA,150910,1700000\n")
+    with zipfile.ZipFile(tmp_path / "legacy.zip", "w") as archive:
+        archive.writestr("legacy/data.csv", legacy)
+    store, stats = load_bulk_dump(tmp_path / "legacy.zip", store)
+    assert (stats["files"], stats["added"], stats["duplicates"]) == (1, 1, 1)
+    assert store.series(partner="USA")["value_usd"] == [1200000.0, 1500000.0, 1700000.0]
+    assert store.series()["value_usd"] == [1200000.0, 2300000.0, 1700000.0]
+
+
+def test_bulk_dump_keeps_one_hs_level_and_total_breakdowns(tmp_path):
+    pytest.importorskip("pandas")
+    header = "refYear,flowCode,reporterCode,reporterISO,partnerCode,partnerISO,cmdCode,primaryValue"
+    rows = ["2021,X,275,PSE,842,USA,15,100", "2021,X,275,PSE,842,USA,1509,100", "2021,X,275,PSE,842,USA,150910,100",
+            "2021,X,275,PSE,842,USA,08,40"]                 # chapter only reported at HS2
+    dump = tmp_path / "levels.csv"
+    dump.write_text("\n".join([header] + rows) + "\n", encoding="utf-8")
+    store, stats = load_bulk_dump(dump, chunksize=1)
+    assert store.series()["value_usd"] == [140.0] and stats["levels"] == 2
+    assert store.labels["hs_code"] == ["150910", "08"]
+
+    # With isLeaf, the dump says which rows are the finest level; breakdowns other than the total are dropped
+    header += ",isLeaf,aggrLevel,customsCode,motCode,partner2Code"
+    rows = ["2022,X,275,PSE,842,USA,15,100,false,2,C00,0,0", "2022,X,275,PSE,842,USA,150910,100,true,6,C00,0,0",
+            "2022,X,275,PSE,842,USA,150910,60,true,6,C01,0,0", "2022,X,275,PSE,842,USA,150910,70,true,6,C00,2100,0",
+            "2022,X,275,PSE,842,USA,150910,80,true,6,C00,0,400"]
+    dump.write_text("\n".join([header] + rows) + "\n", encoding="utf-8")
+    store, stats = load_bulk_dump(dump, store)
+    assert (stats["levels"], stats["breakdowns"], stats["added"]) == (1, 3, 1)
+    assert store.series()["value_usd"] == [140.0, 100.0]
+
+
+def test_pcbs_country_names_dedupe_against_comtrade(tmp_path):
+    pytest.importorskip("pandas")
+    comtrade = tmp_path / "comtrade.csv"
+    comtrade.write_text("refYear,flowCode,reporterCode,reporterISO,partnerCode,partnerISO,cmdCode,primaryValue\n"
+                        "2022,X,275,PSE,400,JOR,150910,500\n2022,X,275,,784,,080410,70\n", encoding="utf-8")
+    pcbs = tmp_path / "pcbs.csv"
+    pcbs.write_text("Year,Flow,Country,HS Code,Description,Value (USD)\n"
+                    "2022,Exports,Jordan,150910,Olive oil,500\n2022,Exports,U.A.E.,080410,Dates,70\n"
+                    "2022,Exports,Atlantis,080410,Dates,5\n", encoding="utf-8")
+    store, _ = load_bulk_dump(comtrade)
+    store, stats = load_bulk_dump(pcbs, store)
+    assert (stats["added"], stats["duplicates"]) == (1, 2)
+    assert store.series()["value_usd"] == [575.0]
+    assert store.top("market") == [("JOR", 500.0), ("ARE", 70.0), ("Atlantis", 5.0)]
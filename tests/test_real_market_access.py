@@ -0,0 +1,57 @@
+"""
+TEST: Market Plan Index
+Checks precomputed plan lookups and rebuilding when market data changes
+"""
+
+import json
+import sys
+
+import pytest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import real_market_access  # noqa: E402
+from real_market_access import BUSINESS_TYPES, CATEGORY_PLANS, RealMarketAccess, get_plan_index  # noqa: E402
+
+
+def test_plans_precomputed_for_every_combination(tmp_path):
+    index = get_plan_index(tmp_path / "missing.json")
+    assert len(index["plans"]) == len(BUSINESS_TYPES) * len(CATEGORY_PLANS) * len(index["markets"])
+
+    access = RealMarketAccess(tmp_path / "missing.json")
+    plan = access.generate_market_plan("Cooperative", "crafts", "Germany")
+    assert plan["destination"] == "EUROPE"
+    assert plan["product_category"] == "handicrafts"
+    assert "Whole Earth (UK distributor)" in plan["entry_points"]
+    assert any(story.startswith("Zaytoun CIC") for story in plan["success_stories"])
+    assert access.generate_market_plan("anything", "food") == CATEGORY_PLANS["food"]
+
+
+def test_index_rebuilds_when_market_data_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(real_market_access, "RELOAD_CHECK_SECONDS", 0)
+    data_file = tmp_path / "verified_markets.json"
+    access = RealMarketAccess(data_file)
+    assert "CANADA" not in access.verified_markets
+
+    data_file.write_text(json.dumps({"markets": {"CANADA": {
+        "countries": ["Canada"], "entry_points": ["Canadian fair trade network"],
+        "requirements": ["CFIA licence"], "price_premium": "15%", "contact": "Fairtrade Canada"
+    }}}), encoding="utf-8")
+
+    plan = access.generate_market_plan("company", "food", "Canada")
+    assert plan["entry_points"] == ["Canadian fair trade network"]
+    assert "CANADA" in RealMarketAccess(data_file).verified_markets
+
+
+def test_shared_index_is_read_only(tmp_path):
+    index = get_plan_index(tmp_path / "missing.json")
+    with pytest.raises(TypeError):
+        index["markets"]["EUROPE"]["requirements"] = []
+    access = RealMarketAccess(tmp_path / "missing.json")
+    plan = access.generate_market_plan("company", "food", "Germany")
+    plan["entry_points"].append("Mutated")
+    access.verified_markets["EUROPE"]["countries"].clear()
+    again = RealMarketAccess(tmp_path / "missing.json")
+    assert "Mutated" not in again.generate_market_plan("company", "food", "Germany")["entry_points"]
+    assert again.verified_markets["EUROPE"]["countries"]
@@ -0,0 +1,268 @@
+"""
+TEST: Resilience Index Engine
+Checks sub-indicators, normalization, vectorized group aggregation and incremental updates
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+np = pytest.importorskip("numpy")
+
+from business_directory import BusinessDirectory  # noqa: E402
+from gazetteer import get_gazetteer  # noqa: E402
+import resilience_index  # noqa: E402
+from resilience_index import (EntityTable, IncrementalResilienceIndex, ResilienceCube,  # noqa: E402
+                              ResilienceIndex, aggregate_rows, bootstrap_intervals, diff_entities,
+                              entities_digest, entity_row, product_diversification, synthetic_table)
+
+TRADE_PRODUCTS = [({"olive", "oil"}, 5000000.0), ({"date"}, 2000000.0), ({"honey"}, 250000.0)]
+TRADE_MARKETS = {"food": {"USA", "EU", "Japan"}}
+
+
+def row(id, location, quality, **indicators):
+    base = {"id": id, "locality": location, "governorate": location, "region": "West Bank",
+            "category": "food", "data_quality": quality, "year": 2026}
+    return {**base, **indicators}
+
+
+def test_entity_indicators():
+    assert product_diversification(["olive oil"], TRADE_PRODUCTS) == 0.0
+    assert product_diversification(["olive oil", "dates"], TRADE_PRODUCTS) == pytest.approx(1 - (25 + 4) / 49)
+
+    directory = BusinessDirectory()
+    directory.upsert({"name": "Canaan Fair Trade", "export_markets": ["USA", "EU", "Japan", "Canada"],
+                      "certifications": ["Fair Trade", "EU Organic"], "bds_status": "Compliant"})
+    verified = directory.get("Canaan Fair Trade")
+    entity = entity_row({"id": "b1", "name": "Canaan Fair Trade", "location": "Jenin", "category": "Food",
+                         "products": "olive oil, dates", "data_quality": "known_brand",
+                         "scraped_at": "2026-01-23T20:43:11"},
+                        get_gazetteer(), TRADE_MARKETS, TRADE_PRODUCTS, verified=verified)
+    assert (entity["governorate"], entity["region"], entity["year"]) == ("Jenin", "West Bank", 2026)
+    assert entity["export_diversification"] == 4 and entity["certification_coverage"] == 2
+    assert entity["bds_compliance"] == 1.0 and entity["data_reliability"] == 1.0
+
+    listing = entity_row({"id": "p1", "title": "Honey", "location": "Gaza", "category": "food",
+                          "data_quality": "mock", "bds_compliant": True},
+                         get_gazetteer(), TRADE_MARKETS, TRADE_PRODUCTS)
+    assert listing["region"] == "Gaza Strip" and listing["data_reliability"] == 0.0
+    assert listing["export_diversification"] == 3
+
+
+def test_scores_and_group_aggregates():
+    table = EntityTable.from_rows([
+        row("a", "Jenin", "verified", export_diversification=4, product_diversification=0.5, data_reliability=1,
+            bds_compliance=1, certification_coverage=2),
+        row("b", "Jenin", "mock", export_diversification=0, product_diversification=np.nan, data_reliability=0,
+            bds_compliance=0.5, certification_coverage=0),
+        row("c", "Hebron", "fallback", export_diversification=2, product_diversification=0.0, data_reliability=0,
+            bds_compliance=0, certification_coverage=1)
+    ])
+    index = ResilienceIndex({"export_diversification": 1, "product_diversification": 1, "data_reliability": 1,
+                             "bds_compliance": 1, "certification_coverage": 1})
+    scores = index.score(table)
+    assert scores["composite"][0] == pytest.approx(1.0)
+    assert scores["composite"][1] == pytest.approx(0.5 / 4)          # unknown indicator is skipped
+
+    grouped = index.aggregate(table, by=["locality"])
+    rows = {r["locality"]: r for r in aggregate_rows(grouped)}
+    assert rows["Jenin"]["entities"] == 2 and rows["Jenin"]["data_reliability"] == 0.5
+    assert rows["Jenin"]["product_diversification"] == 1.0
+    assert rows["Hebron"]["composite"] == pytest.approx((0.5 + 0 + 0 + 0 + 0.5) / 5)
+
+    with pytest.raises(ValueError):
+        ResilienceIndex({"happiness": 1})
+
+
+def test_aggregate_matches_entity_means_at_scale():
+    table = synthetic_table(200000, seed=1)
+    index = ResilienceIndex()
+    scores = index.score(table)
+    grouped = index.aggregate(table, by=["region", "year"])
+    assert grouped["count"].sum() == len(table)
+
+    # Group value equals the mean of normalized entity values (scaling is affine)
+    mask = (table.codes["region"] == 1) & (table.codes["year"] == 2)
+    position = np.flatnonzero((grouped["keys"]["region"] == "region_1") & (grouped["keys"]["year"] == "year_2"))[0]
+    np.testing.assert_allclose(grouped["indicators"][position], np.nanmean(scores["normalized"][mask], axis=0))
+
+
+def test_incremental_updates_match_full_rebuild():
+    rng = np.random.default_rng(3)
+    rows = [row(f"e{i}", ["Jenin", "Hebron", "Gaza"][i % 3], "verified", region=["West Bank", "Gaza Strip"][i % 2],
+                category=["food", "crafts"][i % 2 == 0 and i % 4 == 0],
+                export_diversification=float(rng.integers(1, 5)), product_diversification=rng.uniform(0.1, 0.9),
+                data_reliability=float(i % 2), bds_compliance=rng.choice([0.0, 0.5, 1.0]),
+                certification_coverage=float(rng.integers(0, 3)))
+            for i in range(60)]
+    rows[0].update(export_diversification=0.0, product_diversification=0.0, certification_coverage=0.0)
+    rows[1].update(export_diversification=6.0, product_diversification=1.0, certification_coverage=4.0)
+    index = ResilienceIndex()
+    incremental = IncrementalResilienceIndex(index).load(rows)
+
+    def check(current):
+        expected = aggregate_rows(index.aggregate(EntityTable.from_rows(current), by=["region", "category"]))
+        assert incremental.rows(["region", "category"]) == expected
+
+    # Changes inside the current bounds touch only their groups
+    current = [dict(r) for r in rows]
+    current[5]["export_diversification"] = 3.0
+    current[7]["region"] = "West Bank"
+    del current[9]
+    current.append(row("new", "Jenin", "mock", export_diversification=2.0, product_diversification=0.5,
+                       data_reliability=0.0, bds_compliance=0.5, certification_coverage=1.0))
+    summary = incremental.apply(diff_entities({r["id"]: r for r in rows}, current))
+    assert (summary["insert"], summary["update"], summary["delete"], summary["rebuilt"]) == (1, 2, 1, False)
+    assert incremental.rebuilds == 1
+    check(current)
+    assert incremental.entity_scores["new"] == pytest.approx(
+        index.score(EntityTable.from_rows(current))["composite"][-1])
+
+    # A new maximum, or removing the only entity at a bound, moves the bounds
+    current[5] = {**current[5], "export_diversification": 9.0}
+    assert incremental.apply([{"op": "update", "id": "e5", "row": current[5]}])["rebuilt"]
+    check(current)
+    assert incremental.apply([{"op": "delete", "id": "e5"}])["rebuilt"]
+    check(current[:5] + current[6:])
+
+
+def test_incremental_state_round_trip(tmp_path):
+    rows = [row(f"e{i}", ["Jenin", "Hebron", "Gaza"][i % 3], "verified", export_diversification=float(i % 4),
+                product_diversification=np.nan if i % 5 == 0 else i / 20, data_reliability=1.0,
+                bds_compliance=0.5, certification_coverage=float(i % 3))
+            for i in range(20)]
+    index = ResilienceIndex()
+    IncrementalResilienceIndex(index).load(rows).save(tmp_path / "state.json")
+
+    # Resuming restores the running sums and bound counts instead of rebuilding
+    restored = IncrementalResilienceIndex.restore(tmp_path / "state.json", index)
+    previous = {entity_id: entity[0] for entity_id, entity in restored.entities.items()}
+    assert restored.rebuilds == 0 and diff_entities(previous, rows) == []
+    current = rows[1:] + [dict(rows[0], id="moved", region="Gaza Strip")]
+    current[2] = dict(current[2], certification_coverage=1.0)
+    summary = restored.apply(diff_entities(previous, current))
+    assert (summary["insert"], summary["update"], summary["delete"], summary["rebuilt"]) == (1, 1, 1, False)
+    expected = aggregate_rows(index.aggregate(EntityTable.from_rows(current), by=["region", "category"]))
+    assert restored.rows(["region", "category"]) == expected
+
+
+def test_bootstrap_intervals():
+    rng = np.random.default_rng(5)
+    rows = [row(f"w{i}", "Jenin", "verified", export_diversification=float(rng.integers(0, 6)),
+                product_diversification=rng.random(), data_reliability=1.0, bds_compliance=1.0,
+                certification_coverage=float(rng.integers(0, 3))) for i in range(200)]
+    rows += [row(f"g{i}", "Gaza", "verified" if i < 4 else "fallback", region="Gaza Strip",
+                 export_diversification=5.0 if i < 4 else 0.0, product_diversification=0.5,
+                 data_reliability=1.0 if i < 4 else 0.0, bds_compliance=1.0,
+                 certification_coverage=2.0 if i < 4 else 0.0)
+             for i in range(12)]
+    table = EntityTable.from_rows(rows)
+    plain = {r["region"]: r for r in bootstrap_intervals(table, replicates=2000, seed=1, workers=1)}
+    expected = {r["region"]: r for r in aggregate_rows(ResilienceIndex().aggregate(table))}
+    for region, interval in plain.items():
+        assert interval["composite"] == expected[region]["composite"]
+        assert interval["ci_low"] <= interval["composite"] <= interval["ci_high"]
+    # Twelve Gaza rows back a much wider interval than two hundred West Bank rows
+    gaza, west_bank = plain["Gaza Strip"], plain["West Bank"]
+    assert gaza["ci_high"] - gaza["ci_low"] > 3 * (west_bank["ci_high"] - west_bank["ci_low"])
+
+    # Same blocks and seeds in a process pool
+    assert bootstrap_intervals(table, replicates=2000, seed=1, workers=2) == list(plain.values())
+
+    weighted = {r["region"]: r for r in bootstrap_intervals(table, replicates=2000, seed=1, weighted=True)}
+    assert weighted["Gaza Strip"]["composite"] > gaza["composite"]
+    assert weighted["Gaza Strip"]["effective_entities"] < 12 and weighted["West Bank"]["effective_entities"] == 200
+
+
+def test_rollup_cube_slices_and_refresh(tmp_path):
+    rng = np.random.default_rng(7)
+    places = [("Jenin", "Jenin", "West Bank"), ("Yabad", "Jenin", "West Bank"), ("Dura", "Hebron", "West Bank"),
+              ("Rafah", "Rafah", "Gaza Strip")]
+    rows = []
+    for i in range(120):
+        locality, governorate, region = places[i % 4]
+        rows.append({"id": f"e{i}", "locality": locality, "governorate": governorate, "region": region,
+                     "category": ["food", "crafts", "textiles"][i % 3],
+                     "data_quality": ["verified", "mock"][i % 2], "year": 2025 + i % 2,
+                     "export_diversification": float(rng.integers(0, 6)),
+                     "product_diversification": rng.random() if i % 5 else np.nan,
+                     "data_reliability": float(i % 2 == 0),
+                     "bds_compliance": rng.choice([0.0, 0.5, 1.0]),
+                     "certification_coverage": float(rng.integers(0, 3))})
+    index = ResilienceIndex()
+    table = EntityTable.from_rows(rows)
+    cube = ResilienceCube(index).build(table)
+
+    def expected(current, by, **filters):
+        grouped = aggregate_rows(index.aggregate(EntityTable.from_rows(current), by=by))
+        return next(r for r in grouped if all(str(r[column]) == str(value) for column, value in filters.items()))
+
+    for filters in ({"governorate": "Jenin", "category": "food"}, {"locality": "Dura", "year": 2025},
+                    {"region": "Gaza Strip", "data_quality": "mock", "category": "textiles"}):
+        cell = cube.slice(**filters)
+        reference = expected(rows, list(filters), **filters)
+        assert cell["entities"] == reference["entities"] and cell["composite"] == reference["composite"]
+    assert cube.slice()["entities"] == 120 and cube.slice(region="Atlantis") is None
+    with pytest.raises(ValueError):
+        cube.slice(region="West Bank", governorate="Jenin")
+
+    # Refresh with an update and an insert matches a rebuild; state survives the columnar file
+    changed = dict(rows[3], category="food", export_diversification=7.0)
+    added = dict(rows[0], id="new", locality="Beit Lahia", governorate="North Gaza", region="Gaza Strip")
+    current = rows[:3] + [changed] + rows[4:] + [added]
+    cube.refresh(added=EntityTable.from_rows([changed, added]), removed=EntityTable.from_rows([rows[3]]))
+    cube.save(tmp_path / "cube.npz")
+    loaded = ResilienceCube.load(tmp_path / "cube.npz", index)
+    rebuilt = ResilienceCube(index).build(EntityTable.from_rows(current))
+    for filters in ({"region": "Gaza Strip"}, {"governorate": "North Gaza", "category": "food"},
+                    {"category": "crafts", "year": 2025}, {}):
+        assert loaded.slice(**filters) == rebuilt.slice(**filters)
+
+    # Deleting the only entity on the export_diversification maximum tightens the bound
+    current.remove(changed)
+    with pytest.raises(ValueError):
+        ResilienceCube.load(tmp_path / "cube.npz", index).refresh(removed=EntityTable.from_rows([changed]))
+    loaded.refresh(removed=EntityTable.from_rows([changed]), current=EntityTable.from_rows(current))
+    rebuilt = ResilienceCube(index).build(EntityTable.from_rows(current))
+    assert loaded.high[0] == rebuilt.high[0] == 5.0
+    for filters in ({"region": "West Bank"}, {"governorate": "Jenin", "category": "food"}, {}):
+        assert loaded.slice(**filters) == rebuilt.slice(**filters)
+
+
+def test_cli_cube_stays_in_step_with_incremental_state(tmp_path, monkeypatch, capsys):
+    rows = [row(f"e{i}", ["Jenin", "Hebron", "Rafah"][i % 3], "verified", export_diversification=float(i % 4),
+                product_diversification=0.5, data_reliability=1.0, bds_compliance=0.5, certification_coverage=1.0)
+            for i in range(9)]
+    monkeypatch.setattr(resilience_index, "STATE_FILE", tmp_path / "state.json")
+    monkeypatch.setattr(resilience_index, "CUBE_FILE", tmp_path / "cube.npz")
+    monkeypatch.setattr(resilience_index, "load_entities", lambda: [dict(r) for r in rows])
+
+    def run(*argv):
+        monkeypatch.setattr(sys, "argv", ["resilience_index.py", *argv])
+        resilience_index.main()
+        return ResilienceCube.load(tmp_path / "cube.npz", ResilienceIndex())
+
+    monkeypatch.setattr(sys, "argv", ["resilience_index.py", "--incremental"])
+    resilience_index.main()
+    assert run("--cube").revision == entities_digest(rows)
+
+    # --cube after the data changed: the next incremental run must not apply the same change again
+    rows[0] = dict(rows[0], governorate="Rafah", locality="Rafah")
+    rows.append(row("e9", "Hebron", "mock", export_diversification=2.0))
+    run("--cube")
+    cube = run("--incremental")
+    rebuilt = ResilienceCube(ResilienceIndex()).build(EntityTable.from_rows(rows))
+    for filters in ({"governorate": "Rafah"}, {"governorate": "Hebron"}, {}):
+        assert cube.slice(**filters) == rebuilt.slice(**filters)
+
+    # With cube and state in step, the changelog is applied to the cube
+    del rows[4]
+    cube = run("--incremental")
+    assert cube.revision == entities_digest(rows)
+    rebuilt = ResilienceCube(ResilienceIndex()).build(EntityTable.from_rows(rows))
+    for filters in ({"governorate": "Hebron"}, {"region": "West Bank"}, {}):
+        assert cube.slice(**filters) == rebuilt.slice(**filters)
+    capsys.readouterr()
@@ -0,0 +1,65 @@
+"""
+TEST: Scenario Sweep Runner
+Checks grid expansion, duplicate cells and that extending a grid only computes new cells
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+pytest.importorskip("numpy")
+
+from scenario_sweep import ScenarioSweep, apply_scenario, parse_grid, sweep_table  # noqa: E402
+
+PRODUCTS = [
+    {"product": "Olive Oil", "export_value_usd": 5000000, "growth_rate": 8.5, "main_markets": ["USA", "EU"]},
+    {"product": "Dates", "export_value_usd": 2000000, "growth_rate": 12.3, "main_markets": ["GCC"]}
+]
+
+
+def test_scenario_parameters_map_to_inputs():
+    products, model = apply_scenario(PRODUCTS, {"olive_yield": 0.5, "eu_price": 0.2, "disruption.prob": 0.3})
+    assert products[0]["export_value_usd"] == pytest.approx(5000000 * 0.5 * 1.1)
+    assert products[1]["export_value_usd"] == 2000000
+    assert model == {"disruption": {"prob": 0.3}}
+    assert PRODUCTS[0]["export_value_usd"] == 5000000
+    assert parse_grid(["olive_yield=0.6, 1.0"]) == {"olive_yield": ["0.6", "1.0"]}
+
+    assert apply_scenario(PRODUCTS, {"growth.mean": 0.02})[1] == {"growth": {"mean": 0.02}}
+    assert apply_scenario(PRODUCTS, {"disruption.loss.high": 0.9, "disruption.prob": 0.2})[1] == \
+        {"disruption": {"loss": {"high": 0.9}, "prob": 0.2}}
+    assert apply_scenario(PRODUCTS, {"growth.dist": "uniform", "growth.low": -0.1, "growth.high": 0.2})[1] == \
+        {"growth": {"dist": "uniform", "low": -0.1, "high": 0.2}}
+    for bad in ({"disruption.probb": 0.3}, {"dsruption.prob": 0.3}, {"disruption.sd": 0.3}, {"harvest": 0.3},
+                {"disruption.loss": 0.3}, {"certification.delay": 1.0},      # scalar over a distribution
+                {"growth.dist": "uniform"},                                   # uniform needs low and high
+                {"growth.dist": "cauchy"}, {"disruption.prob": "high"}, {"disruption.loss.peak": 0.5}):
+        with pytest.raises(ValueError):
+            apply_scenario(PRODUCTS, bad)
+
+
+def test_sweep_memoizes_cells(tmp_path):
+    sweep = ScenarioSweep(PRODUCTS, paths=2000, years=3, seed=1, cache_dir=tmp_path, workers=1)
+    first = sweep.run({"border_closure_prob": [0.05, "0.30", 0.3], "olive_yield": [0.6, 1.0]})
+    assert (first["computed"], first["cached"], first["duplicates"]) == (4, 0, 2)
+    assert len(first["cells"]) == 6 and first["cells"][1]["params"] == {"disruption.prob": 0.05, "olive_yield": 1.0}
+
+    # Higher closure probability lowers expected revenue
+    means = {(c["params"]["disruption.prob"], c["params"]["olive_yield"]): c["products"][1]["final"]["mean"]
+             for c in first["cells"]}
+    assert means[(0.3, 1.0)] < means[(0.05, 1.0)]
+
+    extended = ScenarioSweep(PRODUCTS, paths=2000, years=3, seed=1, cache_dir=tmp_path, workers=2)
+    second = extended.run({"border_closure_prob": [0.05, 0.3, 0.5], "olive_yield": [0.6, 1.0]})
+    assert (second["computed"], second["cached"]) == (2, 4)
+    assert second["cells"][0]["products"] == first["cells"][0]["products"]
+
+    # A different seed is a different cell
+    reseeded = ScenarioSweep(PRODUCTS, paths=2000, years=3, seed=2, cache_dir=tmp_path, workers=1)
+    assert reseeded.run([{"disruption.prob": 0.05, "olive_yield": 0.6}])["computed"] == 1
+
+    rows = sweep_table(second)
+    assert len(rows) == 12 and rows[0]["product"] == "Olive Oil" and "final_p95_usd" in rows[0]
@@ -0,0 +1,54 @@
+"""
+TEST: Sobol Sensitivity Analysis
+Checks index estimates on a controlled model and reuse of cached evaluations
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+from sensitivity_analysis import SensitivityAnalysis, sobol_indices  # noqa: E402
+
+PRODUCTS = [
+    {"product": "Olive Oil", "export_value_usd": 5000000, "growth_rate": 8.5},
+    {"product": "Honey", "export_value_usd": 250000, "growth_rate": 7.3}
+]
+
+
+def test_estimators_on_additive_function():
+    rng = np.random.default_rng(0)
+    a, b = rng.random((2, 200000, 2))
+    f = lambda x: (x[:, 0] + 0.5 * x[:, 1])[None, :]  # noqa: E731  variances 1/12 and 1/48
+    ab0 = a.copy()
+    ab0[:, 0] = b[:, 0]
+    first, total, _ = sobol_indices(f(a), f(b), f(ab0))
+    assert first[0] == pytest.approx(0.8, abs=0.02) and total[0] == pytest.approx(0.8, abs=0.02)
+
+
+def test_factor_ranking_and_cache(tmp_path):
+    model = {"price": {"sigma": 0.0}, "certification": {"share": 0.5},
+             "disruption": {"prob": 0.3, "loss": {"dist": "uniform", "low": 0.4, "high": 0.6}}}
+    analysis = SensitivityAnalysis(PRODUCTS, years=3, model=model, n_base=2048, cache_dir=tmp_path)
+    results = analysis.indices(["total"])
+    assert analysis.stats["evaluations"] == 2048 * 6
+
+    for row in results["total"]:
+        factors = row["factors"]
+        assert factors["price"]["ST"] == 0.0
+        assert factors["market_access"]["ST"] > factors["certification"]["ST"] > 0.01
+        assert factors["market_access"]["S1"] <= factors["market_access"]["ST"] + 0.02
+        assert sum(f["S1"] for f in factors.values()) <= 1.05
+
+    # A new output from the same design reuses the cached evaluations
+    again = SensitivityAnalysis(PRODUCTS, years=3, model=model, n_base=2048, cache_dir=tmp_path)
+    extra = again.indices(["final", "portfolio_total", lambda revenue: revenue[:, :, 0]])
+    assert again.stats == {"evaluations": 0, "cache": "disk", "seconds": 0.0}
+    assert extra["portfolio_total"][0]["series"] == "All products"
+    assert extra["final"][0]["factors"]["certification"]["ST"] == 0.0    # delay never reaches year 3
+    assert extra["<lambda>"][0]["factors"]["certification"]["ST"] > 0.1
@@ -0,0 +1,65 @@
+"""
+TEST: Shipment Consolidation
+Checks carton/pallet packing and grouping by pickup area and ready date
+"""
+
+import sys
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from business_directory import BusinessDirectory  # noqa: E402
+from shipment_consolidation import ConsolidationPlanner, cartons_per_pallet, pack_lines, units_per_carton  # noqa: E402
+from trade_terms import parse_amount, parse_lead_time_days  # noqa: E402
+
+
+def test_terms_and_packing():
+    assert parse_lead_time_days("2-4 weeks") == 28
+    assert parse_lead_time_days("Seasonal", default=60) == 60
+    assert parse_amount("$1000") == (1000.0, "USD")
+
+    assert units_per_carton((6, 6, 3), 0.15) == 162       # capped by 25 kg less the 0.6 kg carton
+    assert units_per_carton((8, 8, 25), 1.2) == 20        # 7 x 4 x 1 grid, weight allows 20
+    assert units_per_carton((70, 50, 10), 3.0) == 0
+    assert units_per_carton((30, 30, 30), 24.8) == 0      # fits, but not with the carton's own weight
+    assert cartons_per_pallet() == 12
+
+    cartons, oversize = pack_lines({"oil": (45, (8, 8, 25), 1.2), "soap": (10, (6, 6, 3), 0.15),
+                                    "rug": (2, (200, 150, 5), 9.0), "anvil": (3, (20, 20, 20), 24.8)})
+    assert sum(c["contents"].get("oil", 0) for c in cartons) == 45
+    assert sum(c["contents"].get("soap", 0) for c in cartons) == 10
+    assert all(c["weight_kg"] <= 25 for c in cartons)
+    assert {item["sku"]: item["units"] for item in oversize} == {"rug": 2, "anvil": 3}
+    with pytest.raises(ValueError):
+        pack_lines({"oil": (-3, (8, 8, 25), 1.2)})
+
+
+def test_plan_groups_pickups_and_windows():
+    directory = BusinessDirectory()
+    directory.upsert({"name": "Hebron Glass", "location": "Hebron", "lead_time": "1 week"})
+    directory.upsert({"name": "Halhul Pottery", "location": "Halhul", "lead_time": "2 weeks"})
+    directory.upsert({"name": "Jenin Oil", "location": "Jenin", "lead_time": "Seasonal"})
+    planner = ConsolidationPlanner(directory=directory)
+
+    plan = planner.plan([
+        {"producer": "Hebron Glass", "sku": "PAL-CRAFT-001", "quantity": "30", "destination": "EU"},
+        {"producer": "Halhul Pottery", "sku": "PAL-CRAFT-003", "quantity": "20", "destination": "EU"},
+        {"producer": "Jenin Oil", "sku": "PAL-FOOD-001", "quantity": "100", "destination": "EU"},
+        {"producer": "Hebron Glass", "sku": "PAL-CRAFT-001", "quantity": "5", "destination": "EU",
+         "ready_date": "2026-06-01"},
+        {"producer": "Nobody", "sku": "PAL-FOOD-001", "quantity": "1", "destination": "EU"},
+        {"producer": "Jenin Oil", "sku": "PAL-FOOD-001", "quantity": "0", "destination": "EU"},
+        {"producer": "Jenin Oil", "sku": "PAL-FOOD-001", "quantity": "-4", "destination": "EU"}
+    ], order_date=date(2026, 1, 1))
+
+    shipments = {(s["pickup_area"], s["ready_date"]): s for s in plan["shipments"]}
+    assert shipments[("Halhul", "2026-01-15")]["producers"] == ["Halhul Pottery", "Hebron Glass"]
+    assert ("Jenin", "2026-03-02") in shipments
+    assert ("Halhul", "2026-06-01") in shipments
+    assert plan["errors"] == [{"row": 5, "error": "Unknown producer: Nobody"},
+                              {"row": 6, "error": "Quantity must be positive: 0"},
+                              {"row": 7, "error": "Quantity must be positive: -4"}]
+    assert plan["totals"]["estimated_cost_usd"] > 0
@@ -0,0 +1,88 @@
+"""
+TEST: Toolkit Stage Runner
+Checks stage caching, --only/--from partial runs and the toolkit stage graph
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from palestine_real_toolkit import PalestineRealToolkit  # noqa: E402
+from stage_runner import Stage, StageRunner  # noqa: E402
+
+
+SOURCE = [1, 2, 3]
+
+
+def load():
+    return list(SOURCE)
+
+
+def double(values):
+    return [v * 2 for v in values]
+
+
+def total(values, doubled):
+    return sum(values) + sum(doubled)
+
+
+def _stages(params=None):
+    return [
+        Stage("load", load, params=params),
+        Stage("double", double, deps=["load"]),
+        Stage("total", total, deps=["load", "double"])
+    ]
+
+
+def test_cache_and_partial_runs(tmp_path):
+    first = StageRunner(_stages(), tmp_path, workers=2).run()
+    assert first["results"]["total"] == 18
+    assert [s["status"] for s in first["stats"]] == ["run", "run", "run"]
+    assert all(s["peak_memory_kb"] >= 0 for s in first["stats"])
+
+    second = StageRunner(_stages(), tmp_path, workers=1).run()
+    assert [s["status"] for s in second["stats"]] == ["cached", "cached", "cached"]
+
+    partial = StageRunner(_stages(), tmp_path, workers=1).run(start="double")
+    assert {s["stage"]: s["status"] for s in partial["stats"]} == {"load": "cached", "double": "run", "total": "run"}
+
+    only = StageRunner(_stages(), tmp_path, workers=1).run(only=["double"])
+    assert [s["stage"] for s in only["stats"]] == ["load", "double"]
+
+    changed = StageRunner(_stages({"region": "Hebron"}), tmp_path, workers=1).run()
+    assert [s["status"] for s in changed["stats"]] == ["run", "run", "run"]
+
+
+def test_module_data_edits_invalidate_cache(tmp_path, monkeypatch):
+    StageRunner(_stages(), tmp_path, workers=1).run()
+    monkeypatch.setattr(sys.modules[__name__], "SOURCE", [1, 2, 4])
+    rerun = StageRunner(_stages(), tmp_path, workers=1).run()
+    assert [s["status"] for s in rerun["stats"]] == ["run", "run", "run"]
+    assert rerun["results"]["total"] == 21
+
+
+def test_imported_project_code_is_hashed(tmp_path, monkeypatch):
+    (tmp_path / "helper_rules.py").write_text("RATE = 1\n", encoding="utf-8")
+    (tmp_path / "helper_stage.py").write_text(
+        "def stage():\n    from helper_rules import RATE\n    return RATE\n", encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    import helper_stage
+
+    before = Stage("stage", helper_stage.stage).code_hash()
+    assert Stage("stage", helper_stage.stage).code_hash() == before
+    (tmp_path / "helper_rules.py").write_text("RATE = 2\n", encoding="utf-8")
+    assert Stage("stage", helper_stage.stage).code_hash() != before
+
+
+def test_toolkit_regions_share_independent_stages(tmp_path):
+    cache = tmp_path / "cache"
+    run = PalestineRealToolkit(tmp_path, region="Bethlehem", cache_dir=cache).run_complete_toolkit(workers=1)
+    assert len(run["results"]["directory"]) == 2
+    assert (tmp_path / "bethlehem" / "complete_toolkit.json").exists()
+
+    run = PalestineRealToolkit(tmp_path, region="Jenin", cache_dir=cache).run_complete_toolkit(workers=1)
+    status = {s["stage"]: s["status"] for s in run["stats"]}
+    assert status["guides"] == "cached" and status["bds_checker"] == "cached"
+    assert status["directory"] == "run"
+    assert "Canaan Fair Trade" in (tmp_path / "jenin" / "actionable_report.txt").read_text(encoding="utf-8")